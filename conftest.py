@@ -0,0 +1,38 @@
+import pytest
+from django.core.cache import cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """La cache locale sopravvive tra i test: la svuotiamo ogni volta"""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def audit_buffer(settings):
+    """Nei test l'audit viene scritto nello stesso thread, senza flush in background"""
+    from core import audit
+    settings.AUDIT_BACKGROUND = False
+    audit.reset_buffer()
+    yield audit.get_buffer()
+    audit.reset_buffer()
+
+
+@pytest.fixture(autouse=True)
+def last_login_recorder(settings):
+    """Nei test i login vengono scritti subito, senza timer"""
+    from users import last_login
+    settings.LAST_LOGIN_FLUSH_INTERVAL = 0
+    last_login.reset_recorder()
+    yield
+    last_login.reset_recorder()
+
+
+@pytest.fixture
+def admin_user(db, django_user_model):
+    """Sostituisce quello di pytest-django (che non conosce la matricola); lo usa anche admin_client"""
+    return django_user_model.objects.create_superuser(
+        username="admin", email="admin@example.org", password="pass", matricola="999999"
+    )
@@ -0,0 +1,106 @@
+from django.conf import settings
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max, QuerySet
+from django.forms.models import BaseInlineFormSet
+from django.utils.functional import cached_property
+
+
+def estimate_rows(queryset):
+    """
+    Stima economica del numero di righe di una tabella: le statistiche del
+    planner su PostgreSQL, altrove il massimo della chiave primaria (una
+    lettura dell'indice). Ritorna None se la stima non è possibile.
+    """
+    model = queryset.model
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [model._meta.db_table])
+            row = cursor.fetchone()
+        if row and row[0] > 0:
+            return row[0]
+        return None
+    if model._meta.pk.get_internal_type() not in ('AutoField', 'BigAutoField'):
+        return None
+    # Il base manager non filtra: MAX(pk) resta una sola lettura dell'indice
+    return model._base_manager.using(queryset.db).aggregate(rows=Max('pk'))['rows']
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator per le changelist: senza filtri, oltre ADMIN_ESTIMATE_THRESHOLD
+    righe usa una stima invece di un COUNT(*) sull'intera tabella. Il filtro
+    del manager di default (es. le righe archiviate) non conta come filtro.
+    """
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and self.unfiltered(queryset):
+            estimate = estimate_rows(queryset)
+            if estimate is not None and estimate > settings.ADMIN_ESTIMATE_THRESHOLD:
+                return estimate
+        return super().count
+
+    @staticmethod
+    def unfiltered(queryset):
+        where = queryset.query.where
+        return not where or where == queryset.model._default_manager.all().query.where
+
+
+class InputFilter(admin.SimpleListFilter):
+    """
+    Filtro con una casella di testo al posto dell'elenco di tutte le
+    opzioni: `lookup` è il lookup ORM applicato al valore inserito.
+    """
+    template = 'admin/input_filter.html'
+    lookup = None
+
+    def lookups(self, request, model_admin):
+        # Serve almeno una voce perché il filtro venga mostrato
+        return ((None, None),)
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if value:
+            return queryset.filter(**{self.lookup: value.strip()})
+        return queryset
+
+    def choices(self, changelist):
+        yield {
+            'query_string': changelist.get_query_string(remove=[self.parameter_name]),
+            'query_parts': [
+                (name, value) for name, value in changelist.params.items()
+                if name != self.parameter_name
+            ],
+        }
+
+
+class PaginatedInlineFormSet(BaseInlineFormSet):
+    """Formset inline che mostra e salva una pagina di righe alla volta"""
+    per_page = 20
+    page_param = 'inline-page'
+    page_number = 1
+
+    def get_queryset(self):
+        if not hasattr(self, 'page'):
+            self.paginator = Paginator(super().get_queryset(), self.per_page)
+            self.page = self.paginator.get_page(self.page_number)
+        return self.page.object_list
+
+
+class PaginatedInlineMixin:
+    """Inline paginato: la pagina si sceglie con `?<page_param>=n`"""
+    formset = PaginatedInlineFormSet
+    template = 'admin/edit_inline/tabular_paginated.html'
+    per_page = 20
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        page_param = f'{self.model._meta.model_name}-page'
+        return type(formset.__name__, (formset,), {
+            'per_page': self.per_page,
+            'page_param': page_param,
+            'page_number': request.GET.get(page_param, 1),
+        })
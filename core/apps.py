@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'core'
+    verbose_name = "Core"
+
+    def ready(self):
+        from .sqlite import configure_sqlite
+        connection_created.connect(configure_sqlite, dispatch_uid='core.configure_sqlite')
@@ -0,0 +1,166 @@
+import atexit
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+
+from .models import AuditEvent
+
+logger = logging.getLogger(__name__)
+
+
+class AuditBuffer:
+    """
+    Accumula gli eventi di audit in memoria e li scrive a blocchi con
+    `bulk_create`, così le richieste non pagano un INSERT ciascuna.
+    La coda è limitata: quando è piena chi scrive svuota il buffer da sé
+    (backpressure) invece di far crescere la memoria senza limite.
+    """
+    def __init__(self, batch_size=200, max_size=10000, flush_interval=1.0, background=True):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.background = background
+        self._queue = queue.Queue(maxsize=max_size)
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def put(self, event):
+        while True:
+            try:
+                self._queue.put_nowait(event)
+                break
+            except queue.Full:
+                self.flush()
+        if self._queue.qsize() >= self.batch_size:
+            if self.background:
+                self.start()
+                self._wakeup.set()
+            else:
+                self.flush()
+        elif self.background:
+            self.start()
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def flush(self):
+        """
+        Scrive tutti gli eventi in coda; ritorna quanti ne ha scritti.
+        Se la scrittura fallisce gli eventi tornano in coda.
+        """
+        with self._flush_lock:
+            events = []
+            while True:
+                try:
+                    events.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if events:
+                try:
+                    with transaction.atomic():
+                        AuditEvent.objects.bulk_create(events, batch_size=self.batch_size)
+                except DatabaseError:
+                    self._requeue(events)
+                    raise
+            return len(events)
+
+    def _requeue(self, events):
+        dropped = 0
+        for event in events:
+            try:
+                self._queue.put_nowait(event)
+            except queue.Full:
+                dropped += 1
+        if dropped:
+            logger.error("Coda di audit piena: %s eventi persi", dropped)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._flush_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='audit-flush', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self._tick()
+
+    def _tick(self):
+        # Un errore non deve fermare il thread: gli eventi restano in coda
+        try:
+            self.flush()
+        except DatabaseError:
+            logger.exception("Scrittura dell'audit fallita, riprovo al prossimo intervallo")
+        finally:
+            close_old_connections()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = AuditBuffer(
+                    batch_size=settings.AUDIT_BATCH_SIZE,
+                    max_size=settings.AUDIT_QUEUE_SIZE,
+                    flush_interval=settings.AUDIT_FLUSH_INTERVAL,
+                    background=settings.AUDIT_BACKGROUND,
+                )
+    return _buffer
+
+
+def reset_buffer():
+    global _buffer
+    with _buffer_lock:
+        _buffer = None
+
+
+def record(action, instance, actor=None, changes=None, group=None):
+    """
+    Registra un evento di audit. L'evento entra nel buffer solo quando la
+    transazione che ha fatto la modifica viene confermata.
+    """
+    return record_many(action, instance._meta.model, [(instance.pk, group, changes)], actor)[0]
+
+
+def record_many(action, model, rows, actor=None):
+    """Come `record`, per molte righe dello stesso modello: `rows` è una lista di (pk, gruppo, changes)"""
+    events = [
+        AuditEvent(
+            actor_id=getattr(actor, 'pk', None),
+            action=action,
+            model=model._meta.label_lower,
+            object_id=pk,
+            group_id=group,
+            changes=changes,
+        )
+        for pk, group, changes in rows
+    ]
+
+    def enqueue():
+        buffer = get_buffer()
+        for event in events:
+            buffer.put(event)
+
+    transaction.on_commit(enqueue)
+    return events
+
+
+def diff(before, after):
+    """Campi cambiati tra due rappresentazioni, come {campo: [prima, dopo]}"""
+    return {
+        name: [before.get(name), value]
+        for name, value in after.items()
+        if before.get(name) != value
+    }
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .compression import precompress
+
+
+def catalog_key(model):
+    return f"catalog:{model._meta.label_lower}"
+
+
+def get_catalog(model):
+    return cache.get(catalog_key(model))
+
+
+def set_catalog(model, body):
+    """Salva in cache il body renderizzato insieme alle sue versioni compresse."""
+    entry = {'body': body, 'encodings': precompress(body)}
+    cache.set(catalog_key(model), entry, settings.CATALOG_CACHE_TIMEOUT)
+    return entry
+
+
+def invalidate_catalog(model):
+    cache.delete(catalog_key(model))
@@ -0,0 +1,142 @@
+import gzip
+import zlib
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli è opzionale
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard è opzionale
+    zstandard = None
+
+
+class StreamCompressor:
+    """
+    Compressore incrementale: ogni chunk viene compresso e svuotato subito,
+    così il client riceve i dati man mano che la view li produce.
+    """
+    def __init__(self, process, finish):
+        self._process = process
+        self._finish = finish
+
+    def compress(self, chunk):
+        return self._process(chunk)
+
+    def finish(self):
+        return self._finish()
+
+
+class Codec:
+    name = None
+    level = None
+
+    def compress(self, data):
+        raise NotImplementedError
+
+    def compressor(self):
+        raise NotImplementedError
+
+    def stream(self, chunks):
+        compressor = self.compressor()
+        for chunk in chunks:
+            yield compressor.compress(chunk)
+        yield compressor.finish()
+
+    async def astream(self, chunks):
+        compressor = self.compressor()
+        async for chunk in chunks:
+            yield compressor.compress(chunk)
+        yield compressor.finish()
+
+
+class GzipCodec(Codec):
+    name = 'gzip'
+    level = 6
+
+    def compress(self, data):
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def compressor(self):
+        obj = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return StreamCompressor(
+            lambda chunk: obj.compress(chunk) + obj.flush(zlib.Z_SYNC_FLUSH),
+            obj.flush,
+        )
+
+
+class BrotliCodec(Codec):  # pragma: no cover - richiede brotli
+    name = 'br'
+    level = 5
+
+    def compress(self, data):
+        return brotli.compress(data, quality=self.level)
+
+    def compressor(self):
+        obj = brotli.Compressor(quality=self.level)
+        return StreamCompressor(lambda chunk: obj.process(chunk) + obj.flush(), obj.finish)
+
+
+class ZstdCodec(Codec):  # pragma: no cover - richiede zstandard
+    name = 'zstd'
+    level = 3
+
+    def compress(self, data):
+        return zstandard.ZstdCompressor(level=self.level).compress(data)
+
+    def compressor(self):
+        obj = zstandard.ZstdCompressor(level=self.level).compressobj()
+        return StreamCompressor(
+            lambda chunk: obj.compress(chunk) + obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+            obj.flush,
+        )
+
+
+def available_codecs():
+    """Codec disponibili, nell'ordine di preferenza configurato."""
+    codecs = {'gzip': GzipCodec()}
+    if brotli is not None:
+        codecs['br'] = BrotliCodec()
+    if zstandard is not None:
+        codecs['zstd'] = ZstdCodec()
+    preference = getattr(settings, 'COMPRESSION_ENCODINGS', ['br', 'zstd', 'gzip'])
+    return [codecs[name] for name in preference if name in codecs]
+
+
+def negotiate(accept_encoding, codecs=None):
+    """
+    Sceglie il codec con q-value più alto tra quelli accettati dal client;
+    a parità di q-value vince l'ordine di preferenza del server.
+    """
+    if not accept_encoding:
+        return None
+    codecs = available_codecs() if codecs is None else codecs
+
+    weights = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+
+    best, best_q = None, 0.0
+    for codec in codecs:
+        q = weights.get(codec.name, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = codec, q
+    return best
+
+
+def precompress(body):
+    """Ritorna il body compresso con ogni codec disponibile, se ne vale la pena."""
+    if len(body) < settings.COMPRESSION_MIN_SIZE:
+        return {}
+    return {codec.name: codec.compress(body) for codec in available_codecs()}
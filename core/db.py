@@ -0,0 +1,30 @@
+from django.db import connections
+
+
+def connection_stats(alias):
+    """Statistiche della connessione o del pool associato a un alias del DB."""
+    connection = connections[alias]
+    settings_dict = connection.settings_dict
+    stats = {
+        'alias': alias,
+        'vendor': connection.vendor,
+        'conn_max_age': settings_dict['CONN_MAX_AGE'],
+        'health_checks': settings_dict['CONN_HEALTH_CHECKS'],
+        'connected': connection.connection is not None,
+        'pooled': False,
+    }
+
+    # Il backend PostgreSQL espone il pool psycopg quando OPTIONS['pool'] è attivo
+    pool = getattr(connection, 'pool', None)
+    if pool is not None:
+        stats['pooled'] = True
+        stats['pool'] = {
+            'min_size': pool.min_size,
+            'max_size': pool.max_size,
+            **pool.get_stats(),
+        }
+    return stats
+
+
+def pool_stats():
+    return [connection_stats(alias) for alias in connections]
@@ -0,0 +1,89 @@
+import itertools
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+@dataclass
+class Event:
+    id: int
+    type: str
+    data: dict
+    group: int | None = None
+    timestamp: float = field(default_factory=time.time)
+
+    def as_dict(self):
+        return asdict(self)
+
+
+class InProcessBackend:
+    """
+    Backend in memoria: un buffer circolare degli ultimi eventi, condiviso
+    dai thread del processo. Per più processi serve un backend esterno.
+    """
+    def __init__(self, size=1000):
+        self._events = deque(maxlen=size)
+        self._ids = itertools.count(1)
+        self._condition = threading.Condition()
+
+    def publish(self, type, data, group=None):
+        with self._condition:
+            event = Event(next(self._ids), type, data, group)
+            self._events.append(event)
+            self._condition.notify_all()
+        return event
+
+    def last_id(self):
+        with self._condition:
+            return self._events[-1].id if self._events else 0
+
+    def since(self, last_id, groups=None):
+        with self._condition:
+            # Un Last-Event-ID più grande dell'ultimo evento arriva da un
+            # processo precedente: si riparte dal buffer corrente
+            if self._events and last_id > self._events[-1].id:
+                last_id = 0
+            return [
+                event for event in self._events
+                if event.id > last_id and (not groups or event.group in groups)
+            ]
+
+    def wait(self, last_id, groups=None, timeout=None):
+        """Attende fino a `timeout` secondi che arrivino eventi dopo `last_id`."""
+        with self._condition:
+            events = []
+
+            def ready():
+                events[:] = self.since(last_id, groups)
+                return bool(events)
+
+            self._condition.wait_for(ready, timeout)
+            return events
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                backend = import_string(settings.EVENTS_BACKEND)
+                _broker = backend(**getattr(settings, 'EVENTS_BACKEND_OPTIONS', {}))
+    return _broker
+
+
+def reset_broker():
+    global _broker
+    with _broker_lock:
+        _broker = None
+
+
+def publish(type, data, group=None):
+    return get_broker().publish(type, data, group)
@@ -0,0 +1,74 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from core.renderers import FastJSONRenderer
+from group_projects.models import Goal, GroupGoal, GroupProject, Topic, UserGroup
+from group_projects.serializers import (
+    GoalSerializer, GroupGoalsSerializer, GroupProjectSerializer,
+    TopicSerializer, UserGroupSerializer,
+)
+from users.models import User
+
+ENDPOINTS = [
+    ('topics', Topic, TopicSerializer),
+    ('goals', Goal, GoalSerializer),
+    ('groups', GroupProject, GroupProjectSerializer),
+    ('group-goals', GroupGoal, GroupGoalsSerializer),
+    ('group-users', UserGroup, UserGroupSerializer),
+]
+
+
+class Command(BaseCommand):
+    help = "Confronta il throughput delle liste API: percorso standard DRF contro percorso veloce"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help="Righe da generare per ogni tabella")
+        parser.add_argument('--repeat', type=int, default=10, help="Ripetizioni per ogni misura")
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+
+        # I dati di prova vengono creati in una transazione annullata alla fine
+        with transaction.atomic():
+            seed(rows)
+            self.stdout.write(f"{'endpoint':<14}{'standard rows/s':>18}{'fast rows/s':>16}{'speedup':>10}")
+            for name, model, serializer_class in ENDPOINTS:
+                queryset = model.objects.all()
+                count = queryset.count()
+                standard = measure(repeat, lambda: JSONRenderer().render(serializer_class(queryset, many=True).data))
+                fast = measure(repeat, lambda: FastJSONRenderer().render(serializer_class.fast_data(queryset)))
+                self.stdout.write(
+                    f"{name:<14}{count / standard:>18,.0f}{count / fast:>16,.0f}{standard / fast:>9.1f}x"
+                )
+            transaction.set_rollback(True)
+
+
+def measure(repeat, func):
+    """Ritorna il tempo migliore, in secondi, su `repeat` esecuzioni."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def seed(rows):
+    taken = set(User.objects.values_list('matricola', flat=True))
+    matricole = (f"{i:06d}" for i in range(1_000_000) if f"{i:06d}" not in taken)
+    users = User.objects.bulk_create(
+        User(username=f"bench_{i}", email=f"bench_{i}@example.org", matricola=next(matricole))
+        for i in range(rows)
+    )
+    topics = Topic.objects.bulk_create(Topic(title=f"Topic {i}") for i in range(rows))
+    goals = Goal.objects.bulk_create(
+        Goal(title=f"Goal {i}", description="Benchmark goal", points=i % 5 + 1) for i in range(rows)
+    )
+    groups = GroupProject.objects.bulk_create(
+        GroupProject(name=f"Group {i}", topic=topics[i]) for i in range(rows)
+    )
+    GroupGoal.objects.bulk_create(GroupGoal(group=groups[i], goal=goals[i]) for i in range(rows))
+    UserGroup.objects.bulk_create(UserGroup(user=users[i], group=groups[i]) for i in range(rows))
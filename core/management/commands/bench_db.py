@@ -0,0 +1,67 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core import signals
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.db import connection_stats
+
+
+class Command(BaseCommand):
+    help = "Confronta il throughput con una connessione per richiesta e con connessioni persistenti/pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help="Richieste simulate per modalità")
+        parser.add_argument('--concurrency', type=int, default=4, help="Thread concorrenti")
+        parser.add_argument('--database', default='default', help="Alias del DB da usare")
+
+    def handle(self, *args, **options):
+        alias = options['database']
+        settings_dict = connections.settings[alias]
+        conn_max_age = settings_dict['CONN_MAX_AGE']
+        db_options = settings_dict.get('OPTIONS', {})
+
+        if 'pool' in db_options:
+            configured = 'pool psycopg'
+        else:
+            configured = f'persistenti (CONN_MAX_AGE={conn_max_age})'
+        without_pool = {key: value for key, value in db_options.items() if key != 'pool'}
+        modes = [
+            ('una connessione per richiesta', 0, without_pool),
+            (configured, conn_max_age, db_options),
+        ]
+
+        self.stdout.write(f"{'modalità':<40}{'req/s':>12}{'ms/req':>10}")
+        try:
+            for name, max_age, mode_options in modes:
+                connections[alias].close()
+                settings_dict['CONN_MAX_AGE'] = max_age
+                settings_dict['OPTIONS'] = mode_options
+                elapsed = self.run(alias, options['requests'], options['concurrency'])
+                self.stdout.write(
+                    f"{name:<40}{options['requests'] / elapsed:>12,.0f}"
+                    f"{elapsed / options['requests'] * 1000:>10.3f}"
+                )
+        finally:
+            settings_dict['CONN_MAX_AGE'] = conn_max_age
+            settings_dict['OPTIONS'] = db_options
+
+        self.stdout.write(f"\n{connection_stats(alias)}")
+
+    def run(self, alias, requests, concurrency):
+        def request(_):
+            # Stesso ciclo di vita di una richiesta HTTP: le connessioni scadute
+            # vengono chiuse a inizio e fine richiesta in base a CONN_MAX_AGE
+            signals.request_started.send(sender=self.__class__)
+            try:
+                with connections[alias].cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                    cursor.fetchone()
+            finally:
+                signals.request_finished.send(sender=self.__class__)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(request, range(requests)))
+        return time.perf_counter() - start
@@ -0,0 +1,60 @@
+import re
+import time
+from urllib.parse import urlparse
+
+from django.core.management.base import BaseCommand
+
+from group_projects.validators import https_hostname_error
+
+SAMPLE_URLS = [
+    "https://example.com",
+    "https://sub.example.com/path?q=1",
+    "https://example.co.uk",
+    "https://github.com/ssd-group2-2025/gpm-django-be",
+    "http://example.com",
+    "https://localhost:8000",
+    "https://192.168.1.1",
+    "https://[2001:db8::1]",
+    "https://invalid_hostname",
+]
+
+
+def legacy_error(value):
+    """Implementazione precedente, come riferimento per il confronto"""
+    parsed = urlparse(value)
+    if parsed.scheme != "https":
+        return "URL must use HTTPS."
+    hostname = parsed.hostname
+    if not hostname:
+        return "URL must contain a valid hostname."
+    if hostname.lower() in ("localhost", "127.0.0.1"):
+        return "Localhost URLs are not allowed."
+    if re.match(r"^\d{1,3}(\.\d{1,3}){3}$", hostname) or re.match(r"^\[?[0-9a-fA-F:]+\]?$", hostname):
+        return "IP addresses are not allowed, only hostnames."
+    if not re.match(r"^([a-zA-Z0-9-]+\.)+[a-zA-Z]{2,}$", hostname):
+        return "Invalid hostname format."
+    return None
+
+
+class Command(BaseCommand):
+    help = "Microbenchmark della validazione dei link dei gruppi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        urls = SAMPLE_URLS * (options['iterations'] // len(SAMPLE_URLS))
+
+        modes = [
+            ('precedente', legacy_error),
+            ('precompilata, senza cache', https_hostname_error.__wrapped__),
+            ('precompilata, con cache LRU', https_hostname_error),
+        ]
+        self.stdout.write(f"{'modalità':<32}{'µs/URL':>10}")
+        for name, func in modes:
+            https_hostname_error.cache_clear()
+            start = time.perf_counter()
+            for url in urls:
+                func(url)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"{name:<32}{elapsed / len(urls) * 1e6:>10.2f}")
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core.schema import build_schema, schema_path
+
+
+class Command(BaseCommand):
+    help = "Genera lo schema OpenAPI e lo salva su disco, da eseguire al deploy"
+
+    def handle(self, *args, **options):
+        cached = build_schema()
+        self.stdout.write(self.style.SUCCESS(
+            f"Schema scritto in {schema_path()} ({len(cached.body)} byte, ETag {cached.etag})"
+        ))
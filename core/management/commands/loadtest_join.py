@@ -0,0 +1,78 @@
+import math
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from group_projects.models import GroupProject, Topic, UserGroup
+from group_projects.views import GroupProjectViewSet
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Load test: N utenti entrano contemporaneamente nello stesso gruppo, contando gli errori di lock"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50, help="Utenti che fanno join in parallelo")
+
+    def handle(self, *args, **options):
+        count = options['users']
+        tag = uuid.uuid4().hex[:8]
+        topic = Topic.objects.create(title=f"Load test {tag}")
+        group = GroupProject.objects.create(name=f"Load test {tag}", topic=topic)
+        users = create_users(tag, count)
+
+        view = GroupProjectViewSet.as_view({'post': 'join'})
+        factory = APIRequestFactory()
+        barrier = threading.Barrier(count)
+        results = []
+
+        def join(user):
+            request = factory.post(f"/api/v1/groups/{group.pk}/join/")
+            force_authenticate(request, user=user)
+            barrier.wait()
+            start = time.perf_counter()
+            try:
+                status = view(request, pk=group.pk).status_code
+            except OperationalError as exc:
+                status = 'locked' if 'locked' in str(exc) else 'error'
+            finally:
+                connection.close()
+            results.append((status, time.perf_counter() - start))
+
+        try:
+            with ThreadPoolExecutor(max_workers=count) as executor:
+                list(executor.map(join, users))
+            members = UserGroup.objects.filter(group=group).count()
+        finally:
+            UserGroup.objects.filter(group=group).delete()
+            group.delete()
+            topic.delete()
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+        latencies = sorted(elapsed for _, elapsed in results)
+        locked = sum(1 for status, _ in results if status == 'locked')
+        failed = sum(1 for status, _ in results if status != 200)
+        self.stdout.write(
+            f"join concorrenti: {count}, riusciti: {members}, errori di lock: {locked}, altri errori: {failed - locked}"
+        )
+        self.stdout.write(
+            f"latenza p50 {statistics.median(latencies) * 1000:.1f} ms, "
+            f"p95 {latencies[max(0, math.ceil(len(latencies) * 0.95) - 1)] * 1000:.1f} ms"
+        )
+        style = self.style.SUCCESS if failed == 0 else self.style.ERROR
+        self.stdout.write(style("OK" if failed == 0 else "FALLITO"))
+
+
+def create_users(tag, count):
+    taken = set(User.objects.values_list('matricola', flat=True))
+    matricole = (f"{i:06d}" for i in range(1_000_000) if f"{i:06d}" not in taken)
+    return User.objects.bulk_create(
+        User(username=f"loadtest_{tag}_{i}", email=f"loadtest_{tag}_{i}@example.org", matricola=next(matricole))
+        for i in range(count)
+    )
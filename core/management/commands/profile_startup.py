@@ -0,0 +1,77 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.startup import group_by_package, parse_importtime
+
+PROFILES = ('full', 'api')
+
+
+class Command(BaseCommand):
+    help = "Misura il tempo di avvio a freddo: import per app e modulo, costo di AppConfig.ready()"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', choices=PROFILES + ('compare',), default='compare',
+                            help="Profilo del worker da misurare, oppure 'compare' per confrontarli")
+        parser.add_argument('--repeat', type=int, default=3, help="Avvii a freddo per profilo")
+        parser.add_argument('--top', type=int, default=15, help="Numero di moduli più lenti da mostrare")
+
+    def handle(self, *args, **options):
+        profiles = PROFILES if options['profile'] == 'compare' else (options['profile'],)
+        results = {profile: self.profile(profile, options['repeat']) for profile in profiles}
+
+        for profile, result in results.items():
+            self.report(profile, result, options['top'])
+
+        if len(results) > 1:
+            full, api = results['full']['total'], results['api']['total']
+            self.stdout.write(self.style.SUCCESS(
+                f"\nAvvio a freddo: full {full * 1000:.0f} ms, api {api * 1000:.0f} ms "
+                f"({(1 - api / full) * 100:.0f}% in meno)"
+            ))
+
+    def profile(self, profile, repeat):
+        env = {**os.environ, 'DJANGO_WORKER_PROFILE': profile,
+               'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'gpm_django_be.settings')}
+        runs = []
+        for _ in range(repeat):
+            proc = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-m', 'core.startup'],
+                cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                raise CommandError(f"Avvio del profilo '{profile}' fallito:\n{proc.stderr[-2000:]}")
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            result['modules'] = parse_importtime(proc.stderr)
+            runs.append(result)
+
+        # Il run mediano è il più rappresentativo
+        runs.sort(key=lambda run: run['total'])
+        result = runs[len(runs) // 2]
+        result['total'] = statistics.median(run['total'] for run in runs)
+        return result
+
+    def report(self, profile, result, top):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\nProfilo '{profile}'"))
+        self.stdout.write(
+            f"  django.setup() {result['setup'] * 1000:.1f} ms, URLconf {result['urls'] * 1000:.1f} ms, "
+            f"totale {result['total'] * 1000:.1f} ms, moduli importati {len(result['modules'])}"
+        )
+
+        self.stdout.write("  Import per package (self):")
+        packages = sorted(group_by_package(result['modules']).items(), key=lambda item: -item[1])
+        for name, us in packages[:top]:
+            self.stdout.write(f"    {name:<40}{us / 1000:>10.1f} ms")
+
+        self.stdout.write("  Moduli più lenti (cumulativo):")
+        for name, _, cumulative in sorted(result['modules'], key=lambda m: -m[2])[:top]:
+            self.stdout.write(f"    {name:<60}{cumulative / 1000:>10.1f} ms")
+
+        self.stdout.write("  AppConfig.ready():")
+        for name, seconds in sorted(result['ready'].items(), key=lambda item: -item[1]):
+            self.stdout.write(f"    {name:<40}{seconds * 1000:>10.2f} ms")
@@ -0,0 +1,33 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import AuditEvent
+
+
+class Command(BaseCommand):
+    help = "Cancella gli eventi di audit più vecchi del periodo di conservazione"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.AUDIT_RETENTION_DAYS)
+        parser.add_argument('--batch', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - datetime.timedelta(days=options['days'])
+        # Gli id crescono col tempo: basta trovare l'ultimo id scaduto e
+        # cancellare a blocchi di id, senza una DELETE unica che blocca tutto
+        last = (
+            AuditEvent.objects.filter(created_at__lt=cutoff)
+            .order_by('-id').values_list('id', flat=True).first()
+        )
+        deleted = 0
+        if last is not None:
+            start = AuditEvent.objects.order_by('id').values_list('id', flat=True).first()
+            while start <= last:
+                end = min(start + options['batch'] - 1, last)
+                count, _ = AuditEvent.objects.filter(id__gte=start, id__lte=end).delete()
+                deleted += count
+                start = end + 1
+        self.stdout.write(self.style.SUCCESS(f"Eliminati {deleted} eventi precedenti al {cutoff:%Y-%m-%d}"))
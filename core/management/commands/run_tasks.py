@@ -0,0 +1,48 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils.module_loading import autodiscover_modules
+
+from core import tasks
+
+
+class Command(BaseCommand):
+    help = "Worker dei task differiti: li esegue con un pool di thread"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.TASKS_WORKERS, help="Thread del pool")
+        parser.add_argument('--poll', type=float, default=settings.TASKS_POLL_INTERVAL,
+                            help="Secondi di attesa quando la coda è vuota")
+        parser.add_argument('--once', action='store_true', help="Esegue i task scaduti ed esce")
+
+    def handle(self, *args, **options):
+        # I task si registrano all'import dei moduli `tasks` delle app
+        autodiscover_modules('tasks')
+        stale = tasks.requeue_stale(settings.TASKS_STALE_SECONDS)
+        if stale:
+            self.stdout.write(f"Rimessi in coda {stale} task interrotti")
+
+        workers = options['workers']
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='task') as executor:
+            while True:
+                claimed = tasks.claim(workers)
+                if claimed:
+                    wait([executor.submit(self.run, task) for task in claimed])
+                    continue
+                if options['once']:
+                    break
+                close_old_connections()
+                time.sleep(options['poll'])
+
+        for name, stats in tasks.task_stats().items():
+            self.stdout.write(f"{name}: {stats}")
+
+    @staticmethod
+    def run(task):
+        try:
+            return tasks.execute(task)
+        finally:
+            close_old_connections()
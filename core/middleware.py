@@ -0,0 +1,102 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from .compression import negotiate
+from .routers import read_from_replica
+
+# Niente text/html: le pagine con token CSRF compresse sono esposte a BREACH
+COMPRESSIBLE_TYPES = (
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'text/csv',
+    'text/plain',
+)
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Comprime le risposte con gzip, brotli o zstd in base all'Accept-Encoding,
+    solo sotto COMPRESSION_PATHS (le API). Le risposte più corte di COMPRESSION_MIN_SIZE non vengono compresse;
+    se la view allega `response.precompressed`, si usa direttamente quello.
+    """
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+
+        if not request.path.startswith(tuple(settings.COMPRESSION_PATHS)):
+            return response
+
+        content_type = response.get('Content-Type', '')
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return response
+
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        codec = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if codec is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = codec.astream(response.streaming_content)
+            else:
+                response.streaming_content = codec.stream(response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            precompressed = getattr(response, 'precompressed', None) or {}
+            compressed = precompressed.get(codec.name) or codec.compress(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = codec.name
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Abilita le repliche in lettura per le richieste sicure. Dopo una
+    scrittura il client resta sul primario per REPLICA_PIN_SECONDS,
+    così non legge dati non ancora replicati.
+    """
+    pin_cookie = 'db-primary-pin'
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pin_key = self.pin_key(request)
+        pinned = request.COOKIES.get(self.pin_cookie) or (pin_key and cache.get(pin_key))
+        token = read_from_replica.set(request.method in self.safe_methods and not pinned)
+        try:
+            response = self.get_response(request)
+        finally:
+            read_from_replica.reset(token)
+
+        if request.method not in self.safe_methods and response.status_code < 400:
+            seconds = settings.REPLICA_PIN_SECONDS
+            response.set_cookie(self.pin_cookie, '1', max_age=seconds, httponly=True, samesite='Lax')
+            if pin_key:
+                cache.set(pin_key, True, seconds)
+        return response
+
+    @staticmethod
+    def pin_key(request):
+        # I client senza cookie (es. la TUI) sono riconosciuti dal token
+        credentials = request.headers.get('Authorization')
+        if not credentials:
+            return None
+        return 'replica-pin:' + hashlib.sha256(credentials.encode()).hexdigest()
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+SYNC_MODELS = [
+    ("group_projects", "topic"),
+    ("group_projects", "goal"),
+    ("group_projects", "groupproject"),
+    ("group_projects", "groupgoal"),
+    ("group_projects", "usergroup"),
+    ("users", "user"),
+]
+
+
+def seed_changelog(apps, _):
+    """Le righe già presenti entrano nel log, così la prima sync le riceve"""
+    ChangeLogEntry = apps.get_model("core", "ChangeLogEntry")
+    for app_label, model_name in SYNC_MODELS:
+        Model = apps.get_model(app_label, model_name)
+        ChangeLogEntry.objects.bulk_create(
+            [
+                ChangeLogEntry(model=f"{app_label}.{model_name}", object_id=pk, action="upsert")
+                for pk in Model.objects.order_by("pk").values_list("pk", flat=True)
+            ],
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('group_projects', '0004_create_topics'),
+        ('users', '0003_alter_user_matricola'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_changelog, migrations.RunPython.noop),
+    ]
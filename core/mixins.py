@@ -0,0 +1,113 @@
+from django.db import transaction
+from django.db.models import ProtectedError
+from django.http import HttpResponse
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from . import audit, cache
+from .serializers import DynamicFieldsModelSerializer, FastReadModelSerializer, requested_fields
+
+
+class SparseFieldsetMixin:
+    """
+    Restringe la query SQL ai soli campi richiesti con `?fields=`,
+    così payload e trasferimento dal DB si riducono insieme.
+    """
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = requested_fields(self.request)
+        if fields is None:
+            return queryset
+
+        serializer_class = self.get_serializer_class()
+        if not issubclass(serializer_class, DynamicFieldsModelSerializer):
+            return queryset
+
+        sources = serializer_class.model_sources(fields)
+        if not sources:
+            return queryset
+        return queryset.only(*sources)
+
+
+class FastReadListMixin:
+    """
+    Per le liste non paginate usa il percorso `.values()` dei
+    FastReadModelSerializer invece della serializzazione campo per campo.
+    """
+    def list(self, request, *args, **kwargs):
+        serializer_class = self.get_serializer_class()
+        if self.paginator is not None or not issubclass(serializer_class, FastReadModelSerializer):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        data = serializer_class.fast_data(queryset, requested_fields(request))
+        if data is None:
+            return super().list(request, *args, **kwargs)
+        return Response(data)
+
+
+class PrecompressedCatalogMixin:
+    """
+    Tiene in cache la lista completa già renderizzata e compressa: le
+    richieste ripetute non pagano né la serializzazione né la compressione.
+    """
+    def list(self, request, *args, **kwargs):
+        renderer = request.accepted_renderer
+        if request.query_params or renderer.format != 'json' or request.accepted_media_type != renderer.media_type:
+            return super().list(request, *args, **kwargs)
+
+        model = self.get_queryset().model
+        entry = cache.get_catalog(model)
+        if entry is None:
+            data = super().list(request, *args, **kwargs).data
+            body = renderer.render(data, request.accepted_media_type, self.get_renderer_context())
+            entry = cache.set_catalog(model, body)
+
+        response = HttpResponse(entry['body'], content_type=renderer.media_type)
+        response.precompressed = entry['encodings']
+        return response
+
+
+class AuditMixin:
+    """
+    Registra nell'audit trail create, update e destroy del viewset.
+    `audit_group_field` indica l'attributo con l'id del gruppo interessato,
+    `audit_ignore_fields` i campi di servizio da non riportare nei diff.
+    """
+    audit_group_field = None
+    audit_ignore_fields = ()
+
+    def audit(self, action, instance, changes=None):
+        group = getattr(instance, self.audit_group_field) if self.audit_group_field else None
+        return audit.record(action, instance, self.request.user, changes, group)
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        self.audit('create', serializer.instance, serializer.data)
+
+    def perform_update(self, serializer):
+        before = self.get_serializer_class()(serializer.instance, fields=None).data
+        super().perform_update(serializer)
+        changes = audit.diff(before, serializer.data)
+        for name in self.audit_ignore_fields:
+            changes.pop(name, None)
+        if changes:
+            self.audit('update', serializer.instance, changes)
+
+    def perform_destroy(self, instance):
+        # L'evento va costruito prima: dopo la delete l'istanza perde la pk
+        with transaction.atomic():
+            self.audit('delete', instance)
+            super().perform_destroy(instance)
+
+
+class ProtectedDestroyMixin:
+    """Una destroy bloccata da on_delete=PROTECT risponde 400 invece di 500"""
+    protected_message = "L'oggetto è ancora in uso"
+
+    def perform_destroy(self, instance):
+        try:
+            with transaction.atomic():
+                super().perform_destroy(instance)
+        except ProtectedError:
+            raise ValidationError({'detail': self.protected_message})
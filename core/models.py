@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class ChangeLogEntry(models.Model):
+    """
+    Registro monotono delle modifiche ai modelli sincronizzabili: l'id
+    crescente fa da cursore per la sincronizzazione incrementale dei client.
+    """
+    UPSERT = 'upsert'
+    DELETE = 'delete'
+    ACTIONS = [(UPSERT, 'Upsert'), (DELETE, 'Delete')]
+
+    model = models.CharField(max_length=100)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=6, choices=ACTIONS)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['id']
+
+
+class AuditEvent(models.Model):
+    """Chi ha fatto cosa: una riga per ogni scrittura passata dalle API"""
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, on_delete=models.SET_NULL,
+        db_constraint=False, related_name='+',
+    )
+    action = models.CharField(max_length=20)
+    model = models.CharField(max_length=100)
+    object_id = models.BigIntegerField(null=True)
+    group_id = models.BigIntegerField(null=True)
+    changes = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ['-id']
+        indexes = [models.Index(fields=['group_id', '-id'], name='core_audit_group_idx')]
+
+
+class Task(models.Model):
+    """Lavoro differito, eseguito dal worker `run_tasks` fuori dalla richiesta"""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = [(QUEUED, 'Queued'), (RUNNING, 'Running'), (DONE, 'Done'), (FAILED, 'Failed')]
+
+    name = models.CharField(max_length=100)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    status = models.CharField(max_length=7, choices=STATUSES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['run_at', 'id']
+        indexes = [models.Index(fields=['status', 'run_at'], name='core_task_due_idx')]
@@ -0,0 +1,55 @@
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+# U+2028 e U+2029 vanno sempre escapati, come fa il JSONRenderer di DRF
+LINE_SEPARATOR = '\u2028'.encode()
+PARAGRAPH_SEPARATOR = '\u2029'.encode()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer basato su orjson. Se è richiesta l'indentazione si ricade
+    sul renderer standard di DRF. Date e orari passano dall'encoder di DRF
+    ("Z" per UTC), come nelle risposte del renderer standard.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(
+            data,
+            default=self.encoder_class().default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+        if LINE_SEPARATOR in ret or PARAGRAPH_SEPARATOR in ret:
+            ret = ret.replace(LINE_SEPARATOR, b'\\u2028').replace(PARAGRAPH_SEPARATOR, b'\\u2029')
+        return ret
+
+
+def event_frame(event):
+    """Un evento del change feed (come `Event.as_dict()`) nel formato SSE"""
+    return b'id: %d\nevent: %s\ndata: %s\n\n' % (
+        event['id'], event['type'].encode(), FastJSONRenderer().render(event),
+    )
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Permette la negoziazione di `text/event-stream`. Sotto ASGI lo stream è
+    una StreamingHttpResponse costruita dalla view; sotto WSGI la risposta
+    del long-poll diventa una sequenza di eventi, e il client si riconnette
+    con Last-Event-ID.
+    """
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get('response')
+        if response is not None and response.status_code >= 400:
+            return b'event: error\ndata: ' + FastJSONRenderer().render(data) + b'\n\n'
+        return b''.join(event_frame(event) for event in data.get('events', ()))
@@ -0,0 +1,79 @@
+import itertools
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+# Impostato dal ReplicaRoutingMiddleware per le richieste in sola lettura
+read_from_replica = ContextVar('read_from_replica', default=False)
+
+
+class ReplicaPool:
+    """
+    Sceglie le repliche in round-robin saltando quelle non raggiungibili,
+    che restano escluse per `cooldown` secondi.
+    """
+    def __init__(self, aliases, cooldown=30):
+        self.aliases = list(aliases)
+        self.cooldown = cooldown
+        self._cycle = itertools.cycle(self.aliases)
+        self._down_until = {}
+        self._lock = threading.Lock()
+
+    def mark_down(self, alias):
+        self._down_until[alias] = time.monotonic() + self.cooldown
+
+    def is_healthy(self, alias):
+        if self._down_until.get(alias, 0) > time.monotonic():
+            return False
+        try:
+            connections[alias].ensure_connection()
+        except DatabaseError:
+            self.mark_down(alias)
+            return False
+        return True
+
+    def choose(self):
+        """Ritorna la prossima replica sana, oppure il primario se sono tutte giù."""
+        for _ in range(len(self.aliases)):
+            with self._lock:
+                alias = next(self._cycle)
+            if self.is_healthy(alias):
+                return alias
+        return DEFAULT_DB_ALIAS
+
+
+_pools = {}
+
+
+def get_pool():
+    aliases = tuple(getattr(settings, 'DATABASE_REPLICAS', ()))
+    if not aliases:
+        return None
+    if aliases not in _pools:
+        _pools[aliases] = ReplicaPool(aliases, getattr(settings, 'REPLICA_COOLDOWN_SECONDS', 30))
+    return _pools[aliases]
+
+
+class ReplicaRouter:
+    """
+    Le letture delle richieste GET/HEAD/OPTIONS vanno sulle repliche,
+    tutto il resto (scritture, letture in richieste di scrittura) sul primario.
+    """
+    def db_for_read(self, model, **hints):
+        if not read_from_replica.get():
+            return None
+        pool = get_pool()
+        return pool.choose() if pool is not None else None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primario e repliche contengono gli stessi dati
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in getattr(settings, 'DATABASE_REPLICAS', ())
@@ -0,0 +1,72 @@
+import hashlib
+import threading
+from pathlib import Path
+
+from django.conf import settings
+
+from .compression import precompress
+
+
+class CachedSchema:
+    """
+    Schema OpenAPI generato una sola volta, salvato su disco e tenuto in
+    memoria insieme al suo ETag e alle versioni compresse.
+    """
+    def __init__(self, body):
+        self.body = body
+        self.etag = '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+        self.encodings = precompress(body)
+
+
+_lock = threading.Lock()
+_schema = None
+
+
+def schema_path():
+    return Path(settings.API_SCHEMA_PATH)
+
+
+def generate_schema():
+    """Introspeziona tutte le view e ritorna lo schema serializzato in JSON."""
+    # drf_yasg è importato solo qui: il worker "api" non lo carica
+    from drf_yasg.app_settings import swagger_settings
+    from drf_yasg.codecs import OpenAPICodecJson
+
+    generator_class = swagger_settings.DEFAULT_GENERATOR_CLASS
+    generator = generator_class(swagger_settings.DEFAULT_INFO)
+    schema = generator.get_schema(request=None, public=True)
+    return OpenAPICodecJson(validators=[]).encode(schema)
+
+
+def build_schema():
+    """Rigenera lo schema, lo scrive su disco e sostituisce la copia in memoria."""
+    global _schema
+    body = generate_schema()
+    path = schema_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(body)
+    with _lock:
+        _schema = CachedSchema(body)
+    return _schema
+
+
+def get_schema():
+    """Ritorna lo schema in memoria, caricandolo dal disco (o generandolo) al primo uso."""
+    global _schema
+    if _schema is not None:
+        return _schema
+
+    path = schema_path()
+    if not path.exists():
+        return build_schema()
+
+    with _lock:
+        if _schema is None:
+            _schema = CachedSchema(path.read_bytes())
+    return _schema
+
+
+def clear_schema():
+    global _schema
+    with _lock:
+        _schema = None
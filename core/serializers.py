@@ -0,0 +1,123 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework import serializers
+from rest_framework.serializers import ModelSerializer
+
+FIELDS_QUERY_PARAM = 'fields'
+
+
+def requested_fields(request):
+    """
+    Ritorna l'elenco dei campi richiesti con `?fields=a,b`, oppure None
+    se il parametro è assente o se la richiesta non è in sola lettura.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    raw = getattr(request, 'query_params', request.GET).get(FIELDS_QUERY_PARAM)
+    if not raw:
+        return None
+    fields = [name.strip() for name in raw.split(',') if name.strip()]
+    return fields or None
+
+
+class DynamicFieldsModelSerializer(ModelSerializer):
+    """
+    ModelSerializer che emette solo un sottoinsieme dei campi, indicato
+    con l'argomento `fields` oppure con il parametro `?fields=` della richiesta.
+    """
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+
+        if fields is None:
+            fields = requested_fields(self.context.get('request'))
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def model_sources(cls, fields):
+        """
+        Traduce i campi del serializer nei campi concreti del modello da
+        passare a `.only()`. Ritorna None se la proiezione non è sicura.
+        """
+        serializer = cls()
+        opts = serializer.Meta.model._meta
+        sources = {opts.pk.name}
+        for name in fields:
+            field = serializer.fields.get(name)
+            if field is None:
+                continue
+            source = field.source.split('.')[0]
+            if source == '*':
+                return None
+            try:
+                model_field = opts.get_field(source)
+            except FieldDoesNotExist:
+                return None
+            if not model_field.concrete or model_field.many_to_many:
+                return None
+            sources.add(model_field.name)
+        return sources
+
+
+# Campi la cui rappresentazione coincide con il valore letto dal DB
+PLAIN_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.ReadOnlyField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+
+class FastReadModelSerializer(DynamicFieldsModelSerializer):
+    """
+    Serializer con un percorso di lettura veloce: le liste vengono costruite
+    direttamente dalle righe di `.values_list()`, senza istanziare modelli
+    né chiamare `to_representation` campo per campo.
+    """
+    @classmethod
+    def fast_columns(cls, fields=None):
+        """
+        Ritorna le coppie (nome, colonna) da leggere dal DB, oppure None se
+        il serializer contiene campi che richiedono la serializzazione normale.
+        """
+        if cls not in _fast_columns_cache:
+            _fast_columns_cache[cls] = cls._build_fast_columns()
+        columns = _fast_columns_cache[cls]
+        if columns is None or fields is None:
+            return columns
+        return [(name, column) for name, column in columns if name in fields]
+
+    @classmethod
+    def _build_fast_columns(cls):
+        serializer = cls(fields=None)
+        opts = serializer.Meta.model._meta
+        columns = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if not isinstance(field, PLAIN_FIELDS):
+                return None
+            try:
+                model_field = opts.get_field(field.source)
+            except FieldDoesNotExist:
+                return None
+            if not model_field.concrete or model_field.many_to_many:
+                return None
+            columns.append((name, model_field.attname))
+        return columns
+
+    @classmethod
+    def fast_data(cls, queryset, fields=None):
+        """Serializza il queryset in una lista di dict, o None se non possibile."""
+        columns = cls.fast_columns(fields)
+        if columns is None:
+            return None
+        names = [name for name, _ in columns]
+        rows = queryset.values_list(*(column for _, column in columns))
+        return [dict(zip(names, row)) for row in rows]
+
+
+_fast_columns_cache = {}
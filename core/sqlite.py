@@ -0,0 +1,16 @@
+from django.conf import settings
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """
+    Applica i PRAGMA di SQLITE_PRAGMAS a ogni nuova connessione SQLite
+    (WAL, synchronous, mmap, cache e busy timeout).
+    """
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', None)
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
@@ -0,0 +1,78 @@
+"""
+Misura l'avvio di un processo Django. Va eseguito in un processo nuovo,
+tipicamente con `python -X importtime -m core.startup`: stampa su stdout
+un JSON con i tempi di setup, di `AppConfig.ready()` e del caricamento URL.
+"""
+import json
+import time
+from collections import defaultdict
+
+
+def parse_importtime(output):
+    """
+    Interpreta l'output di `-X importtime` e ritorna una lista di tuple
+    (modulo, self_us, cumulative_us) nell'ordine in cui compaiono.
+    """
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            modules.append((name.strip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue
+    return modules
+
+
+def group_by_package(modules):
+    """Somma i tempi `self` per package di primo livello, in microsecondi."""
+    totals = defaultdict(int)
+    for name, self_us, _ in modules:
+        totals[name.split('.')[0]] += self_us
+    return dict(totals)
+
+
+def measure():
+    start = time.perf_counter()
+    import django
+    from django.apps.config import AppConfig
+
+    ready_times = {}
+    create = AppConfig.create.__func__
+
+    def timed_create(cls, entry):
+        app_config = create(cls, entry)
+        ready = app_config.ready
+
+        def timed_ready():
+            ready_start = time.perf_counter()
+            ready()
+            ready_times[app_config.name] = time.perf_counter() - ready_start
+
+        app_config.ready = timed_ready
+        return app_config
+
+    AppConfig.create = classmethod(timed_create)
+    try:
+        django.setup()
+    finally:
+        AppConfig.create = classmethod(create)
+    setup = time.perf_counter() - start
+
+    from django.urls import get_resolver
+    urls_start = time.perf_counter()
+    patterns = get_resolver().url_patterns
+    urls = time.perf_counter() - urls_start
+
+    return {
+        'setup': setup,
+        'urls': urls,
+        'url_patterns': len(patterns),
+        'total': time.perf_counter() - start,
+        'ready': ready_times,
+    }
+
+
+if __name__ == '__main__':
+    print(json.dumps(measure()))
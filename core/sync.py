@@ -0,0 +1,160 @@
+import datetime
+from dataclasses import dataclass
+from functools import cached_property
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from . import audit
+from .events import publish
+from .models import ChangeLogEntry
+
+
+@dataclass
+class SyncModel:
+    model: type
+    serializer_class: type
+    queryset: object = None
+
+    @property
+    def label(self):
+        return self.model._meta.label_lower
+
+    def get_queryset(self):
+        return self.queryset if self.queryset is not None else self.model._default_manager.all()
+
+    @cached_property
+    def exposed_fields(self):
+        """Nomi e colonne dei campi del modello esposti dal serializer"""
+        opts = self.model._meta
+        names = set()
+        for field in self.serializer_class(fields=None).fields.values():
+            try:
+                model_field = opts.get_field(field.source)
+            except FieldDoesNotExist:
+                continue
+            names.update({model_field.name, model_field.attname})
+        return names
+
+
+_registry = {}
+
+
+def register(model, serializer_class, queryset=None):
+    """
+    Rende un modello sincronizzabile: ogni salvataggio o cancellazione
+    viene annotato nel change log e servito da `/sync/`.
+    """
+    entry = SyncModel(model, serializer_class, queryset)
+    _registry[entry.label] = entry
+    uid = f'core.sync.{entry.label}'
+    post_save.connect(record_save, sender=model, dispatch_uid=uid)
+    post_delete.connect(record_delete, sender=model, dispatch_uid=uid)
+
+
+def registered():
+    return dict(_registry)
+
+
+def record_save(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    entry = _registry[sender._meta.label_lower]
+    # Un salvataggio che tocca solo campi non esposti (es. last_login)
+    # non interessa ai client
+    if update_fields is not None:
+        if not entry.exposed_fields.intersection(update_fields):
+            return
+    ChangeLogEntry.objects.create(model=entry.label, object_id=instance.pk, action=ChangeLogEntry.UPSERT)
+
+
+def record_changes(model, pks):
+    """Per le UPDATE massive, che non emettono segnali"""
+    ChangeLogEntry.objects.bulk_create([
+        ChangeLogEntry(model=model._meta.label_lower, object_id=pk, action=ChangeLogEntry.UPSERT)
+        for pk in pks
+    ], batch_size=500)
+
+
+def record_bulk(action, model, rows, actor, events=(), after=()):
+    """
+    Change log, audit e change feed per una modifica massiva di `model`.
+    `rows` sono le righe di audit (pk, gruppo, modifiche), `events` le
+    tuple (tipo, dati, gruppo) da pubblicare e `after` le funzioni da
+    chiamare, entrambe a transazione confermata.
+    """
+    record_changes(model, [pk for pk, _, _ in rows])
+    audit.record_many(action, model, rows, actor)
+    events, after = list(events), list(after)
+
+    def commit():
+        for event in events:
+            publish(*event)
+        for callback in after:
+            callback()
+
+    transaction.on_commit(commit)
+
+
+def record_delete(sender, instance, **kwargs):
+    ChangeLogEntry.objects.create(
+        model=sender._meta.label_lower, object_id=instance.pk, action=ChangeLogEntry.DELETE,
+    )
+
+
+def current_token():
+    last = ChangeLogEntry.objects.order_by('-id').values_list('id', flat=True).first()
+    return last or 0
+
+
+def changes_since(since=0, limit=None):
+    """
+    Ritorna le modifiche successive al cursore `since`, al più `limit`
+    voci del log per pagina. Le voci dello stesso oggetto vengono fuse:
+    per ogni oggetto conta solo l'ultima operazione della pagina.
+    """
+    limit = min(limit or settings.SYNC_PAGE_SIZE, settings.SYNC_MAX_PAGE_SIZE)
+    entries = ChangeLogEntry.objects.filter(id__gt=since)
+    # Le voci più recenti potrebbero appartenere a transazioni ancora aperte
+    # con id più bassi: le lasciamo alla prossima sincronizzazione
+    settle = settings.SYNC_SETTLE_SECONDS
+    if settle:
+        entries = entries.filter(created_at__lte=timezone.now() - datetime.timedelta(seconds=settle))
+    rows = list(entries.order_by('id').values_list('id', 'model', 'object_id', 'action')[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    latest = {}
+    for _, label, object_id, action in rows:
+        latest[(label, object_id)] = action
+
+    changes = {}
+    for label, entry in _registry.items():
+        upserted = [pk for (model, pk), action in latest.items() if model == label and action == ChangeLogEntry.UPSERT]
+        deleted = {pk for (model, pk), action in latest.items() if model == label and action == ChangeLogEntry.DELETE}
+        if not upserted and not deleted:
+            continue
+        data = serialize(entry, upserted)
+        # Oggetti cancellati o non più visibili diventano tombstone
+        deleted.update(set(upserted) - {item['id'] for item in data})
+        changes[label] = {'upserted': data, 'deleted': sorted(deleted)}
+
+    return {
+        'changes': changes,
+        'next': str(rows[-1][0] if rows else since),
+        'has_more': has_more,
+    }
+
+
+def serialize(entry, pks):
+    if not pks:
+        return []
+    queryset = entry.get_queryset().filter(pk__in=pks).order_by('pk')
+    fast_data = getattr(entry.serializer_class, 'fast_data', None)
+    data = fast_data(queryset) if fast_data else None
+    if data is None:
+        data = entry.serializer_class(queryset, many=True, fields=None).data
+    return data
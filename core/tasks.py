@@ -0,0 +1,123 @@
+import datetime
+import logging
+import traceback
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Max
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+class TaskFunction:
+    """Funzione registrata come task: `.defer()` la accoda invece di eseguirla"""
+    def __init__(self, func, name, max_attempts, backoff):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def defer(self, *args, delay=None, **kwargs):
+        """
+        Accoda il task, a transazione confermata. Con TASKS_EAGER il task
+        viene eseguito subito (sviluppo e test senza worker).
+        """
+        if settings.TASKS_EAGER:
+            transaction.on_commit(lambda: self.func(*args, **kwargs))
+            return None
+        task = Task(
+            name=self.name, args=list(args), kwargs=kwargs, max_attempts=self.max_attempts,
+            run_at=timezone.now() + datetime.timedelta(seconds=delay or 0),
+        )
+        transaction.on_commit(task.save)
+        return task
+
+
+def task(name=None, max_attempts=3, backoff=5):
+    """
+    Registra una funzione come task. Argomenti e risultato devono essere
+    serializzabili in JSON: al task si passano id, non istanze.
+    """
+    def decorator(func):
+        task_name = name or f"{func.__module__}.{func.__qualname__}"
+        wrapped = TaskFunction(func, task_name, max_attempts, backoff)
+        _registry[task_name] = wrapped
+        return wrapped
+    return decorator
+
+
+def get_task(name):
+    return _registry[name]
+
+
+def claim(limit):
+    """
+    Prende in carico fino a `limit` task scaduti. L'UPDATE condizionato
+    sullo stato evita che due worker eseguano lo stesso task.
+    """
+    now = timezone.now()
+    candidates = Task.objects.filter(status=Task.QUEUED, run_at__lte=now).values_list('pk', flat=True)[:limit]
+    claimed = []
+    for pk in list(candidates):
+        updated = Task.objects.filter(pk=pk, status=Task.QUEUED).update(
+            status=Task.RUNNING, started_at=now, attempts=F('attempts') + 1,
+        )
+        if updated:
+            claimed.append(pk)
+    return list(Task.objects.filter(pk__in=claimed))
+
+
+def requeue_stale(timeout):
+    """Rimette in coda i task rimasti in esecuzione da un worker terminato"""
+    limit = timezone.now() - datetime.timedelta(seconds=timeout)
+    return Task.objects.filter(status=Task.RUNNING, started_at__lt=limit).update(status=Task.QUEUED)
+
+
+def execute(task):
+    """Esegue un task preso in carico e ne registra l'esito"""
+    try:
+        func = get_task(task.name)
+        func(*task.args, **task.kwargs)
+    except Exception as exc:
+        task.last_error = ''.join(traceback.format_exception_only(exc)).strip()
+        if task.attempts < task.max_attempts:
+            # Backoff esponenziale tra un tentativo e l'altro
+            backoff = func.backoff if task.name in _registry else 0
+            task.status = Task.QUEUED
+            task.run_at = timezone.now() + datetime.timedelta(seconds=backoff * 2 ** (task.attempts - 1))
+            logger.warning("Task %s #%s fallito (tentativo %s), riprovo", task.name, task.pk, task.attempts)
+        else:
+            task.status = Task.FAILED
+            logger.error("Task %s #%s fallito definitivamente: %s", task.name, task.pk, task.last_error)
+    else:
+        task.status = Task.DONE
+        task.last_error = ''
+    task.finished_at = timezone.now()
+    task.save(update_fields=['status', 'run_at', 'finished_at', 'last_error'])
+    return task
+
+
+def task_stats():
+    """Metriche per task: conteggi per stato, durata media e massima"""
+    duration = ExpressionWrapper(F('finished_at') - F('started_at'), output_field=DurationField())
+    rows = (
+        Task.objects.values('name', 'status')
+        .annotate(count=Count('id'), avg=Avg(duration), max=Max(duration))
+        .order_by('name', 'status')
+    )
+    stats = {}
+    for row in rows:
+        entry = stats.setdefault(row['name'], {'counts': {}, 'avg_seconds': None, 'max_seconds': None})
+        entry['counts'][row['status']] = row['count']
+        if row['status'] == Task.DONE and row['avg'] is not None:
+            entry['avg_seconds'] = row['avg'].total_seconds()
+            entry['max_seconds'] = row['max'].total_seconds()
+    return stats
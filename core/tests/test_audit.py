@@ -0,0 +1,103 @@
+import datetime
+from unittest import mock
+import pytest
+from django.core.management import call_command
+from django.db import OperationalError
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+from core import audit
+from core.models import AuditEvent
+from group_projects.models import Goal, GroupGoal, GroupProject, Topic
+from group_projects.views import GroupGoalViewSet, GroupProjectViewSet
+from users.models import User
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(username="user", password="pass", email="user@example.org", matricola="123456")
+
+
+@pytest.fixture
+def group():
+    return GroupProject.objects.create(name="Test Group", topic=Topic.objects.create(title="Mock Topic"))
+
+
+def test_buffer_flushes_in_batches_and_applies_backpressure(db):
+    buffer = audit.AuditBuffer(batch_size=3, max_size=2, background=False)
+    buffer.put(AuditEvent(action="create", model="x.y", object_id=1))
+    buffer.put(AuditEvent(action="create", model="x.y", object_id=2))
+    assert AuditEvent.objects.count() == 0
+
+    # Coda piena: chi scrive svuota il buffer prima di accodare
+    buffer.put(AuditEvent(action="create", model="x.y", object_id=3))
+    assert AuditEvent.objects.count() == 2
+    assert buffer.pending() == 1
+    assert buffer.flush() == 1
+
+
+@pytest.mark.django_db
+def test_failed_flush_keeps_events_and_the_thread_alive():
+    buffer = audit.AuditBuffer(batch_size=10, background=False)
+    buffer.put(AuditEvent(action="create", model="x.y", object_id=1))
+    with mock.patch("core.audit.close_old_connections") as close, \
+            mock.patch.object(AuditEvent.objects, "bulk_create", side_effect=OperationalError("gone away")):
+        buffer._tick()
+    close.assert_called_once()
+    assert buffer.pending() == 1
+
+    with mock.patch("core.audit.close_old_connections"):
+        buffer._tick()
+    assert buffer.pending() == 0
+    assert AuditEvent.objects.filter(object_id=1).exists()
+
+
+@pytest.mark.django_db
+def test_audit_recorded_only_on_commit(user, group, audit_buffer, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=False):
+        audit.record("join", group, user, group=group.id)
+    assert audit_buffer.pending() == 0
+
+    with django_capture_on_commit_callbacks(execute=True):
+        audit.record("join", group, user, group=group.id)
+    assert audit_buffer.pending() == 1
+
+
+@pytest.mark.django_db
+def test_group_history_lists_joins_and_goal_updates(user, admin_user, group, django_capture_on_commit_callbacks):
+    group_goal = GroupGoal.objects.create(group=group, goal=Goal.objects.first())
+    factory = APIRequestFactory()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        req = factory.post(f"/api/v1/groups/{group.id}/join/")
+        req.user = user
+        GroupProjectViewSet.as_view({"post": "join"})(req, pk=group.id)
+
+        req = factory.patch(f"/api/v1/group-goals/{group_goal.id}/", {"complete": True, "version": 0}, format="json")
+        req.user = admin_user
+        GroupGoalViewSet.as_view({"patch": "partial_update"})(req, pk=group_goal.id)
+
+    req = factory.get(f"/api/v1/groups/{group.id}/history/")
+    req.user = user
+    res = GroupProjectViewSet.as_view({"get": "history"})(req, pk=group.id)
+
+    assert res.status_code == 200
+    assert [(e["action"], e["actor_id"]) for e in res.data["events"]] == [("update", admin_user.id), ("join", user.id)]
+    assert res.data["events"][0]["changes"] == {"complete": [False, True]}
+
+
+@pytest.mark.django_db
+def test_group_history_forbidden_to_non_members(user, group):
+    req = APIRequestFactory().get(f"/api/v1/groups/{group.id}/history/")
+    req.user = user
+    res = GroupProjectViewSet.as_view({"get": "history"})(req, pk=group.id)
+    assert res.status_code == 403
+
+
+@pytest.mark.django_db
+def test_prune_audit_removes_expired_events():
+    old = timezone.now() - datetime.timedelta(days=400)
+    AuditEvent.objects.bulk_create([AuditEvent(action="create", model="x.y", created_at=old) for _ in range(5)])
+    recent = AuditEvent.objects.create(action="create", model="x.y")
+
+    call_command("prune_audit", days=365, batch=2)
+    assert list(AuditEvent.objects.values_list("id", flat=True)) == [recent.id]
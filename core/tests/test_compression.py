@@ -0,0 +1,99 @@
+import asyncio
+import gzip
+import zlib
+import pytest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, override_settings
+from core.compression import GzipCodec, negotiate, precompress
+from core.middleware import CompressionMiddleware
+
+BODY = b'{"items": [' + b'{"title": "Mock Topic"},' * 200 + b'{}]}'
+
+
+def middleware(response):
+    return CompressionMiddleware(lambda request: response)
+
+
+def get(accept_encoding="gzip"):
+    return RequestFactory().get("/api/v1/topics/", HTTP_ACCEPT_ENCODING=accept_encoding)
+
+
+def test_negotiate():
+    codecs = [GzipCodec()]
+    assert negotiate("gzip, deflate", codecs).name == "gzip"
+    assert negotiate("*", codecs).name == "gzip"
+    assert negotiate("gzip;q=0", codecs) is None
+    assert negotiate("gzip;q=abc", codecs) is None
+    assert negotiate("identity", codecs) is None
+    assert negotiate("", codecs) is None
+
+
+def test_gzip_stream_roundtrip():
+    chunks = list(GzipCodec().stream([b"hello ", b"world"]))
+    assert zlib.decompress(b"".join(chunks), 31) == b"hello world"
+
+
+def test_response_above_threshold_is_compressed():
+    response = middleware(HttpResponse(BODY, content_type="application/json"))(get())
+    assert response["Content-Encoding"] == "gzip"
+    assert response["Vary"] == "Accept-Encoding"
+    assert gzip.decompress(response.content) == BODY
+
+
+@override_settings(COMPRESSION_MIN_SIZE=len(BODY) + 1)
+def test_response_below_threshold_is_not_compressed():
+    response = middleware(HttpResponse(BODY, content_type="application/json"))(get())
+    assert not response.has_header("Content-Encoding")
+
+
+def test_skips_non_compressible_and_unaccepted():
+    response = middleware(HttpResponse(BODY, content_type="image/png"))(get())
+    assert not response.has_header("Content-Encoding")
+    response = middleware(HttpResponse(BODY, content_type="application/json"))(get("identity"))
+    assert not response.has_header("Content-Encoding")
+
+
+def test_skips_html_and_paths_outside_the_api():
+    response = middleware(HttpResponse(BODY, content_type="text/html; charset=utf-8"))(get())
+    assert not response.has_header("Content-Encoding")
+    request = RequestFactory().get("/admin/", HTTP_ACCEPT_ENCODING="gzip")
+    response = middleware(HttpResponse(BODY, content_type="application/json"))(request)
+    assert not response.has_header("Content-Encoding")
+
+
+def test_precompressed_body_is_reused():
+    response = HttpResponse(BODY, content_type="application/json")
+    response.precompressed = {"gzip": b"precompressed"}
+    response = middleware(response)(get())
+    assert response.content == b"precompressed"
+
+
+def test_strong_etag_becomes_weak():
+    response = HttpResponse(BODY, content_type="application/json")
+    response["ETag"] = '"abc"'
+    response = middleware(response)(get())
+    assert response["ETag"] == 'W/"abc"'
+
+
+def test_streaming_response_is_compressed():
+    response = StreamingHttpResponse(iter([BODY, BODY]), content_type="text/csv")
+    response = middleware(response)(get())
+    assert response["Content-Encoding"] == "gzip"
+    assert zlib.decompress(b"".join(response.streaming_content), 31) == BODY * 2
+
+
+def test_async_streaming_response_is_compressed():
+    async def chunks():
+        yield BODY
+
+    response = middleware(StreamingHttpResponse(chunks(), content_type="text/csv"))(get())
+
+    async def consume():
+        return b"".join([chunk async for chunk in response.streaming_content])
+
+    assert zlib.decompress(asyncio.run(consume()), 31) == BODY
+
+
+def test_precompress_threshold():
+    assert precompress(b"short") == {}
+    assert gzip.decompress(precompress(BODY)["gzip"]) == BODY
@@ -0,0 +1,55 @@
+import io
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from rest_framework.test import APIRequestFactory
+from core.db import connection_stats, pool_stats
+from core.views import DatabaseMetricsView
+from users.models import User
+
+
+class FakePool:
+    min_size = 2
+    max_size = 10
+
+    def get_stats(self):
+        return {"pool_size": 3, "pool_available": 1, "requests_waiting": 0}
+
+
+def test_connection_stats_without_pool():
+    stats = connection_stats("default")
+    assert stats["vendor"] == "sqlite"
+    assert stats["pooled"] is False
+    assert [s["alias"] for s in pool_stats()] == ["default"]
+
+
+def test_connection_stats_with_pool(monkeypatch):
+    monkeypatch.setattr(connection, "pool", FakePool(), raising=False)
+    stats = connection_stats("default")
+    assert stats["pooled"] is True
+    assert stats["pool"] == {"min_size": 2, "max_size": 10, "pool_size": 3, "pool_available": 1, "requests_waiting": 0}
+
+
+@pytest.mark.django_db
+def test_metrics_view_staff_only(admin_user):
+    view = DatabaseMetricsView.as_view()
+    user = User.objects.create_user(username="user", password="pass", email="user@example.org", matricola="123456")
+
+    req = APIRequestFactory().get("/api/v1/metrics/db/")
+    req.user = user
+    assert view(req).status_code == 403
+
+    req = APIRequestFactory().get("/api/v1/metrics/db/")
+    req.user = admin_user
+    res = view(req)
+    assert res.status_code == 200
+    assert res.data["databases"][0]["alias"] == "default"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bench_db_command():
+    out = io.StringIO()
+    conn_max_age = connection.settings_dict["CONN_MAX_AGE"]
+    call_command("bench_db", requests=5, concurrency=1, stdout=out)
+    assert "una connessione per richiesta" in out.getvalue()
+    assert connection.settings_dict["CONN_MAX_AGE"] == conn_max_age
@@ -0,0 +1,36 @@
+import threading
+from core.events import InProcessBackend, get_broker, publish, reset_broker
+
+
+def test_publish_and_since():
+    backend = InProcessBackend(size=3)
+    first = backend.publish("group.created", {"id": 1}, group=1)
+    backend.publish("group.created", {"id": 2}, group=2)
+    assert [e.id for e in backend.since(0)] == [1, 2]
+    assert [e.data["id"] for e in backend.since(first.id)] == [2]
+    assert [e.group for e in backend.since(0, groups={2})] == [2]
+    assert backend.last_id() == 2
+
+
+def test_buffer_is_bounded_and_resets_unknown_ids():
+    backend = InProcessBackend(size=2)
+    for pk in range(4):
+        backend.publish("group.updated", {"id": pk})
+    assert [e.id for e in backend.since(0)] == [3, 4]
+    assert [e.id for e in backend.since(99)] == [3, 4]
+
+
+def test_wait_wakes_up_on_publish():
+    backend = InProcessBackend()
+    timer = threading.Timer(0.05, backend.publish, args=("usergroup.created", {"id": 1}, 1))
+    timer.start()
+    events = backend.wait(0, groups={1}, timeout=5)
+    assert [e.type for e in events] == ["usergroup.created"]
+    assert backend.wait(events[-1].id, timeout=0) == []
+
+
+def test_global_broker():
+    reset_broker()
+    event = publish("group.deleted", {"id": 3}, group=3)
+    assert get_broker().since(event.id - 1)[0].as_dict()["type"] == "group.deleted"
+    reset_broker()
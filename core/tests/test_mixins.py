@@ -0,0 +1,123 @@
+import io
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from group_projects.models import Goal, GroupProject, Topic
+from group_projects.serializers import GoalSerializer, GroupProjectSerializer, TopicSerializer
+from group_projects.views import GroupProjectViewSet, TopicViewSet
+from core.cache import get_catalog
+from users.models import User
+from users.views import UserViewSet
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(username="user", password="pass", email="user@example.org", matricola="123456")
+
+
+@pytest.mark.django_db
+def test_group_list_sparse_fieldset(user):
+    topic = Topic.objects.create(title="Mock Topic")
+    GroupProject.objects.create(name="Test Group", topic=topic)
+    view = GroupProjectViewSet.as_view({"get": "list"})
+    req = APIRequestFactory().get("/api/v1/groups/", {"fields": "id,name"})
+    req.user = user
+
+    with CaptureQueriesContext(connection) as ctx:
+        res = view(req)
+        res.render()
+
+    assert res.status_code == 200
+    assert [set(row) for row in res.data] == [{"id", "name"}]
+    select = [q["sql"] for q in ctx.captured_queries if "group_projects_groupproject" in q["sql"]][0]
+    assert "link_django" not in select
+
+
+@pytest.mark.django_db
+def test_user_list_sparse_fieldset(user):
+    view = UserViewSet.as_view({"get": "list"})
+    req = APIRequestFactory().get("/api/v1/users/", {"fields": "id,username"})
+    req.user = user
+
+    res = view(req)
+    assert res.status_code == 200
+    assert res.data == [{"id": user.id, "username": "user"}]
+
+
+@pytest.mark.django_db
+def test_user_list_without_fields_returns_everything(user):
+    view = UserViewSet.as_view({"get": "list"})
+    req = APIRequestFactory().get("/api/v1/users/")
+    req.user = user
+
+    res = view(req)
+    assert set(res.data[0]) == {"id", "email", "username", "first_name", "last_name", "matricola"}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("serializer_class,factory", [
+    (TopicSerializer, lambda: Topic.objects.create(title="Mock Topic")),
+    (GoalSerializer, lambda: Goal.objects.create(title="Goal", description="Desc", points=2)),
+    (GroupProjectSerializer, lambda: GroupProject.objects.create(name="G", topic=Topic.objects.create(title="T"))),
+])
+def test_fast_data_matches_standard_serializer(serializer_class, factory):
+    factory()
+    queryset = serializer_class.Meta.model.objects.all()
+    assert serializer_class.fast_data(queryset) == serializer_class(queryset, many=True).data
+
+
+@pytest.mark.django_db
+def test_fast_data_with_fields():
+    topic = Topic.objects.create(title="Mock Topic")
+    group = GroupProject.objects.create(name="G", topic=topic)
+    data = GroupProjectSerializer.fast_data(GroupProject.objects.all(), ["id", "topic"])
+    assert data == [{"id": group.id, "topic": topic.id}]
+
+
+def test_fast_columns_unsupported_serializer():
+    class GroupWithTopic(GroupProjectSerializer):
+        topic = TopicSerializer()
+
+    assert GroupWithTopic.fast_columns() is None
+    assert GroupWithTopic.fast_data(GroupProject.objects.none()) is None
+
+
+@pytest.mark.django_db
+def test_bench_api_command():
+    out = io.StringIO()
+    call_command("bench_api", rows=3, repeat=1, stdout=out)
+    assert "group-users" in out.getvalue()
+    assert not Topic.objects.filter(title="Topic 0").exists()
+
+
+@pytest.mark.django_db
+def test_catalog_list_is_cached_and_invalidated(user):
+    Topic.objects.create(title="Mock Topic")
+    view = TopicViewSet.as_view({"get": "list"})
+
+    def get():
+        req = APIRequestFactory().get("/api/v1/topics/", HTTP_ACCEPT="application/json")
+        req.user = user
+        return view(req)
+
+    first = get()
+    assert get_catalog(Topic) is not None
+    with CaptureQueriesContext(connection) as ctx:
+        second = get()
+    assert not [q for q in ctx.captured_queries if "group_projects_topic" in q["sql"]]
+    assert second.content == first.content
+
+    Topic.objects.create(title="Other Topic")
+    assert get_catalog(Topic) is None
+    assert b"Other Topic" in get().content
+
+
+@pytest.mark.django_db
+def test_catalog_cache_bypassed_with_query_params(user):
+    view = TopicViewSet.as_view({"get": "list"})
+    req = APIRequestFactory().get("/api/v1/topics/", {"fields": "id"})
+    req.user = user
+    view(req)
+    assert get_catalog(Topic) is None
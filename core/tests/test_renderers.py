@@ -0,0 +1,48 @@
+import datetime
+import io
+import json
+import pytest
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+
+
+def test_renderer_matches_drf_output():
+    data = {"id": 1, "title": "Città", "tags": [1, 2], "lazy": gettext_lazy("Hello")}
+    assert json.loads(FastJSONRenderer().render(data)) == json.loads(JSONRenderer().render(data))
+
+
+def test_renderer_formats_datetimes_like_drf():
+    data = {"at": datetime.datetime(2025, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc),
+            "day": datetime.date(2025, 1, 2), "time": datetime.time(3, 4, 5, 678901)}
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+    assert b'"2025-01-02T03:04:05.678901Z"' in FastJSONRenderer().render(data)
+
+
+def test_renderer_escapes_line_separators():
+    ret = FastJSONRenderer().render({"text": "a\u2028b\u2029c"})
+    assert b"\\u2028" in ret and b"\\u2029" in ret
+
+
+def test_renderer_none_and_indent():
+    renderer = FastJSONRenderer()
+    assert renderer.render(None) == b""
+    assert b"\n" in renderer.render({"a": 1}, "application/json; indent=2")
+
+
+def test_parser_parses_utf8():
+    stream = io.BytesIO('{"title": "Città"}'.encode())
+    assert FastJSONParser().parse(stream, "application/json", {}) == {"title": "Città"}
+
+
+def test_parser_other_charset_falls_back():
+    stream = io.BytesIO('{"title": "Città"}'.encode("latin-1"))
+    data = FastJSONParser().parse(stream, "application/json", {"encoding": "latin-1"})
+    assert data == {"title": "Città"}
+
+
+def test_parser_rejects_invalid_json():
+    with pytest.raises(ParseError):
+        FastJSONParser().parse(io.BytesIO(b"{not json"), "application/json", {})
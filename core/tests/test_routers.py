@@ -0,0 +1,94 @@
+import sqlite3
+import pytest
+from django.db import DatabaseError, connections
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.http import HttpResponse
+from django.test import RequestFactory
+from core.middleware import ReplicaRoutingMiddleware
+from core.routers import ReplicaPool, ReplicaRouter, read_from_replica
+from group_projects.models import Topic
+
+REPLICAS = ["replica_1", "replica_2"]
+
+
+@pytest.fixture
+def replicas(settings, tmp_path):
+    """Due repliche su file SQLite locali, ognuna con un topic diverso"""
+    for alias in REPLICAS:
+        path = tmp_path / f"{alias}.sqlite3"
+        with sqlite3.connect(path) as db:
+            db.execute("CREATE TABLE group_projects_topic (id integer PRIMARY KEY, title varchar(100))")
+            db.execute("INSERT INTO group_projects_topic (title) VALUES (?)", (f"from {alias}",))
+        # Connessioni create al volo: non fanno parte di settings.DATABASES
+        connections[alias] = DatabaseWrapper({**connections["default"].settings_dict, "NAME": str(path)}, alias)
+    settings.DATABASE_REPLICAS = REPLICAS
+    yield REPLICAS
+    for alias in REPLICAS:
+        connections[alias].close()
+        delattr(connections._connections, alias)
+
+
+def view_reading_topics(request):
+    return HttpResponse(",".join(Topic.objects.filter(title__startswith="from ").values_list("title", flat=True)))
+
+
+@pytest.mark.django_db
+def test_safe_requests_round_robin_over_replicas(replicas):
+    Topic.objects.create(title="from primary")
+    middleware = ReplicaRoutingMiddleware(view_reading_topics)
+    contents = {middleware(RequestFactory().get("/api/v1/topics/")).content for _ in range(4)}
+    assert contents == {b"from replica_1", b"from replica_2"}
+
+
+@pytest.mark.django_db
+def test_writes_pin_client_to_primary(replicas):
+    Topic.objects.create(title="from primary")
+    middleware = ReplicaRoutingMiddleware(view_reading_topics)
+    auth = {"HTTP_AUTHORIZATION": "Bearer token"}
+
+    res = middleware(RequestFactory().post("/api/v1/groups/1/join/", **auth))
+    assert res.content == b"from primary"
+    assert res.cookies[ReplicaRoutingMiddleware.pin_cookie].value == "1"
+
+    # Lo stesso client (riconosciuto dal token) resta sul primario
+    assert middleware(RequestFactory().get("/api/v1/topics/", **auth)).content == b"from primary"
+
+    req = RequestFactory().get("/api/v1/topics/")
+    req.COOKIES[ReplicaRoutingMiddleware.pin_cookie] = "1"
+    assert middleware(req).content == b"from primary"
+
+    assert middleware(RequestFactory().get("/api/v1/topics/")).content.startswith(b"from replica")
+
+
+def test_pool_skips_unhealthy_replicas(monkeypatch):
+    pool = ReplicaPool(["a", "b"], cooldown=60)
+    monkeypatch.setattr(pool, "is_healthy", lambda alias: alias == "b")
+    assert [pool.choose() for _ in range(3)] == ["b", "b", "b"]
+
+    monkeypatch.setattr(pool, "is_healthy", lambda alias: False)
+    assert pool.choose() == "default"
+
+
+def test_pool_marks_failing_replica_down(monkeypatch):
+    class Broken:
+        def ensure_connection(self):
+            raise DatabaseError("unreachable")
+
+    monkeypatch.setattr("core.routers.connections", {"a": Broken()})
+    pool = ReplicaPool(["a"], cooldown=60)
+    assert pool.is_healthy("a") is False
+    assert pool.is_healthy("a") is False
+    assert pool.choose() == "default"
+
+
+def test_router_without_replicas(settings):
+    settings.DATABASE_REPLICAS = []
+    router = ReplicaRouter()
+    token = read_from_replica.set(True)
+    try:
+        assert router.db_for_read(Topic) is None
+    finally:
+        read_from_replica.reset(token)
+    assert router.db_for_write(Topic) == "default"
+    assert router.allow_relation(None, None)
+    assert router.allow_migrate("default", "group_projects")
@@ -0,0 +1,64 @@
+import io
+import json
+import pytest
+from django.core.management import call_command
+from django.test import Client
+from core import schema
+
+
+@pytest.fixture(autouse=True)
+def schema_file(settings, tmp_path):
+    settings.API_SCHEMA_PATH = tmp_path / "openapi.json"
+    schema.clear_schema()
+    yield settings.API_SCHEMA_PATH
+    schema.clear_schema()
+
+
+@pytest.mark.django_db
+def test_build_schema_command(schema_file):
+    out = io.StringIO()
+    call_command("build_schema", stdout=out)
+    assert schema_file.exists()
+    assert "/groups/" in json.loads(schema_file.read_bytes())["paths"]
+
+
+@pytest.mark.django_db
+def test_schema_served_from_memory_with_etag(schema_file, monkeypatch):
+    client = Client()
+    res = client.get("/api/schema/")
+    assert res.status_code == 200
+    assert schema_file.exists()
+    etag = res["ETag"]
+
+    # Dopo il primo caricamento lo schema non viene più generato
+    monkeypatch.setattr(schema, "generate_schema", lambda: pytest.fail("schema regenerated"))
+    assert client.get("/api/schema/").content == res.content
+
+    res = client.get("/api/schema/", HTTP_IF_NONE_MATCH=f"W/{etag}")
+    assert res.status_code == 304
+
+
+@pytest.mark.django_db
+def test_schema_loaded_from_disk(schema_file):
+    schema_file.write_bytes(b'{"swagger": "2.0"}')
+    res = Client().get("/api/schema/")
+    assert res.content == b'{"swagger": "2.0"}'
+
+
+@pytest.mark.django_db
+def test_schema_refresh_requires_staff(schema_file, admin_user):
+    schema_file.write_bytes(b'{"swagger": "2.0"}')
+    client = Client()
+    assert client.get("/api/schema/?refresh=1").content == b'{"swagger": "2.0"}'
+
+    client.force_login(admin_user)
+    res = client.get("/api/schema/?refresh=1")
+    assert "paths" in json.loads(res.content)
+
+
+@pytest.mark.django_db
+def test_docs_use_cached_spec_url():
+    res = Client().get("/api/docs/")
+    assert res.status_code == 200
+    assert b"/api/schema/" in res.content
+    assert Client().get("/api/docs/?format=openapi").status_code == 404
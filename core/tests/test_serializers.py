@@ -0,0 +1,46 @@
+import pytest
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from core.serializers import requested_fields
+from group_projects.models import GroupProject, Topic
+from group_projects.serializers import GroupProjectSerializer, TopicSerializer
+from users.serializers import UserSerializer
+
+
+@pytest.fixture
+def group():
+    topic = Topic.objects.create(title="Mock Topic")
+    return GroupProject.objects.create(name="Test Group", topic=topic)
+
+
+def test_requested_fields_parsing():
+    factory = APIRequestFactory()
+    assert requested_fields(Request(factory.get("/groups/", {"fields": "id, name,,"}))) == ["id", "name"]
+    assert requested_fields(Request(factory.get("/groups/", {"fields": ""}))) is None
+    assert requested_fields(Request(factory.get("/groups/"))) is None
+    assert requested_fields(None) is None
+
+
+def test_requested_fields_ignored_on_write():
+    factory = APIRequestFactory()
+    req = Request(factory.post("/groups/?fields=id"))
+    assert requested_fields(req) is None
+
+
+@pytest.mark.django_db
+def test_explicit_fields_argument(group):
+    data = GroupProjectSerializer(group, fields=["id", "name"]).data
+    assert set(data) == {"id", "name"}
+
+
+@pytest.mark.django_db
+def test_fields_from_request_context(group):
+    req = Request(APIRequestFactory().get("/groups/", {"fields": "name,unknown"}))
+    data = GroupProjectSerializer([group], many=True, context={"request": req}).data
+    assert data == [{"name": "Test Group"}]
+
+
+def test_model_sources():
+    assert GroupProjectSerializer.model_sources(["name", "topic", "nope"]) == {"id", "name", "topic"}
+    assert TopicSerializer.model_sources([]) == {"id"}
+    assert UserSerializer.model_sources(["username"]) == {"id", "username"}
@@ -0,0 +1,78 @@
+import os
+import subprocess
+import sys
+import pytest
+from django.conf import settings as django_settings
+from django.db import connections
+from django.db.backends.sqlite3.base import DatabaseWrapper
+
+
+@pytest.fixture
+def file_connection(tmp_path):
+    alias = "sqlite_file"
+    connections[alias] = DatabaseWrapper(
+        {**connections["default"].settings_dict, "NAME": str(tmp_path / "db.sqlite3")}, alias
+    )
+    yield connections[alias]
+    connections[alias].close()
+    delattr(connections._connections, alias)
+
+
+def manage(tmp_path, *args, **env):
+    """Esegue manage.py in un processo separato, su un file SQLite in tmp_path; restituisce l'ultima riga"""
+    base = {k: v for k, v in os.environ.items() if k not in ("DB_ENGINE", "DB_SQLITE_TUNING")}
+    proc = subprocess.run(
+        [sys.executable, "manage.py", *args], cwd=django_settings.BASE_DIR, capture_output=True, text=True,
+        env={**base, "DB_NAME": str(tmp_path / "db.sqlite3"), **env},
+    )
+    assert proc.returncode == 0, proc.stderr
+    return proc.stdout.strip().rpartition("\n")[2]
+
+
+def pragma(connection, name):
+    with connection.cursor() as cursor:
+        cursor.execute(f"PRAGMA {name}")
+        return cursor.fetchone()[0]
+
+
+TUNED_PRAGMAS = {"journal_mode": "WAL", "synchronous": "NORMAL", "busy_timeout": 5000, "cache_size": -20000}
+
+
+@pytest.mark.django_db
+def test_pragmas_applied_on_new_connections(file_connection, settings):
+    settings.SQLITE_PRAGMAS = TUNED_PRAGMAS
+    assert pragma(file_connection, "journal_mode") == "wal"
+    assert pragma(file_connection, "synchronous") == 1
+    assert pragma(file_connection, "busy_timeout") == 5000
+    assert pragma(file_connection, "cache_size") == -20000
+
+
+@pytest.mark.django_db
+def test_pragmas_skipped_when_disabled(file_connection, settings):
+    settings.SQLITE_PRAGMAS = {}
+    assert pragma(file_connection, "journal_mode") == "delete"
+
+
+def test_tuning_is_opt_in(tmp_path):
+    script = (
+        "from django.conf import settings; "
+        "print(settings.DATABASES['default']['OPTIONS'].get('transaction_mode'), "
+        "settings.SQLITE_PRAGMAS.get('journal_mode'))"
+    )
+    assert manage(tmp_path, "shell", "-c", script).split() == ["None", "None"]
+    assert manage(tmp_path, "shell", "-c", script, DB_SQLITE_TUNING="True").split() == ["IMMEDIATE", "WAL"]
+
+
+def test_loadtest_join_concurrent_users_on_tuned_file_database(tmp_path):
+    # Il DB di test è in memoria (lock per tabella): la concorrenza reale
+    # si misura su un file SQLite, in un processo con il profilo attivo
+    manage(tmp_path, "migrate", "-v0", DB_SQLITE_TUNING="True")
+    assert manage(tmp_path, "loadtest_join", "--users", "8", DB_SQLITE_TUNING="True") == "OK"
+    leftovers = manage(
+        tmp_path, "shell", "-c",
+        "from users.models import User; from group_projects.models import GroupProject; "
+        "print(User.objects.filter(username__startswith='loadtest_').count(), "
+        "GroupProject.objects.filter(name__startswith='Load test').count())",
+        DB_SQLITE_TUNING="True",
+    )
+    assert leftovers.split() == ["0", "0"]
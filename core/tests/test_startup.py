@@ -0,0 +1,51 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from core.startup import group_by_package, parse_importtime
+
+IMPORTTIME = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   django.utils
+import time:       300 |        420 | django
+import time:        80 |         80 | allauth.account
+garbage line
+import time: bad | value | module
+"""
+
+
+def test_parse_importtime():
+    modules = parse_importtime(IMPORTTIME)
+    assert modules == [("django.utils", 120, 120), ("django", 300, 420), ("allauth.account", 80, 80)]
+    assert group_by_package(modules) == {"django": 420, "allauth": 80}
+
+
+def test_measure_in_a_fresh_process():
+    # measure() esegue django.setup(): nel processo dei test lascerebbe tracce
+    proc = subprocess.run(
+        [sys.executable, "-m", "core.startup"], cwd=settings.BASE_DIR, capture_output=True, text=True,
+        env={**os.environ, "DJANGO_SETTINGS_MODULE": "gpm_django_be.settings"},
+    )
+    assert proc.returncode == 0, proc.stderr
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    assert result["total"] >= result["setup"] >= 0
+    assert result["url_patterns"] > 0 and "core" in result["ready"]
+
+
+def test_profile_startup_command():
+    out = io.StringIO()
+    call_command("profile_startup", profile="api", repeat=1, top=3, stdout=out)
+    output = out.getvalue()
+    assert "Profilo 'api'" in output
+    assert "AppConfig.ready()" in output
+    assert "django.contrib.admin" not in output.split("AppConfig.ready():")[1]
+
+
+def test_profile_startup_failure(monkeypatch):
+    monkeypatch.setenv("DJANGO_SETTINGS_MODULE", "does.not.exist")
+    with pytest.raises(CommandError):
+        call_command("profile_startup", profile="full", repeat=1, stdout=io.StringIO())
@@ -0,0 +1,121 @@
+import pytest
+from rest_framework.test import APIRequestFactory
+from core import sync
+from core.events import get_broker, reset_broker
+from core.models import AuditEvent, ChangeLogEntry
+from core.views import SyncView
+from group_projects.models import GroupProject, Topic, UserGroup
+from users.models import User
+
+
+@pytest.fixture(autouse=True)
+def no_settle(settings):
+    settings.SYNC_SETTLE_SECONDS = 0
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(username="user", password="pass", email="user@example.org", matricola="123456")
+
+
+def get(user, **params):
+    req = APIRequestFactory().get("/api/v1/sync/", params)
+    req.user = user
+    return SyncView.as_view()(req)
+
+
+@pytest.mark.django_db
+def test_sync_coalesces_changes_and_emits_tombstones(user):
+    since = sync.current_token()
+    topic = Topic.objects.create(title="First")
+    topic.title = "Second"
+    topic.save()
+    group = GroupProject.objects.create(name="Group", topic=topic)
+    membership = UserGroup.objects.create(user=user, group=group)
+    membership_id = membership.id
+    membership.delete()
+
+    res = get(user, since=since)
+
+    assert res.status_code == 200
+    changes = res.data["changes"]
+    assert changes["group_projects.topic"]["upserted"] == [{"id": topic.id, "title": "Second", "capacity": None}]
+    assert [g["id"] for g in changes["group_projects.groupproject"]["upserted"]] == [group.id]
+    assert changes["group_projects.usergroup"] == {"upserted": [], "deleted": [membership_id]}
+    assert res.data["has_more"] is False
+    assert res.data["next"] == str(sync.current_token())
+
+
+@pytest.mark.django_db
+def test_sync_pages_with_next_token(user):
+    since = sync.current_token()
+    topics = [Topic.objects.create(title=f"Topic {i}") for i in range(3)]
+
+    first = get(user, since=since, limit=2)
+    assert first.data["has_more"] is True
+    second = get(user, since=first.data["next"], limit=2)
+    assert second.data["has_more"] is False
+
+    ids = [t["id"] for page in (first, second) for t in page.data["changes"]["group_projects.topic"]["upserted"]]
+    assert ids == [t.id for t in topics]
+
+
+@pytest.mark.django_db
+def test_sync_skips_unexposed_updates_and_hides_superusers(user, admin_user):
+    since = sync.current_token()
+
+    user.save(update_fields=["last_login"])
+    assert sync.current_token() == since
+
+    user.first_name = "Mario"
+    user.save(update_fields=["first_name"])
+    admin_user.save()
+
+    users = get(user, since=since).data["changes"]["users.user"]
+    assert [u["first_name"] for u in users["upserted"]] == ["Mario"]
+    assert users["deleted"] == [admin_user.id]
+
+
+@pytest.mark.django_db
+def test_sync_settle_window_holds_back_recent_entries(user, settings):
+    settings.SYNC_SETTLE_SECONDS = 60
+    since = sync.current_token()
+    Topic.objects.create(title="Fresh")
+
+    res = get(user, since=since)
+    assert res.data["changes"] == {}
+    assert res.data["next"] == str(since)
+
+
+@pytest.mark.django_db
+def test_sync_rejects_invalid_token(user):
+    assert get(user, since="abc").status_code == 400
+    assert get(user, limit="0").status_code == 400
+
+
+@pytest.mark.django_db
+def test_initial_sync_includes_seeded_rows(user):
+    assert ChangeLogEntry.objects.filter(model="group_projects.topic").exists()
+    res = get(user, limit=2000)
+    assert len(res.data["changes"]["group_projects.topic"]["upserted"]) == Topic.objects.count()
+
+
+@pytest.mark.django_db
+def test_record_bulk_logs_audits_and_publishes_on_commit(user, django_capture_on_commit_callbacks, audit_buffer):
+    group = GroupProject.objects.create(name="Group", topic=Topic.objects.create(title="Topic"))
+    since = sync.current_token()
+    reset_broker()
+    called = []
+
+    with django_capture_on_commit_callbacks(execute=True):
+        sync.record_bulk("update", GroupProject, [(group.pk, group.pk, {"name": ["a", "b"]})], user,
+                         events=[("groupproject.updated", {"id": group.pk}, group.pk)],
+                         after=[lambda: called.append(True)])
+        assert get_broker().since(0) == []
+
+    audit_buffer.flush()
+    assert called == [True]
+    assert [e.type for e in get_broker().since(0)] == ["groupproject.updated"]
+    assert list(ChangeLogEntry.objects.filter(id__gt=since).values_list("object_id", flat=True)) == [group.pk]
+    assert AuditEvent.objects.filter(action="update", object_id=group.pk, actor=user).exists()
+    reset_broker()
@@ -0,0 +1,72 @@
+import datetime
+import pytest
+from django.utils import timezone
+from core import tasks
+from core.models import Task
+
+calls = []
+
+
+@tasks.task(name="tests.record", max_attempts=2, backoff=10)
+def record(value):
+    calls.append(value)
+
+
+@tasks.task(name="tests.explode", max_attempts=2, backoff=10)
+def explode():
+    raise RuntimeError("boom")
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    calls.clear()
+
+
+@pytest.mark.django_db
+def test_defer_enqueues_on_commit(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        record.defer(1)
+        record.defer(2, delay=60)
+
+    claimed = tasks.claim(10)
+    assert [t.args for t in claimed] == [[1]]
+    assert tasks.claim(10) == []
+
+    tasks.execute(claimed[0])
+    assert calls == [1]
+    assert Task.objects.get(pk=claimed[0].pk).status == Task.DONE
+
+
+@pytest.mark.django_db
+def test_eager_mode_runs_immediately(settings, django_capture_on_commit_callbacks):
+    settings.TASKS_EAGER = True
+    with django_capture_on_commit_callbacks(execute=True):
+        record.defer(3)
+    assert calls == [3]
+    assert not Task.objects.exists()
+
+
+@pytest.mark.django_db
+def test_failed_task_is_retried_with_backoff_then_marked_failed():
+    Task.objects.create(name="tests.explode", max_attempts=2)
+
+    task = tasks.execute(tasks.claim(1)[0])
+    assert task.status == Task.QUEUED
+    assert task.last_error == "RuntimeError: boom"
+    assert task.run_at > timezone.now() + datetime.timedelta(seconds=5)
+
+    Task.objects.update(run_at=timezone.now())
+    task = tasks.execute(tasks.claim(1)[0])
+    assert task.status == Task.FAILED
+    assert task.attempts == 2
+
+    stats = tasks.task_stats()["tests.explode"]
+    assert stats["counts"] == {Task.FAILED: 1}
+
+
+@pytest.mark.django_db
+def test_stale_running_tasks_are_requeued():
+    Task.objects.create(name="tests.record", status=Task.RUNNING,
+                        started_at=timezone.now() - datetime.timedelta(hours=1))
+    assert tasks.requeue_stale(600) == 1
+    assert Task.objects.get().status == Task.QUEUED
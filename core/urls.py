@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import DatabaseMetricsView, SyncView, TaskMetricsView
+
+urlpatterns = [
+    path('sync/', SyncView.as_view(), name='sync'),
+    path('metrics/db/', DatabaseMetricsView.as_view(), name='metrics-db'),
+    path('metrics/tasks/', TaskMetricsView.as_view(), name='metrics-tasks'),
+]
@@ -0,0 +1,76 @@
+from django.http import HttpResponse, HttpResponseNotModified
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import schema, sync, tasks
+from .db import pool_stats
+
+
+class CachedSchemaView(APIView):
+    """
+    Serve lo schema OpenAPI precalcolato dalla memoria, con ETag.
+    Uno staff può forzarne la rigenerazione con `?refresh=1`.
+    """
+    permission_classes = [AllowAny]
+    swagger_schema = None
+
+    def get(self, request):
+        if request.query_params.get('refresh') and request.user.is_staff:
+            cached = schema.build_schema()
+        else:
+            cached = schema.get_schema()
+
+        if_none_match = request.headers.get('If-None-Match', '')
+        if cached.etag in [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(cached.body, content_type='application/json')
+            response.precompressed = cached.encodings
+        response['ETag'] = cached.etag
+        response['Cache-Control'] = 'public, max-age=300'
+        return response
+
+
+class DatabaseMetricsView(APIView):
+    """Statistiche delle connessioni e dei pool del DB, solo per lo staff"""
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        return Response({'databases': pool_stats()})
+
+
+class TaskMetricsView(APIView):
+    """Metriche dei task differiti per nome e stato, solo per lo staff"""
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        return Response({'tasks': tasks.task_stats()})
+
+
+class SyncView(APIView):
+    """
+    Sincronizzazione incrementale per i client offline: `?since=<token>`
+    ritorna le modifiche successive al token, a pagine di `?limit=` voci.
+    Il client ripete la richiesta con `next` finché `has_more` è vero.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        since = self._int_param(request, 'since', 0, minimum=0)
+        limit = self._int_param(request, 'limit', None, minimum=1)
+        return Response(sync.changes_since(since, limit))
+
+    @staticmethod
+    def _int_param(request, name, default, minimum):
+        raw = request.query_params.get(name)
+        if raw in (None, ''):
+            return default
+        try:
+            value = int(raw)
+        except ValueError:
+            value = None
+        if value is None or value < minimum:
+            raise ValidationError({name: f'Must be an integer greater than or equal to {minimum}.'})
+        return value
@@ -0,0 +1,19 @@
+from rest_framework import permissions
+from drf_yasg.views import get_schema_view
+from drf_yasg import openapi
+
+
+api_info = openapi.Info(
+   title="GPM API",
+   default_version='v1',
+   description="Group Project Manager",
+   terms_of_service="",
+   contact=openapi.Contact(email="vincenzorizzomy@gmail.com"),
+   license=openapi.License(name="MIT"),
+)
+
+schema_view = get_schema_view(
+   api_info,
+   public=True,
+   permission_classes=(permissions.AllowAny,),
+)
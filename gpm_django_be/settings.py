@@ -75,13 +75,30 @@ INSTALLED_APPS = [
     "drf_yasg",
 
     # local apps
+    "core",
     "users",
     "group_projects",
 ]
 
+# Profilo del worker: "full" (default) oppure "api", che non carica admin,
+# documentazione e registrazione per ridurre il tempo di avvio
+WORKER_PROFILE = os.getenv("DJANGO_WORKER_PROFILE", "full").lower()
+LEAN_API_WORKER = WORKER_PROFILE == "api"
+
+LEAN_EXCLUDED_APPS = [
+    "django.contrib.admin",
+    "allauth.socialaccount",
+    "dj_rest_auth.registration",
+    "drf_yasg",
+]
+
+if LEAN_API_WORKER:
+    INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in LEAN_EXCLUDED_APPS]
+
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "core.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.contrib.sites.middleware.CurrentSiteMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -90,6 +107,7 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "allauth.account.middleware.AccountMiddleware",
+    "core.middleware.ReplicaRoutingMiddleware",
 ]
 
 
@@ -128,9 +146,71 @@ DATABASES = {
         "PASSWORD": os.getenv("DB_PASSWORD", ""),
         "HOST": os.getenv("DB_HOST", ""),
         "PORT": os.getenv("DB_PORT", ""),
+        # Connessioni persistenti: 0 = una connessione per richiesta, "None" = illimitate
+        "CONN_MAX_AGE": (
+            None if os.getenv("DB_CONN_MAX_AGE", "60").lower() == "none"
+            else int(os.getenv("DB_CONN_MAX_AGE", "60"))
+        ),
+        "CONN_HEALTH_CHECKS": os.getenv("DB_CONN_HEALTH_CHECKS", "True").lower() == "true",
+        "OPTIONS": {},
     }
 }
 
+# Profilo SQLite per produzione, da attivare con DB_SQLITE_TUNING=True: WAL, busy timeout
+# e transazioni BEGIN IMMEDIATE, così le scritture concorrenti si mettono in coda invece di fallire
+SQLITE_TUNING = os.getenv("DB_SQLITE_TUNING", "False").lower() == "true"
+SQLITE_PRAGMAS = {}
+
+if SQLITE_TUNING and "sqlite" in DATABASES["default"]["ENGINE"]:
+    busy_timeout = int(os.getenv("DB_SQLITE_BUSY_TIMEOUT", "20"))
+    DATABASES["default"]["OPTIONS"].update(timeout=busy_timeout, transaction_mode="IMMEDIATE")
+    SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": os.getenv("DB_SQLITE_SYNCHRONOUS", "NORMAL"),
+        "mmap_size": int(os.getenv("DB_SQLITE_MMAP_SIZE", str(128 * 1024 * 1024))),
+        "cache_size": int(os.getenv("DB_SQLITE_CACHE_SIZE", "-20000")),
+        "busy_timeout": busy_timeout * 1000,
+        "temp_store": "MEMORY",
+    }
+
+# Pool nativo di psycopg 3 (solo PostgreSQL); esclude le connessioni persistenti
+DB_POOL = os.getenv("DB_POOL", "False").lower() == "true"
+
+if DB_POOL and "postgresql" in DATABASES["default"]["ENGINE"]:
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+        "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+        "timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    }
+
+
+# Repliche in lettura: DB_REPLICAS è una lista separata da virgole di file
+# (SQLite) o di host[:porta] (altri engine) con gli stessi dati del primario
+DATABASE_REPLICAS = []
+
+for index, replica in enumerate(
+    (r.strip() for r in os.getenv("DB_REPLICAS", "").split(",") if r.strip()), start=1
+):
+    alias = f"replica_{index}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "OPTIONS": dict(DATABASES["default"]["OPTIONS"]),
+        "TEST": {"MIRROR": "default"},
+    }
+    if "sqlite" in DATABASES[alias]["ENGINE"]:
+        DATABASES[alias]["NAME"] = replica
+    else:
+        host, _, port = replica.partition(":")
+        DATABASES[alias].update(HOST=host, PORT=port or DATABASES["default"]["PORT"])
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["core.routers.ReplicaRouter"]
+
+# Dopo una scrittura il client legge dal primario per questi secondi
+REPLICA_PIN_SECONDS = int(os.getenv("DB_REPLICA_PIN_SECONDS", "5"))
+REPLICA_COOLDOWN_SECONDS = int(os.getenv("DB_REPLICA_COOLDOWN_SECONDS", "30"))
+
 
 # RESTFRAMEWORK
 REST_FRAMEWORK = {
@@ -140,7 +220,16 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
-    ]
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
 
@@ -216,6 +305,86 @@ CORS_ALLOW_METHODS = [
 
 CORS_PREFLIGHT_MAX_AGE = 86400
 
+# Compressione delle risposte (gzip, e brotli/zstd se installati)
+COMPRESSION_PATHS = ["/api/"]
+COMPRESSION_MIN_SIZE = int(os.getenv("DJANGO_COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_ENCODINGS = [
+    encoding.strip()
+    for encoding in os.getenv("DJANGO_COMPRESSION_ENCODINGS", "br,zstd,gzip").split(",")
+    if encoding.strip()
+]
+
+# Durata in cache delle liste di catalogo (topic, goal), già compresse
+CATALOG_CACHE_TIMEOUT = int(os.getenv("DJANGO_CATALOG_CACHE_TIMEOUT", "300"))
+# Elenco utenti per l'autocompletamento: versionato, invalidato a ogni modifica
+USER_DIRECTORY_CACHE_TIMEOUT = 3600
+USER_DIRECTORY_LIMIT = 20
+# Iscrizione ai gruppi: "open" (nessun vincolo), "one_group" (un gruppo per
+# utente) o "one_per_topic" (un gruppo per topic). Dopo averla cambiata va
+# eseguito `manage.py refresh_enrollment` per le iscrizioni esistenti.
+ENROLLMENT_POLICY = os.getenv("DJANGO_ENROLLMENT_POLICY", "open")
+
+# Statistiche per lo staff (`/stats/`), invalidate a ogni modifica dei goal
+STATS_CACHE_TIMEOUT = int(os.getenv("DJANGO_STATS_CACHE_TIMEOUT", "600"))
+# Dashboard dello studente (`/users/me/groups/`, `/users/me/progress/`)
+ME_CACHE_TIMEOUT = int(os.getenv("DJANGO_ME_CACHE_TIMEOUT", "30"))
+
+# Change feed di gruppi, membri e goal (SSE sotto ASGI, long-poll sotto WSGI)
+EVENTS_BACKEND = os.getenv("DJANGO_EVENTS_BACKEND", "core.events.InProcessBackend")
+EVENTS_BACKEND_OPTIONS = {"size": int(os.getenv("DJANGO_EVENTS_BUFFER_SIZE", "1000"))}
+EVENTS_LONG_POLL_TIMEOUT = float(os.getenv("DJANGO_EVENTS_LONG_POLL_TIMEOUT", "25"))
+EVENTS_POLL_INTERVAL = 0.5
+EVENTS_HEARTBEAT = 15
+
+# Sincronizzazione incrementale (`/sync/`)
+SYNC_PAGE_SIZE = int(os.getenv("DJANGO_SYNC_PAGE_SIZE", "500"))
+SYNC_MAX_PAGE_SIZE = 2000
+# Le voci più giovani di così restano alla sync successiva: copre le
+# transazioni concorrenti che confermano un id più basso in ritardo
+SYNC_SETTLE_SECONDS = float(os.getenv("DJANGO_SYNC_SETTLE_SECONDS", "2"))
+
+# Audit trail: eventi accumulati in memoria e scritti a blocchi da un thread
+AUDIT_BACKGROUND = os.getenv("DJANGO_AUDIT_BACKGROUND", "True").lower() == "true"
+AUDIT_BATCH_SIZE = int(os.getenv("DJANGO_AUDIT_BATCH_SIZE", "200"))
+AUDIT_QUEUE_SIZE = int(os.getenv("DJANGO_AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("DJANGO_AUDIT_FLUSH_INTERVAL", "1"))
+AUDIT_RETENTION_DAYS = int(os.getenv("DJANGO_AUDIT_RETENTION_DAYS", "365"))
+AUDIT_HISTORY_PAGE_SIZE = 100
+
+# Task differiti: accodati nel DB ed eseguiti da `manage.py run_tasks`
+TASKS_EAGER = os.getenv("DJANGO_TASKS_EAGER", "False").lower() == "true"
+TASKS_WORKERS = int(os.getenv("DJANGO_TASKS_WORKERS", "4"))
+TASKS_POLL_INTERVAL = float(os.getenv("DJANGO_TASKS_POLL_INTERVAL", "1"))
+TASKS_STALE_SECONDS = 600
+
+# last_login: i login vengono accumulati e scritti ogni FLUSH_INTERVAL secondi
+# (0 = subito); non si riscrive un last_login più giovane di STALENESS secondi
+LAST_LOGIN_FLUSH_INTERVAL = float(os.getenv("DJANGO_LAST_LOGIN_FLUSH_INTERVAL", "30"))
+LAST_LOGIN_STALENESS = float(os.getenv("DJANGO_LAST_LOGIN_STALENESS", "60"))
+
+# Controllo dei link dei gruppi (`manage.py check_links`)
+LINKCHECK_WORKERS = int(os.getenv("DJANGO_LINKCHECK_WORKERS", "16"))
+LINKCHECK_PER_HOST = int(os.getenv("DJANGO_LINKCHECK_PER_HOST", "2"))
+LINKCHECK_TIMEOUT = float(os.getenv("DJANGO_LINKCHECK_TIMEOUT", "5"))
+LINKCHECK_TTL = int(os.getenv("DJANGO_LINKCHECK_TTL", "3600"))
+
+# Gruppi archiviati: `purge_archive` li cancella dopo questo numero di giorni
+ARCHIVE_RETENTION_DAYS = int(os.getenv("DJANGO_ARCHIVE_RETENTION_DAYS", "90"))
+
+# Formazione automatica dei gruppi: tempo massimo della ricerca locale, in secondi
+TEAM_SEARCH_SECONDS = float(os.getenv("DJANGO_TEAM_SEARCH_SECONDS", "2"))
+
+# Admin: sopra questa soglia le changelist senza filtri mostrano un conteggio stimato
+ADMIN_ESTIMATE_THRESHOLD = int(os.getenv("DJANGO_ADMIN_ESTIMATE_THRESHOLD", "10000"))
+
+# OpenAPI: lo schema viene generato al deploy e servito dalla memoria
+API_SCHEMA_PATH = os.getenv("DJANGO_API_SCHEMA_PATH", BASE_DIR / "openapi.json")
+
+SWAGGER_SETTINGS = {
+    'DEFAULT_INFO': 'gpm_django_be.docs.api_info',
+    'SPEC_URL': 'schema-json',
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -276,7 +445,8 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
-    'UPDATE_LAST_LOGIN': True,
+    # last_login viene scritto a blocchi da users.last_login
+    'UPDATE_LAST_LOGIN': False,
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
     'AUTH_HEADER_TYPES': ('Bearer',),
@@ -1,18 +1,125 @@
-from django.contrib import admin
-from .models import Topic, GroupProject, Goal, GroupGoal
+from django import forms
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.core.paginator import Paginator
+from django.http import HttpResponseBadRequest, HttpResponseRedirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from core.admin import EstimatedCountPaginator, InputFilter, PaginatedInlineMixin
+from . import allocation, archive, grading, tasks
+from .models import Topic, TopicPreference, GroupProject, Goal, GroupGoal
 
 
-class GroupGoalsInline(admin.TabularInline):
+class TopicFilter(InputFilter):
+    title = "topic"
+    parameter_name = "topic_title"
+    lookup = "topic__title__icontains"
+
+
+class GroupFilter(InputFilter):
+    title = "group"
+    parameter_name = "group_name"
+    lookup = "group__name__icontains"
+
+
+class GoalFilter(InputFilter):
+    title = "goal"
+    parameter_name = "goal_title"
+    lookup = "goal__title__icontains"
+
+
+class GroupGoalForm(forms.ModelForm):
+    """
+    Porta con sé la versione letta del GroupGoal: se un altro valutatore
+    lo ha modificato nel frattempo, il salvataggio viene rifiutato
+    """
+    # Non può chiamarsi `version`: il campo del modello non è modificabile
+    seen_version = forms.IntegerField(widget=forms.HiddenInput, required=False)
+
+    class Meta:
+        model = GroupGoal
+        fields = "__all__"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["seen_version"].initial = self.instance.version
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if self.instance.pk is None or not self.has_changed():
+            return cleaned_data
+        version = cleaned_data.get("seen_version")
+        if version is None or GroupGoal.all_objects.filter(pk=self.instance.pk).exclude(version=version).exists():
+            raise ValidationError("Il goal è stato modificato da un altro valutatore: ricarica la pagina")
+        self.instance.version = version
+        return cleaned_data
+
+
+class GroupGoalsInline(PaginatedInlineMixin, admin.TabularInline):
     model = GroupGoal
+    form = GroupGoalForm
     extra = 0
+    autocomplete_fields = ("goal",)
+    per_page = 25
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("goal")
+
+
+class TopicPreferenceInline(admin.TabularInline):
+    model = TopicPreference
+    extra = 0
+    autocomplete_fields = ("topic",)
 
 
 @admin.register(GroupProject)
 class GroupAdmin(admin.ModelAdmin):
-    list_display = ("name", "topic", "link_django", "link_tui", "link_gui")
-    list_filter = ("topic",)
+    list_display = ("name", "topic", "link_django", "link_tui", "link_gui", "links_health")
+    list_select_related = ("topic",)
+    list_filter = (TopicFilter,)
     search_fields = ("name",)
-    inlines = [GroupGoalsInline]
+    autocomplete_fields = ("topic",)
+    readonly_fields = ("links_status", "links_checked_at", "allocation")
+    inlines = [GroupGoalsInline, TopicPreferenceInline]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ("allocate_topics", "archive_groups", "check_links")
+
+    @admin.action(description="Controlla i link dei gruppi selezionati", permissions=["change"])
+    def check_links(self, request, queryset):
+        """Accoda il controllo dei link, ignorando gli esiti ancora validi"""
+        tasks.check_group_links.defer(list(queryset.values_list("pk", flat=True)), force=True)
+        self.message_user(request, "Controllo dei link accodato.", messages.SUCCESS)
+
+    @admin.action(description="Archivia i gruppi selezionati", permissions=["delete"])
+    def archive_groups(self, request, queryset):
+        """Archivia gruppi, goal e iscrizioni in una transazione (vedi purge_archive)"""
+        archived = archive.archive_groups(list(queryset.values_list("pk", flat=True)), request.user)
+        self.message_user(request, f"{len(archived)} gruppi archiviati.", messages.SUCCESS)
+
+    @admin.action(description="Assegna i topic secondo le preferenze", permissions=["change"])
+    def allocate_topics(self, request, queryset):
+        """Alloca i topic ai gruppi selezionati; gli altri tengono il loro posto"""
+        try:
+            results = allocation.allocate(list(queryset.values_list("pk", flat=True)), actor=request.user)
+        except allocation.AllocationError as exc:
+            self.message_user(request, str(exc), messages.ERROR)
+            return
+        assigned = [result["rank"] for result in results.values() if result["rank"] is not None]
+        self.message_user(
+            request,
+            f"{len(assigned)} gruppi assegnati ({assigned.count(1)} alla prima scelta), "
+            f"{len(results) - len(assigned)} senza posto, {len(queryset) - len(results)} senza preferenze.",
+            messages.SUCCESS,
+        )
+
+    @admin.display(description="Link raggiungibili")
+    def links_health(self, obj):
+        """Esito dell'ultimo `check_links`, es. 2/3"""
+        if not obj.links_status:
+            return "-"
+        ok = sum(1 for result in obj.links_status.values() if result.get("ok"))
+        return f"{ok}/{len(obj.links_status)}"
 
 
 @admin.register(Goal)
@@ -23,12 +130,103 @@ class GoalAdmin(admin.ModelAdmin):
 
 @admin.register(Topic)
 class TopicAdmin(admin.ModelAdmin):
-    list_display = ("title",)
+    list_display = ("title", "capacity")
     search_fields = ("title",)
 
 
 @admin.register(GroupGoal)
 class GroupGoalsAdmin(admin.ModelAdmin):
+    form = GroupGoalForm
     list_display = ("group", "goal", "complete")
-    list_filter = ("complete", "group", "goal")
+    list_select_related = ("group", "goal")
+    list_filter = ("complete", GroupFilter, GoalFilter)
+    autocomplete_fields = ("group", "goal")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ("mark_complete", "mark_incomplete")
+    change_list_template = "admin/group_projects/groupgoal/change_list.html"
+    grading_per_page = 50
+
+    @admin.action(description="Segna come completati", permissions=["change"])
+    def mark_complete(self, request, queryset):
+        self._set_complete(request, queryset, True)
+
+    @admin.action(description="Segna come non completati", permissions=["change"])
+    def mark_incomplete(self, request, queryset):
+        self._set_complete(request, queryset, False)
+
+    def _set_complete(self, request, queryset, complete):
+        updated, _ = grading.set_complete(dict.fromkeys(queryset.values_list("pk", flat=True)), complete, request.user)
+        self.message_user(request, f"{len(updated)} goal aggiornati.", messages.SUCCESS)
+
+    def get_urls(self):
+        urls = [
+            path("grading/", self.admin_site.admin_view(self.grading_view), name="group_projects_groupgoal_grading"),
+        ]
+        return urls + super().get_urls()
+
+    def grading_view(self, request):
+        """
+        Matrice gruppi × goal per la valutazione: ogni cella è un GroupGoal.
+        Al salvataggio vengono inviate solo le celle cambiate, con la
+        versione letta, e applicate con una UPDATE per stato.
+        """
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+
+        if request.method == "POST":
+            # Lo stato letto viaggia in un solo campo "id:versione:completo,...":
+            # un campo per cella supererebbe DATA_UPLOAD_MAX_NUMBER_FIELDS
+            changes = {True: {}, False: {}}
+            try:
+                state = [
+                    tuple(int(part) for part in item.split(":"))
+                    for item in filter(None, request.POST.get("state", "").split(","))
+                ]
+                for pk, version, was_complete in state:
+                    complete = f"cell-{pk}" in request.POST
+                    if complete != bool(was_complete):
+                        changes[complete][pk] = version
+            except ValueError:
+                return HttpResponseBadRequest()
+            updated, conflicts = [], []
+            for complete, versions in changes.items():
+                if versions:
+                    done, clashed = grading.set_complete(versions, complete, request.user)
+                    updated += done
+                    conflicts += clashed
+            self.message_user(request, f"{len(updated)} goal aggiornati.", messages.SUCCESS)
+            if conflicts:
+                self.message_user(
+                    request,
+                    f"{len(conflicts)} goal sono stati modificati da un altro valutatore e non sono stati salvati.",
+                    messages.WARNING,
+                )
+            return HttpResponseRedirect(request.get_full_path())
+
+        goals = list(Goal.objects.order_by("id").values_list("id", "title"))
+        groups = GroupProject.objects.order_by("name", "id").only("id", "name")
+        search = request.GET.get("q", "").strip()
+        if search:
+            groups = groups.filter(name__icontains=search)
+        page = Paginator(groups, self.grading_per_page).get_page(request.GET.get("p"))
+
+        cells = {
+            (group_id, goal_id): (pk, complete, version)
+            for pk, group_id, goal_id, complete, version in GroupGoal.objects.filter(
+                group_id__in=[group.id for group in page]
+            ).values_list("pk", "group_id", "goal_id", "complete", "version")
+        }
+        rows = [(group, [cells.get((group.id, goal_id)) for goal_id, _ in goals]) for group in page]
 
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Valutazione goal",
+            "goals": goals,
+            "rows": rows,
+            "page": page,
+            "search": search,
+            "state": ",".join(f"{pk}:{version}:{int(complete)}" for pk, complete, version in cells.values()),
+        }
+        return TemplateResponse(request, "admin/group_projects/groupgoal/grading.html", context)
@@ -0,0 +1,195 @@
+import heapq
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count
+
+from core import sync
+from users import dashboard
+from . import stats
+from .models import GroupProject, Topic, TopicPreference, UserGroup, enrollment_key, is_enrollment_conflict
+
+
+class AllocationError(Exception):
+    """L'allocazione non può essere salvata"""
+
+
+def solve(preferences, capacity):
+    """
+    Assegna a ogni gruppo uno dei topic preferiti rispettando le capienze,
+    minimizzando la somma dei rank (1 = prima scelta).
+
+    `preferences` associa a ogni gruppo la lista ordinata dei topic,
+    `capacity` a ogni topic i posti liberi (None = illimitati).
+    Ritorna {gruppo: topic}; i gruppi senza posto restano fuori.
+
+    È un min-cost flow a cammini minimi successivi: a ogni passo entra il
+    gruppo con il cammino più economico, eventualmente spostando altri
+    gruppi verso una loro scelta successiva, finché nessun gruppo trova
+    posto. Il grafo residuo è ridotto ai soli topic: l'arco a -> b costa
+    quanto il gruppo più economico da spostare da a a b, e l'ingresso in
+    un topic quanto il gruppo non assegnato più economico, ognuno tenuto
+    in un heap. Con i potenziali i costi ridotti restano non negativi e
+    basta Dijkstra, in O(T² log T) per gruppo con T topic.
+    """
+    cost = {group: {topic: rank for rank, topic in enumerate(topics, 1)} for group, topics in preferences.items()}
+    topics = {topic for choices in cost.values() for topic in choices}
+    free = {topic: capacity.get(topic) for topic in topics}
+    potential = dict.fromkeys(topics, 0)
+    assignment = {}
+    # entering[t]: heap di (rank, gruppo) dei gruppi non assegnati che vogliono t;
+    # moves[a][b]: heap di (costo dello spostamento da a a b, gruppo).
+    # I gruppi che nel frattempo hanno cambiato stato vengono scartati in lettura
+    entering = defaultdict(list)
+    moves = defaultdict(lambda: defaultdict(list))
+    for group, choices in cost.items():
+        for topic, rank in choices.items():
+            entering[topic].append((rank, group))
+    for heap in entering.values():
+        heapq.heapify(heap)
+
+    def place(group, topic):
+        assignment[group] = topic
+        current = cost[group][topic]
+        for other, rank in cost[group].items():
+            if other != topic:
+                heapq.heappush(moves[topic][other], (rank - current, group))
+
+    def peek(heap, valid):
+        while heap and not valid(heap[0][1]):
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    while True:
+        best = {}
+        for topic in topics:
+            candidate = peek(entering[topic], lambda group: group not in assignment)
+            if candidate is not None:
+                best[topic] = (candidate[0] - potential[topic], (None, candidate[1]))
+        queue = [(d, topic) for topic, (d, _) in best.items()]
+        heapq.heapify(queue)
+        dist, previous, sink = {}, {}, None
+        while queue:
+            d, topic = heapq.heappop(queue)
+            if topic in dist:
+                continue
+            dist[topic], previous[topic] = d, best[topic][1]
+            if free[topic] is None or free[topic] > 0:
+                sink = topic
+                break
+            for other in list(moves[topic]):
+                if other in dist:
+                    continue
+                move = peek(moves[topic][other], lambda group: assignment[group] == topic)
+                if move is None:
+                    continue
+                candidate = d + move[0] + potential[topic] - potential[other]
+                if other not in best or candidate < best[other][0]:
+                    best[other] = (candidate, (topic, move[1]))
+                    heapq.heappush(queue, (candidate, other))
+        if sink is None:
+            return assignment
+
+        limit = dist[sink]
+        for topic in topics:
+            potential[topic] += min(dist.get(topic, limit), limit)
+        if free[sink] is not None:
+            free[sink] -= 1
+        # Si risale il cammino: ogni passo sposta un gruppo, l'ultimo entra
+        topic = sink
+        while topic is not None:
+            origin, moved = previous[topic]
+            place(moved, topic)
+            topic = origin
+
+
+def explain(choices, assigned, titles):
+    """Motivazione leggibile dell'esito per un gruppo"""
+    if assigned is None:
+        return {
+            'topic': None, 'rank': None, 'choices': len(choices),
+            'reason': "Nessun topic tra le preferenze ha posti liberi: topic invariato",
+        }
+    rank = choices.index(assigned) + 1
+    if rank == 1:
+        reason = "Prima scelta"
+    else:
+        # A costo minimo, ogni scelta migliore è necessariamente al completo
+        full = ", ".join(titles[topic] for topic in choices[:rank - 1])
+        reason = f"Scelta n. {rank}: al completo {full}"
+    return {'topic': assigned, 'rank': rank, 'choices': len(choices), 'reason': reason}
+
+
+def allocate(group_ids=None, dry_run=False, actor=None):
+    """
+    Assegna i topic ai gruppi che hanno espresso preferenze (tutti, o solo
+    `group_ids`) e salva topic e spiegazione con una bulk_update.
+    I gruppi esclusi occupano comunque i posti dei loro topic.
+    Ritorna {gruppo: spiegazione}.
+    """
+    with transaction.atomic():
+        rows = TopicPreference.objects.order_by('group_id', 'rank').values_list('group_id', 'topic_id')
+        if group_ids is not None:
+            rows = rows.filter(group_id__in=group_ids)
+        preferences = defaultdict(list)
+        for group_id, topic_id in rows:
+            preferences[group_id].append(topic_id)
+
+        groups = GroupProject.objects.select_for_update().in_bulk(list(preferences))
+        preferences = {group_id: preferences[group_id] for group_id in sorted(groups)}
+        topics = dict(Topic.objects.values_list('id', 'capacity'))
+        used = dict(
+            GroupProject.objects.exclude(pk__in=groups).values_list('topic_id').annotate(n=Count('id')).order_by()
+        )
+        capacity = {
+            topic: None if limit is None else max(limit - used.get(topic, 0), 0)
+            for topic, limit in topics.items()
+        }
+
+        assignment = solve(preferences, capacity)
+
+        titles = dict(Topic.objects.filter(pk__in={t for c in preferences.values() for t in c}).values_list('id', 'title'))
+        results, changed = {}, []
+        for group_id, choices in preferences.items():
+            group = groups[group_id]
+            results[group_id] = explain(choices, assignment.get(group_id), titles)
+            group.allocation = results[group_id]
+            previous = group.topic_id
+            if group_id in assignment and assignment[group_id] != previous:
+                group.topic_id = assignment[group_id]
+                changed.append((group, previous))
+
+        if dry_run:
+            return results
+
+        GroupProject.objects.bulk_update(groups.values(), ['topic', 'allocation'], batch_size=500)
+        if changed:
+            refresh_enrollment(changed)
+            notify_changes(changed, actor)
+    return results
+
+
+def refresh_enrollment(changed):
+    """Con la policy "one_per_topic" l'ambito delle iscrizioni segue il topic del gruppo"""
+    if settings.ENROLLMENT_POLICY != 'one_per_topic':
+        return
+    try:
+        with transaction.atomic():
+            for group, _ in changed:
+                UserGroup.objects.filter(group=group).update(enrollment_key=enrollment_key(group))
+    except IntegrityError as exc:
+        if not is_enrollment_conflict(exc):
+            raise
+        raise AllocationError("Un utente si troverebbe in due gruppi con lo stesso topic")
+
+
+def notify_changes(changed, actor):
+    users = list(
+        UserGroup.objects.filter(group__in=[group for group, _ in changed]).values_list('user_id', flat=True).distinct()
+    )
+    sync.record_bulk('allocate', GroupProject, [
+        (group.pk, group.pk, {'topic': [previous, group.topic_id]}) for group, previous in changed
+    ], actor, events=[
+        ('groupproject.updated', {'id': group.pk}, group.pk) for group, _ in changed
+    ], after=[lambda: dashboard.invalidate_many(users), stats.bump_version])
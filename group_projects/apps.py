@@ -3,4 +3,7 @@ from django.apps import AppConfig
 class GroupProjectsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'group_projects'
-    verbose_name = "Group Projects"
\ No newline at end of file
+    verbose_name = "Group Projects"
+
+    def ready(self):
+        from . import signals  # noqa: F401
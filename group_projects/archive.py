@@ -0,0 +1,54 @@
+from django.db import transaction
+from django.utils import timezone
+
+from core import sync
+from users import dashboard
+from . import stats
+from .models import GroupGoal, GroupProject, UserGroup
+
+
+def archive_groups(group_ids, actor=None):
+    """
+    Archivia i gruppi insieme ai loro goal e iscrizioni: tre UPDATE nella
+    stessa transazione, invece di cancellazioni bloccate da PROTECT.
+    Le righe archiviate spariscono dai manager di default e vengono
+    cancellate davvero da `purge_archive`. Ritorna gli id archiviati.
+    """
+    with transaction.atomic():
+        groups = list(
+            GroupProject.objects.select_for_update().filter(pk__in=group_ids).values_list('pk', flat=True)
+        )
+        if not groups:
+            return []
+        memberships = list(UserGroup.objects.filter(group_id__in=groups).values_list('pk', 'group_id', 'user_id'))
+        goals = list(GroupGoal.objects.filter(group_id__in=groups).values_list('pk', 'group_id'))
+
+        now = timezone.now()
+        UserGroup.objects.filter(group_id__in=groups).update(archived_at=now)
+        GroupGoal.objects.filter(group_id__in=groups).update(archived_at=now)
+        GroupProject.objects.filter(pk__in=groups).update(archived_at=now)
+        notify_archived(groups, memberships, goals, actor)
+    return groups
+
+
+def notify_archived(groups, memberships, goals, actor):
+    """
+    Per i client le righe archiviate sono cancellate: il log di
+    sincronizzazione le rende tombstone perché non più visibili.
+    L'audit ha una riga per gruppo, con membri e numero di goal.
+    """
+    sync.record_changes(UserGroup, [pk for pk, _, _ in memberships])
+    sync.record_changes(GroupGoal, [pk for pk, _ in goals])
+    members, goal_count = {}, {}
+    for _, group_id, user_id in memberships:
+        members.setdefault(group_id, []).append(user_id)
+    for _, group_id in goals:
+        goal_count[group_id] = goal_count.get(group_id, 0) + 1
+    users = [user_id for _, _, user_id in memberships]
+    sync.record_bulk('archive', GroupProject, [
+        (pk, pk, {'members': members.get(pk, []), 'goals': goal_count.get(pk, 0)}) for pk in groups
+    ], actor, events=[
+        *(('usergroup.deleted', {'id': pk, 'user': user_id}, group_id) for pk, group_id, user_id in memberships),
+        *(('groupgoal.deleted', {'id': pk}, group_id) for pk, group_id in goals),
+        *(('groupproject.deleted', {'id': pk}, pk) for pk in groups),
+    ], after=[lambda: dashboard.invalidate_many(users), stats.bump_version])
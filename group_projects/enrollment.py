@@ -0,0 +1,98 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count
+
+from core import sync
+from users import dashboard
+from .models import GroupFull, GroupProject, UserGroup, enrollment_key, is_enrollment_conflict
+
+
+class EnrollmentConflict(Exception):
+    """L'iscrizione violerebbe ENROLLMENT_POLICY"""
+
+
+class AlreadyMember(Exception):
+    """Alcuni utenti sono già membri del gruppo di destinazione"""
+
+
+def move_members(user_ids, source, target, actor=None):
+    """
+    Sposta gli utenti dal gruppo `source` al gruppo `target` in un'unica
+    transazione: posti e iscrizioni cambiano con una UPDATE ciascuno, e se
+    un solo spostamento non è possibile non viene spostato nessuno.
+    Ritorna gli id delle iscrizioni spostate.
+    """
+    with transaction.atomic():
+        memberships = list(
+            UserGroup.objects.select_for_update()
+            .filter(group=source, user_id__in=user_ids)
+            .values_list('pk', 'user_id')
+        )
+        if not memberships:
+            return []
+        # Con la policy "open" nessun vincolo lo impedisce: senza questo
+        # controllo l'utente finirebbe due volte nello stesso gruppo
+        members = set(
+            UserGroup.objects.filter(group=target, user_id__in=[user_id for _, user_id in memberships])
+            .values_list('user_id', flat=True)
+        )
+        if members:
+            raise AlreadyMember(sorted(members))
+        count = len(memberships)
+        if not GroupProject.objects.reserve_seat(target.pk, count):
+            raise GroupFull(target.pk)
+        GroupProject.objects.release_seat(source.pk, count)
+        try:
+            # Savepoint: l'errore del vincolo non deve rompere la transazione esterna
+            with transaction.atomic():
+                UserGroup.objects.filter(pk__in=[pk for pk, _ in memberships]).update(
+                    group=target, enrollment_key=enrollment_key(target),
+                )
+        except IntegrityError as exc:
+            if not is_enrollment_conflict(exc):
+                raise
+            raise EnrollmentConflict
+        notify_moves(memberships, source, target, actor)
+    return [pk for pk, _ in memberships]
+
+
+def refresh_keys():
+    """
+    Ricalcola l'ambito di tutte le iscrizioni secondo ENROLLMENT_POLICY:
+    va eseguita (`manage.py refresh_enrollment`) a ogni cambio di policy,
+    altrimenti le iscrizioni esistenti non contano. Se qualcuno violerebbe
+    la nuova policy non cambia nulla e solleva EnrollmentConflict.
+    Ritorna il numero di iscrizioni con un ambito.
+    """
+    scope = {'one_group': ['user'], 'one_per_topic': ['user', 'group__topic']}.get(settings.ENROLLMENT_POLICY)
+    with transaction.atomic():
+        if scope:
+            conflicts = (
+                UserGroup.objects.values(*scope).annotate(n=Count('id')).filter(n__gt=1)
+                .values_list('user_id', flat=True)
+            )
+            if conflicts := sorted(set(conflicts)):
+                raise EnrollmentConflict(conflicts)
+        # Prima si azzera tutto: aggiornando un topic alla volta gli ambiti
+        # vecchi potrebbero scontrarsi con i nuovi
+        UserGroup.objects.update(enrollment_key=None)
+        updated = 0
+        for topic_id in GroupProject.objects.filter(users__isnull=False).values_list('topic_id', flat=True).distinct():
+            key = enrollment_key(GroupProject(topic_id=topic_id))
+            if key is not None:
+                updated += UserGroup.objects.filter(group__topic_id=topic_id).update(enrollment_key=key)
+    return updated
+
+
+def notify_moves(memberships, source, target, actor):
+    users = [user_id for _, user_id in memberships]
+    sync.record_bulk('move', UserGroup, [
+        (pk, target.pk, {'group': [source.pk, target.pk], 'user': user_id}) for pk, user_id in memberships
+    ], actor, events=[
+        event
+        for pk, user_id in memberships
+        for event in (
+            ('usergroup.deleted', {'id': pk, 'user': user_id}, source.pk),
+            ('usergroup.created', {'id': pk, 'user': user_id}, target.pk),
+        )
+    ], after=[lambda: dashboard.invalidate_many(users)])
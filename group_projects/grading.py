@@ -0,0 +1,50 @@
+from django.db import transaction
+from django.db.models import F
+
+from core import sync
+from users import dashboard
+from . import stats
+from .models import GroupGoal, UserGroup
+
+
+def set_complete(versions, complete, actor=None):
+    """
+    Imposta `complete` su molti GroupGoal con una sola UPDATE.
+
+    `versions` associa a ogni id la versione vista dal valutatore, o None
+    per non fare controlli. Le righe modificate nel frattempo da qualcun
+    altro non vengono toccate e tornano come conflitti.
+    Ritorna (id aggiornati, id in conflitto).
+    """
+    with transaction.atomic():
+        rows = list(
+            GroupGoal.objects.select_for_update()
+            .filter(pk__in=versions)
+            .values_list('pk', 'group_id', 'goal_id', 'version', 'complete')
+        )
+        conflicts = set(versions) - {row[0] for row in rows}
+        changed = []
+        for pk, group_id, goal_id, version, current in rows:
+            expected = versions[pk]
+            if expected is not None and expected != version:
+                conflicts.add(pk)
+            elif current != complete:
+                changed.append((pk, group_id, goal_id))
+
+        if changed:
+            GroupGoal.objects.filter(pk__in=[pk for pk, _, _ in changed]).update(
+                complete=complete, version=F('version') + 1,
+            )
+            notify_changes(changed, complete, actor)
+    return [pk for pk, _, _ in changed], sorted(conflicts)
+
+
+def notify_changes(changed, complete, actor):
+    groups = {group_id for _, group_id, _ in changed}
+    users = list(UserGroup.objects.filter(group_id__in=groups).values_list('user_id', flat=True).distinct())
+    sync.record_bulk('update', GroupGoal, [
+        (pk, group_id, {'complete': [not complete, complete]}) for pk, group_id, _ in changed
+    ], actor, events=[
+        ('groupgoal.updated', {'id': pk, 'goal': goal_id, 'complete': complete}, group_id)
+        for pk, group_id, goal_id in changed
+    ], after=[lambda: dashboard.invalidate_many(users), stats.bump_version])
@@ -0,0 +1,118 @@
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from django.utils import timezone
+
+from .models import GroupProject
+
+LINK_FIELDS = ('link_django', 'link_tui', 'link_gui')
+
+
+class LinkChecker:
+    """
+    Controlla i link dei gruppi in parallelo con un pool di thread.
+    Ogni host riceve al più `per_host` richieste contemporanee, e le
+    richieste sono condizionate (ETag / Last-Modified) dal controllo
+    precedente, così un link invariato costa un 304.
+    """
+    def __init__(self, workers=16, per_host=2, timeout=5.0, ttl=3600):
+        self.workers = workers
+        self.per_host = per_host
+        self.timeout = timeout
+        self.ttl = datetime.timedelta(seconds=ttl)
+        self._hosts = {}
+        self._hosts_lock = threading.Lock()
+        self._local = threading.local()
+
+    def host_limit(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self._hosts_lock:
+            if host not in self._hosts:
+                self._hosts[host] = threading.BoundedSemaphore(self.per_host)
+            return self._hosts[host]
+
+    @property
+    def session(self):
+        # Una sessione per thread: riusa le connessioni keep-alive
+        if not hasattr(self._local, 'session'):
+            self._local.session = requests.Session()
+            self._local.session.headers['User-Agent'] = 'gpm-link-checker'
+        return self._local.session
+
+    def is_fresh(self, previous, url, now):
+        if not previous or previous.get('url') != url:
+            return False
+        checked_at = datetime.datetime.fromisoformat(previous['checked_at'])
+        return now - checked_at < self.ttl
+
+    def check_url(self, url, previous=None):
+        previous = previous if previous and previous.get('url') == url else {}
+        headers = {}
+        if previous.get('etag'):
+            headers['If-None-Match'] = previous['etag']
+        if previous.get('last_modified'):
+            headers['If-Modified-Since'] = previous['last_modified']
+
+        result = {'url': url, 'checked_at': timezone.now().isoformat()}
+        try:
+            with self.host_limit(url):
+                response = self.session.head(url, headers=headers, timeout=self.timeout, allow_redirects=True)
+                # Alcuni server non implementano HEAD
+                if response.status_code in (405, 501):
+                    response = self.session.get(url, headers=headers, timeout=self.timeout,
+                                                allow_redirects=True, stream=True)
+                    response.close()
+        except requests.RequestException as exc:
+            return {**result, 'ok': False, 'status': None, 'error': type(exc).__name__}
+
+        if response.status_code == 304 and 'ok' in previous:
+            return {**previous, 'checked_at': result['checked_at']}
+        result.update(ok=response.status_code < 400, status=response.status_code)
+        if response.headers.get('ETag'):
+            result['etag'] = response.headers['ETag']
+        if response.headers.get('Last-Modified'):
+            result['last_modified'] = response.headers['Last-Modified']
+        return result
+
+    def check(self, groups, force=False):
+        """
+        Controlla i link dei gruppi ancora da verificare (mai controllati,
+        cambiati o più vecchi del TTL) e salva gli esiti con un bulk_update.
+        Ritorna il numero di link controllati.
+        """
+        now = timezone.now()
+        jobs = []
+        for group in groups:
+            for field in LINK_FIELDS:
+                url = getattr(group, field)
+                previous = group.links_status.get(field)
+                if url and (force or not self.is_fresh(previous, url, now)):
+                    jobs.append((group, field, url, previous))
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='linkcheck') as executor:
+            results = list(executor.map(lambda job: self.check_url(job[2], job[3]), jobs))
+
+        changed = {}
+        for (group, field, _, _), result in zip(jobs, results):
+            group.links_status = {**group.links_status, field: result}
+            group.links_checked_at = now
+            changed[group.pk] = group
+        GroupProject.objects.bulk_update(changed.values(), ['links_status', 'links_checked_at'], batch_size=500)
+        return len(jobs)
+
+
+def check_links(group_ids=None, force=False, **options):
+    checker = LinkChecker(
+        workers=options.get('workers', settings.LINKCHECK_WORKERS),
+        per_host=options.get('per_host', settings.LINKCHECK_PER_HOST),
+        timeout=options.get('timeout', settings.LINKCHECK_TIMEOUT),
+        ttl=options.get('ttl', settings.LINKCHECK_TTL),
+    )
+    groups = GroupProject.objects.only('id', 'links_status', *LINK_FIELDS).order_by('id')
+    if group_ids:
+        groups = groups.filter(pk__in=group_ids)
+    return checker.check(groups.iterator(chunk_size=500), force=force)
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from group_projects.allocation import AllocationError, allocate
+
+
+class Command(BaseCommand):
+    help = "Assegna i topic ai gruppi secondo le preferenze, rispettando le capienze"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--group', type=int, action='append', dest='groups', help="Solo questi gruppi")
+        parser.add_argument('--dry-run', action='store_true', help="Mostra l'esito senza salvarlo")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            results = allocate(options['groups'], dry_run=options['dry_run'])
+        except AllocationError as exc:
+            raise CommandError(str(exc))
+        if options['verbosity'] > 1:
+            for group_id, result in results.items():
+                self.stdout.write(f"{group_id}: {result['reason']}")
+        ranks = [result['rank'] for result in results.values() if result['rank'] is not None]
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(ranks)}/{len(results)} gruppi assegnati, {ranks.count(1)} alla prima scelta, "
+            f"rank medio {sum(ranks) / len(ranks) if ranks else 0:.2f}, in {time.perf_counter() - start:.2f}s"
+            + (" (dry run)" if options['dry_run'] else "")
+        ))
@@ -0,0 +1,28 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from group_projects.linkcheck import check_links
+
+
+class Command(BaseCommand):
+    help = "Controlla in parallelo che i link dei gruppi rispondano e salva l'esito sul gruppo"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--group', type=int, action='append', dest='groups', help="Solo questi gruppi")
+        parser.add_argument('--force', action='store_true', help="Ignora i risultati ancora validi")
+        parser.add_argument('--workers', type=int, default=settings.LINKCHECK_WORKERS)
+        parser.add_argument('--per-host', type=int, default=settings.LINKCHECK_PER_HOST)
+        parser.add_argument('--timeout', type=float, default=settings.LINKCHECK_TIMEOUT)
+        parser.add_argument('--ttl', type=int, default=settings.LINKCHECK_TTL, help="Validità di un esito, in secondi")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        checked = check_links(
+            options['groups'], force=options['force'], workers=options['workers'],
+            per_host=options['per_host'], timeout=options['timeout'], ttl=options['ttl'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Controllati {checked} link in {time.perf_counter() - start:.1f}s"
+        ))
@@ -0,0 +1,42 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from group_projects.teams import TeamFormationError, form_teams
+
+
+class Command(BaseCommand):
+    help = "Crea i gruppi per gli studenti che non ne hanno uno"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, required=True, help="Membri per gruppo")
+        parser.add_argument(
+            '--constraints', help='File JSON {"wishes": {utente: [utenti]}, "topics": {utente: [topic]}}',
+        )
+        parser.add_argument('--prefix', default='Team', help="Prefisso del nome dei gruppi")
+        parser.add_argument('--time-limit', type=float, help="Secondi per la ricerca locale")
+        parser.add_argument('--dry-run', action='store_true', help="Mostra l'esito senza salvarlo")
+
+    def handle(self, *args, **options):
+        wishes = likes = None
+        if options['constraints']:
+            with open(options['constraints']) as f:
+                constraints = json.load(f)
+            wishes, likes = (
+                {int(user): items for user, items in constraints.get(key, {}).items()}
+                for key in ('wishes', 'topics')
+            )
+        start = time.perf_counter()
+        try:
+            groups, summary = form_teams(
+                options['size'], wishes, likes, prefix=options['prefix'],
+                dry_run=options['dry_run'], time_limit=options['time_limit'],
+            )
+        except TeamFormationError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(groups)} gruppi per {summary['students']} studenti, "
+            f"{summary['wishes_satisfied']}/{summary['wishes']} compagni desiderati insieme, "
+            f"in {time.perf_counter() - start:.2f}s" + (" (dry run)" if options['dry_run'] else "")
+        ))
@@ -0,0 +1,29 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from group_projects.models import GroupGoal, GroupProject, UserGroup
+
+
+class Command(BaseCommand):
+    help = "Cancella definitivamente i gruppi archiviati da più del periodo di conservazione"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.ARCHIVE_RETENTION_DAYS)
+        parser.add_argument('--batch', type=int, default=500)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - datetime.timedelta(days=options['days'])
+        expired = GroupProject.all_objects.filter(archived_at__lt=cutoff).order_by('pk').values_list('pk', flat=True)
+        purged = 0
+        # Un blocco di gruppi per transazione: prima i figli, poi i gruppi
+        while batch := list(expired[:options['batch']]):
+            with transaction.atomic():
+                GroupGoal.all_objects.filter(group_id__in=batch).delete()
+                UserGroup.all_objects.filter(group_id__in=batch).delete()
+                GroupProject.all_objects.filter(pk__in=batch).delete()
+            purged += len(batch)
+        self.stdout.write(self.style.SUCCESS(f"Eliminati {purged} gruppi archiviati prima del {cutoff:%Y-%m-%d}"))
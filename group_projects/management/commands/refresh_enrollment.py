@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from group_projects.enrollment import EnrollmentConflict, refresh_keys
+
+
+class Command(BaseCommand):
+    help = "Applica ENROLLMENT_POLICY alle iscrizioni esistenti (da eseguire a ogni cambio di policy)"
+
+    def handle(self, *args, **options):
+        try:
+            updated = refresh_keys()
+        except EnrollmentConflict as exc:
+            users = ", ".join(str(pk) for pk in exc.args[0])
+            raise CommandError(f"Utenti che violano la policy \"{settings.ENROLLMENT_POLICY}\": {users}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Policy \"{settings.ENROLLMENT_POLICY}\" applicata: {updated} iscrizioni vincolate"
+        ))
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:31
+
+import group_projects.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('group_projects', '0004_create_topics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='groupproject',
+            name='links_checked_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='groupproject',
+            name='links_status',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='groupproject',
+            name='link_django',
+            field=models.URLField(blank=True, default='https://example.com', validators=[group_projects.validators.validate_https_hostname]),
+        ),
+        migrations.AlterField(
+            model_name='groupproject',
+            name='link_gui',
+            field=models.URLField(blank=True, default='https://example.com', validators=[group_projects.validators.validate_https_hostname]),
+        ),
+        migrations.AlterField(
+            model_name='groupproject',
+            name='link_tui',
+            field=models.URLField(blank=True, default='https://example.com', validators=[group_projects.validators.validate_https_hostname]),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('group_projects', '0005_links_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='groupgoal',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
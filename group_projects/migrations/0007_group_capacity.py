@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:42
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_members(apps, _):
+    GroupProject = apps.get_model("group_projects", "GroupProject")
+    UserGroup = apps.get_model("group_projects", "UserGroup")
+    members = (
+        UserGroup.objects.filter(group=OuterRef("pk")).order_by()
+        .values("group").annotate(count=Count("id")).values("count")
+    )
+    GroupProject.objects.update(member_count=Coalesce(Subquery(members), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('group_projects', '0006_groupgoal_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='groupproject',
+            name='max_members',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='groupproject',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_members, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('group_projects', '0007_group_capacity'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usergroup',
+            name='enrollment_key',
+            field=models.CharField(blank=True, editable=False, max_length=32, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='usergroup',
+            constraint=models.UniqueConstraint(condition=models.Q(('enrollment_key__isnull', False)), fields=('user', 'enrollment_key'), name='usergroup_unique_enrollment'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:49
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('group_projects', '0008_enrollment_policy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='groupproject',
+            name='allocation',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='topic',
+            name='capacity',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='TopicPreference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(validators=[django.core.validators.MinValueValidator(1)])),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='topic_preferences', to='group_projects.groupproject')),
+                ('topic', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='preferences', to='group_projects.topic')),
+            ],
+            options={
+                'ordering': ['group', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('group', 'topic'), name='topicpreference_unique_topic'), models.UniqueConstraint(fields=('group', 'rank'), name='topicpreference_unique_rank')],
+            },
+        ),
+    ]
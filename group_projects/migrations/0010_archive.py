@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('group_projects', '0009_topic_allocation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='usergroup',
+            name='usergroup_unique_enrollment',
+        ),
+        migrations.AddField(
+            model_name='groupgoal',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='groupproject',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='usergroup',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='groupgoal',
+            index=models.Index(condition=models.Q(('archived_at__isnull', True)), fields=['group', 'goal'], name='groupgoal_live_group'),
+        ),
+        migrations.AddIndex(
+            model_name='groupproject',
+            index=models.Index(condition=models.Q(('archived_at__isnull', True)), fields=['topic'], name='groupproject_live_topic'),
+        ),
+        migrations.AddIndex(
+            model_name='groupproject',
+            index=models.Index(condition=models.Q(('archived_at__isnull', True), _negated=True), fields=['archived_at'], name='groupproject_archived'),
+        ),
+        migrations.AddIndex(
+            model_name='usergroup',
+            index=models.Index(condition=models.Q(('archived_at__isnull', True)), fields=['user'], name='usergroup_live_user'),
+        ),
+        migrations.AddIndex(
+            model_name='usergroup',
+            index=models.Index(condition=models.Q(('archived_at__isnull', True)), fields=['group'], name='usergroup_live_group'),
+        ),
+        migrations.AddConstraint(
+            model_name='usergroup',
+            constraint=models.UniqueConstraint(condition=models.Q(('enrollment_key__isnull', False), ('archived_at__isnull', True)), fields=('user', 'enrollment_key'), name='usergroup_unique_enrollment'),
+        ),
+    ]
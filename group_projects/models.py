@@ -1,4 +1,7 @@
-from django.db import models
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from core import sync
 from .validators import validate_https_hostname
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models
@@ -6,6 +9,75 @@ from users.models import User
 
 class Topic(models.Model):
     title = models.CharField(max_length=100)
+    # Numero massimo di gruppi assegnabili dall'allocazione (None = illimitato)
+    capacity = models.PositiveIntegerField(null=True, blank=True)
+
+def enrollment_key(group):
+    """
+    Ambito in cui un utente può avere una sola iscrizione:
+    - "open": nessun vincolo
+    - "one_group": un solo gruppo in tutto
+    - "one_per_topic": un solo gruppo per topic
+    """
+    policy = settings.ENROLLMENT_POLICY
+    if policy == 'one_group':
+        return 'all'
+    if policy == 'one_per_topic':
+        return f'topic:{group.topic_id}'
+    return None
+
+
+ENROLLMENT_CONSTRAINT = 'usergroup_unique_enrollment'
+
+
+def is_enrollment_conflict(exc):
+    """
+    L'IntegrityError viene dal vincolo di ENROLLMENT_POLICY? PostgreSQL
+    riporta il nome del vincolo, SQLite le colonne coinvolte.
+    """
+    message = str(exc)
+    return ENROLLMENT_CONSTRAINT in message or 'usergroup.enrollment_key' in message
+
+
+class GroupFull(Exception):
+    """Il gruppo ha raggiunto max_members"""
+
+
+class VersionConflict(Exception):
+    """Il GroupGoal è stato modificato da altri dopo la lettura"""
+
+
+class GroupProjectQuerySet(models.QuerySet):
+    def reserve_seat(self, pk, count=1):
+        """
+        Occupa `count` posti nel gruppo con una sola UPDATE condizionata.
+        Ritorna False se il gruppo non ha abbastanza posti liberi.
+        """
+        has_room = models.Q(max_members__isnull=True) | models.Q(member_count__lte=models.F('max_members') - count)
+        if not self.filter(has_room, pk=pk).update(member_count=models.F('member_count') + count):
+            return False
+        # member_count è nel payload di /sync/: la UPDATE non emette segnali
+        sync.record_changes(self.model, [pk])
+        return True
+
+    def release_seat(self, pk, count=1):
+        if self.filter(pk=pk, member_count__gte=count).update(member_count=models.F('member_count') - count):
+            sync.record_changes(self.model, [pk])
+
+
+class LiveManager(models.Manager):
+    """
+    Manager di default dei modelli archiviabili: esclude le righe con
+    `archived_at`. `all_objects` le vede tutte (vedi archive).
+    """
+    def get_queryset(self):
+        return super().get_queryset().filter(archived_at__isnull=True)
+
+
+# Indice parziale sulle sole righe vive: le query di default non
+# attraversano mai i dati archiviati
+LIVE = models.Q(archived_at__isnull=True)
+
 
 class GroupProject(models.Model):
     name = models.CharField(max_length=100)
@@ -13,6 +85,61 @@ class GroupProject(models.Model):
     link_django = models.URLField(validators=[validate_https_hostname], default='https://example.com', blank=True)
     link_tui = models.URLField(validators=[validate_https_hostname], default='https://example.com', blank=True)
     link_gui = models.URLField(validators=[validate_https_hostname], default='https://example.com', blank=True)
+    objects = LiveManager.from_queryset(GroupProjectQuerySet)()
+    all_objects = GroupProjectQuerySet.as_manager()
+    # Capienza del gruppo (None = illimitata) e numero di membri, mantenuto
+    # con UPDATE ... F() insieme agli inserimenti in UserGroup
+    max_members = models.PositiveIntegerField(null=True, blank=True)
+    member_count = models.PositiveIntegerField(default=0, editable=False)
+    # Esito dell'ultimo controllo dei link (vedi linkcheck), per campo
+    links_status = models.JSONField(default=dict, blank=True, editable=False)
+    links_checked_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # Spiegazione dell'ultima allocazione dei topic (vedi allocation)
+    allocation = models.JSONField(default=dict, blank=True, editable=False)
+    archived_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['topic'], condition=LIVE, name='groupproject_live_topic'),
+            models.Index(fields=['archived_at'], condition=~LIVE, name='groupproject_archived'),
+        ]
+
+    def topic_conflicts(self, topic_id):
+        """Membri che, passando a `topic_id`, avrebbero due gruppi con lo stesso topic"""
+        if self._state.adding or settings.ENROLLMENT_POLICY != 'one_per_topic':
+            return []
+        return sorted(set(
+            UserGroup.objects.filter(user_id__in=self.users.values('user_id'), group__topic_id=topic_id)
+            .exclude(group=self).values_list('user_id', flat=True)
+        ))
+
+    def clean(self):
+        if self.topic_conflicts(self.topic_id):
+            raise ValidationError({'topic': "Alcuni membri sono già iscritti a un gruppo con questo topic"})
+
+    def save(self, *args, **kwargs):
+        """Con la policy "one_per_topic" l'ambito delle iscrizioni segue il topic"""
+        update_fields = kwargs.get('update_fields')
+        if self._state.adding or (update_fields is not None and 'topic' not in update_fields):
+            return super().save(*args, **kwargs)
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            key = enrollment_key(self)
+            self.users.exclude(enrollment_key=key).update(enrollment_key=key)
+
+
+class TopicPreference(models.Model):
+    """Topic desiderato da un gruppo, in ordine di preferenza (rank 1 = prima scelta)"""
+    group = models.ForeignKey(GroupProject, on_delete=models.CASCADE, related_name='topic_preferences')
+    topic = models.ForeignKey(Topic, on_delete=models.CASCADE, related_name='preferences')
+    rank = models.PositiveSmallIntegerField(validators=[MinValueValidator(1)])
+
+    class Meta:
+        ordering = ['group', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['group', 'topic'], name='topicpreference_unique_topic'),
+            models.UniqueConstraint(fields=['group', 'rank'], name='topicpreference_unique_rank'),
+        ]
 
 class Goal(models.Model):
     title = models.CharField(max_length=100)
@@ -23,7 +150,73 @@ class GroupGoal(models.Model):
     group = models.ForeignKey(GroupProject, on_delete=models.PROTECT, related_name='goals')
     goal = models.ForeignKey(Goal, on_delete=models.PROTECT, related_name='group_projects')
     complete = models.BooleanField(default=False)
+    # Incrementata a ogni modifica: serve a rilevare modifiche concorrenti
+    version = models.PositiveIntegerField(default=0, editable=False)
+    archived_at = models.DateTimeField(null=True, blank=True, editable=False)
+    objects = LiveManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['group', 'goal'], condition=LIVE, name='groupgoal_live_group'),
+        ]
+
+    def save(self, *args, **kwargs):
+        """
+        `version` è quella letta: la riga si aggiorna solo se nel frattempo
+        non è cambiata (UPDATE condizionata), altrimenti VersionConflict
+        """
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+        with transaction.atomic(using=kwargs.get('using')):
+            updated = GroupGoal.all_objects.filter(pk=self.pk, version=self.version).update(
+                version=models.F('version') + 1,
+            )
+            if not updated:
+                raise VersionConflict(self.pk)
+            self.version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+            super().save(*args, **kwargs)
 
 class UserGroup(models.Model):
     group = models.ForeignKey(GroupProject, on_delete=models.PROTECT, related_name='users')
-    user = models.ForeignKey(User, on_delete=models.PROTECT, related_name='group_projects')
\ No newline at end of file
+    user = models.ForeignKey(User, on_delete=models.PROTECT, related_name='group_projects')
+    # Ambito di iscrizione secondo ENROLLMENT_POLICY (vedi enrollment_key):
+    # l'indice parziale ammette una sola iscrizione per utente e ambito
+    enrollment_key = models.CharField(max_length=32, null=True, blank=True, editable=False)
+    archived_at = models.DateTimeField(null=True, blank=True, editable=False)
+    objects = LiveManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        constraints = [
+            # Le iscrizioni archiviate non contano
+            models.UniqueConstraint(
+                fields=['user', 'enrollment_key'],
+                condition=models.Q(enrollment_key__isnull=False) & LIVE,
+                name='usergroup_unique_enrollment',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user'], condition=LIVE, name='usergroup_live_user'),
+            models.Index(fields=['group'], condition=LIVE, name='usergroup_live_group'),
+        ]
+
+    def save(self, *args, **kwargs):
+        """
+        Inserimento e posto nel gruppo vanno insieme: se il gruppo è al
+        completo la transazione viene annullata e si solleva GroupFull.
+        Il posto viene liberato dal segnale post_delete.
+        """
+        with transaction.atomic(using=kwargs.get('using')):
+            previous = None
+            if not self._state.adding:
+                previous = UserGroup.objects.filter(pk=self.pk).values_list('group_id', flat=True).first()
+            if previous != self.group_id:
+                if not GroupProject.objects.reserve_seat(self.group_id):
+                    raise GroupFull(self.group_id)
+                if previous is not None:
+                    GroupProject.objects.release_seat(previous)
+            self.enrollment_key = enrollment_key(self.group)
+            super().save(*args, **kwargs)
\ No newline at end of file
@@ -1,33 +1,64 @@
-from rest_framework.serializers import ModelSerializer
+from rest_framework import serializers
+from core.serializers import FastReadModelSerializer
 from .models import GroupProject, Topic, Goal, GroupGoal, UserGroup
 
-class TopicSerializer(ModelSerializer):
+class TopicSerializer(FastReadModelSerializer):
     class Meta:
         model = Topic
         fields = '__all__'
         read_only_fields = ['id']
 
-class GoalSerializer(ModelSerializer):
+class GoalSerializer(FastReadModelSerializer):
     class Meta:
         model = Goal
         fields = '__all__'
         read_only_fields = ['id']
 
-class GroupGoalsSerializer(ModelSerializer):
+class GroupGoalsSerializer(FastReadModelSerializer):
+    # In scrittura è la versione letta: senza, si sovrascriverebbero le modifiche altrui
+    version = serializers.IntegerField(min_value=0, required=False)
+
     class Meta:
         model = GroupGoal
         fields = '__all__'
         read_only_fields = ['id']
 
-class GroupProjectSerializer(ModelSerializer):
+    def validate(self, attrs):
+        if self.instance is None:
+            attrs.pop('version', None)
+        elif 'version' not in attrs:
+            raise serializers.ValidationError({'version': "Indica la versione del goal che stai modificando"})
+        return attrs
+
+class GroupProjectSerializer(FastReadModelSerializer):
     class Meta:
         model = GroupProject
-        fields = ['id', 'name', 'link_django', 'link_tui', 'link_gui', 'topic']
-        read_only_fields = ['id']
+        fields = ['id', 'name', 'link_django', 'link_tui', 'link_gui', 'topic', 'max_members', 'member_count']
+        read_only_fields = ['id', 'member_count']
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # La capienza la decide solo lo staff, non i membri del gruppo
+        request = self.context.get('request')
+        if 'max_members' in fields and not (request and request.user.is_staff):
+            fields['max_members'].read_only = True
+        return fields
 
-class UserGroupSerializer(ModelSerializer):
+    def validate_topic(self, value):
+        if self.instance is not None and self.instance.topic_conflicts(value.pk):
+            raise serializers.ValidationError("Alcuni membri sono già iscritti a un gruppo con questo topic")
+        return value
+
+    def validate_max_members(self, value):
+        if value is not None and self.instance is not None and value < self.instance.member_count:
+            raise serializers.ValidationError(
+                f"Il gruppo ha già {self.instance.member_count} membri"
+            )
+        return value
+
+class UserGroupSerializer(FastReadModelSerializer):
     class Meta:
         model = UserGroup
-        fields = '__all__'
+        exclude = ['enrollment_key']
         read_only_fields = ['id']
 
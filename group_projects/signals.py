@@ -0,0 +1,79 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core import events, sync
+from core.cache import invalidate_catalog
+from users import dashboard
+from . import stats
+from .models import Goal, GroupGoal, GroupProject, Topic, UserGroup
+from .serializers import (
+    GoalSerializer, GroupGoalsSerializer, GroupProjectSerializer, TopicSerializer, UserGroupSerializer,
+)
+
+
+@receiver([post_save, post_delete], sender=Topic)
+@receiver([post_save, post_delete], sender=Goal)
+def invalidate_catalog_cache(sender, **kwargs):
+    """Topic e goal sono serviti da cache: ogni modifica la invalida"""
+    invalidate_catalog(sender)
+
+
+@receiver(post_delete, sender=UserGroup)
+def release_seat(sender, instance, **kwargs):
+    """Libera il posto anche per le cancellazioni da queryset"""
+    GroupProject.objects.release_seat(instance.group_id)
+
+
+@receiver([post_save, post_delete], sender=UserGroup)
+def invalidate_dashboard(sender, instance, **kwargs):
+    """Chi entra o esce da un gruppo vede subito la propria dashboard aggiornata"""
+    transaction.on_commit(lambda: dashboard.invalidate(instance.user_id))
+
+
+@receiver([post_save, post_delete], sender=GroupGoal)
+@receiver([post_save, post_delete], sender=Goal)
+@receiver([post_save, post_delete], sender=GroupProject)
+@receiver([post_save, post_delete], sender=Topic)
+def invalidate_stats(sender, **kwargs):
+    """Le statistiche sono in cache: ogni modifica a goal, gruppi e topic le invalida"""
+    transaction.on_commit(stats.bump_version)
+
+
+def _group_id(instance):
+    return instance.pk if isinstance(instance, GroupProject) else instance.group_id
+
+
+@receiver(post_save, sender=GroupProject)
+@receiver(post_save, sender=GroupGoal)
+@receiver(post_save, sender=UserGroup)
+def publish_group_change(sender, instance, created=False, **kwargs):
+    """Pubblica sul change feed ogni modifica a gruppi, membri e goal"""
+    action = 'created' if created else 'updated'
+    _publish_on_commit(f"{sender._meta.model_name}.{action}", instance)
+
+
+@receiver(post_delete, sender=GroupProject)
+@receiver(post_delete, sender=GroupGoal)
+@receiver(post_delete, sender=UserGroup)
+def publish_group_delete(sender, instance, **kwargs):
+    _publish_on_commit(f"{sender._meta.model_name}.deleted", instance)
+
+
+def _publish_on_commit(type, instance):
+    data = {'id': instance.pk}
+    if isinstance(instance, GroupGoal):
+        data.update(goal=instance.goal_id, complete=instance.complete)
+    elif isinstance(instance, UserGroup):
+        data.update(user=instance.user_id)
+    group = _group_id(instance)
+    # Gli eventi escono solo a transazione confermata
+    transaction.on_commit(lambda: events.publish(type, data, group))
+
+
+# Modelli serviti dalla sincronizzazione incrementale (`/sync/`)
+sync.register(Topic, TopicSerializer)
+sync.register(Goal, GoalSerializer)
+sync.register(GroupProject, GroupProjectSerializer)
+sync.register(GroupGoal, GroupGoalsSerializer)
+sync.register(UserGroup, UserGroupSerializer)
@@ -0,0 +1,135 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+
+from .models import GroupGoal, GroupProject, Topic
+
+VERSION_KEY = 'stats:version'
+
+
+def current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def cached(name, build):
+    """Statistiche in cache, invalidate in blocco cambiando versione"""
+    key = f'stats:{current_version()}:{name}'
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, settings.STATS_CACHE_TIMEOUT)
+    return data
+
+
+def percentiles(values, qs):
+    """Percentili con interpolazione lineare, come `numpy.percentile`"""
+    if not values:
+        return {q: None for q in qs}
+    ordered = sorted(values)
+    result = {}
+    for q in qs:
+        position = (len(ordered) - 1) * q / 100
+        low = int(position)
+        high = min(low + 1, len(ordered) - 1)
+        result[q] = float(ordered[low] + (ordered[high] - ordered[low]) * (position - low))
+    return result
+
+
+def histogram(values, bins):
+    """Istogramma a intervalli uguali su [min, max], come `numpy.histogram`"""
+    if not values:
+        return {'counts': [], 'edges': []}
+    low, high = min(values), max(values)
+    if low == high:
+        low, high = low - 0.5, high + 0.5
+    width = (high - low) / bins
+    counts = [0] * bins
+    for value in values:
+        # L'ultimo intervallo include l'estremo superiore
+        counts[min(int((value - low) / width), bins - 1)] += 1
+    return {'counts': counts, 'edges': [low + width * i for i in range(bins + 1)]}
+
+
+def mean(values):
+    return sum(values) / len(values) if values else None
+
+
+def goal_stats():
+    """Tasso di completamento per goal: una GROUP BY su GroupGoal ⨝ Goal"""
+    rows = (
+        GroupGoal.objects.values('goal_id', 'goal__title', 'goal__points')
+        .annotate(groups=Count('id'), completed=Count('id', filter=Q(complete=True)))
+        .order_by('goal_id')
+    )
+    return [
+        {
+            'id': row['goal_id'],
+            'title': row['goal__title'],
+            'points': row['goal__points'],
+            'groups': row['groups'],
+            'completed': row['completed'],
+            'rate': row['completed'] / row['groups'],
+        }
+        for row in rows
+    ]
+
+
+def group_rows():
+    """
+    Punti e goal completati per gruppo: una GROUP BY su GroupProject ⟕ GroupGoal ⨝ Goal.
+    I gruppi senza goal contano con 0 punti.
+    """
+    return list(
+        GroupProject.objects.values('id', 'topic_id')
+        .annotate(
+            goal_count=Count('goals'),
+            completed=Count('goals', filter=Q(goals__complete=True)),
+            points=Sum('goals__goal__points', filter=Q(goals__complete=True), default=0),
+            points_total=Sum('goals__goal__points', default=0),
+        )
+        .order_by('id')
+    )
+
+
+def topic_stats():
+    titles = dict(Topic.objects.values_list('id', 'title'))
+    by_topic = {}
+    for row in group_rows():
+        by_topic.setdefault(row['topic_id'], []).append(row)
+    return [
+        {
+            'id': topic_id,
+            'title': titles.get(topic_id),
+            'groups': len(rows),
+            'avg_points': mean([row['points'] for row in rows]),
+            'avg_rate': mean([row['completed'] / row['goal_count'] if row['goal_count'] else 0 for row in rows]),
+        }
+        for topic_id, rows in sorted(by_topic.items())
+    ]
+
+
+def points_stats(bins=10):
+    points = [row['points'] for row in group_rows()]
+    return {
+        'groups': len(points),
+        'mean': mean(points),
+        'percentiles': {f'p{q}': value for q, value in percentiles(points, [25, 50, 75, 90]).items()},
+        'histogram': histogram(points, bins),
+    }
+
+
+SECTIONS = {
+    'goals': goal_stats,
+    'topics': topic_stats,
+    'points': points_stats,
+}
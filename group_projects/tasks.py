@@ -0,0 +1,8 @@
+from core.tasks import task
+from .linkcheck import check_links
+
+
+@task(max_attempts=1)
+def check_group_links(group_ids=None, force=False):
+    """Controllo dei link in background, da accodare con `.defer()`"""
+    return check_links(group_ids, force=force)
@@ -0,0 +1,331 @@
+import random
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count
+
+from core import sync
+from users import dashboard
+from users.models import User
+from . import stats
+from .models import GroupProject, Topic, UserGroup, enrollment_key, is_enrollment_conflict
+
+# Peso di un compagno desiderato rispetto a un membro a cui piace il topic del gruppo
+MATE_WEIGHT = 2
+
+
+class TeamFormationError(Exception):
+    """I gruppi non possono essere creati"""
+
+
+class Partition:
+    """
+    Suddivisione degli studenti in squadre di dimensione fissata.
+    Il punteggio conta i compagni desiderati finiti nella stessa squadra
+    (MATE_WEIGHT ciascuno) e, per squadra, i membri a cui piace il topic
+    più votato al suo interno.
+    """
+
+    def __init__(self, students, size, wishes=None, likes=None):
+        self.students = list(students)
+        known = set(self.students)
+        wishes, likes = wishes or {}, likes or {}
+        self.wishes = {s: {m for m in wishes.get(s, ()) if m in known and m != s} for s in self.students}
+        self.wanted_by = {s: set() for s in self.students}
+        for student, mates in self.wishes.items():
+            for mate in mates:
+                self.wanted_by[mate].add(student)
+        self.likes = {s: frozenset(likes.get(s, ())) for s in self.students}
+
+        count = -(-len(self.students) // size) if self.students else 0
+        base, extra = divmod(len(self.students), count) if count else (0, 0)
+        # Squadre il più possibile uguali: al massimo un membro di differenza
+        self.capacity = [base + 1] * extra + [base] * (count - extra)
+        self.members = [set() for _ in range(count)]
+        self.votes = [Counter() for _ in range(count)]
+        # Per squadra: voti del topic più votato e quanti topic li raggiungono
+        self.top = [0] * count
+        self.ties = [0] * count
+        self.team_of = {}
+
+    def add(self, student, team):
+        self.members[team].add(student)
+        self.votes[team].update(self.likes[student])
+        self.team_of[student] = team
+        self._refresh(team)
+
+    def remove(self, student):
+        team = self.team_of.pop(student)
+        self.members[team].discard(student)
+        self.votes[team].subtract(self.likes[student])
+        self._refresh(team)
+        return team
+
+    def _refresh(self, team):
+        counts = [n for n in self.votes[team].values() if n > 0]
+        self.top[team] = max(counts, default=0)
+        self.ties[team] = counts.count(self.top[team])
+
+    def greedy(self):
+        """
+        Unisce chi si è scelto in blocchi (al più grandi quanto la squadra
+        più piccola), li ordina per topic preferito e riempie le squadre in
+        sequenza: chi vuole lo stesso topic finisce vicino.
+        """
+        parent = {s: s for s in self.students}
+        block_size = dict.fromkeys(self.students, 1)
+        limit = min(self.capacity, default=0)
+
+        def find(s):
+            while parent[s] != s:
+                parent[s] = parent[parent[s]]
+                s = parent[s]
+            return s
+
+        # Prima le scelte reciproche, poi le altre
+        pairs = [(a, b) for a in self.students for b in self.wishes[a]]
+        pairs.sort(key=lambda pair: pair[0] not in self.wishes[pair[1]])
+        for a, b in pairs:
+            ra, rb = find(a), find(b)
+            if ra != rb and block_size[ra] + block_size[rb] <= limit:
+                parent[rb] = ra
+                block_size[ra] += block_size[rb]
+
+        blocks = {}
+        for student in self.students:
+            blocks.setdefault(find(student), []).append(student)
+
+        def key(block):
+            votes = Counter(topic for s in block for topic in self.likes[s])
+            favourite = min(votes, key=lambda t: (-votes[t], t)) if votes else None
+            return (favourite is None, favourite or 0, -len(block))
+
+        current = 0
+        for block in sorted(blocks.values(), key=key):
+            room = self.capacity[current] - len(self.members[current])
+            if len(block) > room:
+                # Il blocco va nella prima squadra con posto sufficiente,
+                # o viene diviso se i posti sono frammentati
+                fitting = [
+                    t for t in range(current, len(self.members))
+                    if self.capacity[t] - len(self.members[t]) >= len(block)
+                ]
+                if fitting:
+                    for student in block:
+                        self.add(student, fitting[0])
+                    continue
+            for student in block:
+                while len(self.members[current]) >= self.capacity[current]:
+                    current += 1
+                self.add(student, current)
+        return self
+
+    def topic_score(self, team, remove=frozenset(), add=frozenset()):
+        """
+        Voti del topic più votato in `team`, togliendo e aggiungendo un
+        membro: cambiano solo i topic in `remove` ^ `add`
+        """
+        top, changed = self.top[team], remove ^ add
+        if not changed:
+            return top
+        votes = self.votes[team]
+        best = max(votes[t] + (1 if t in add else -1) for t in changed)
+        lost = sum(1 for t in changed if t in remove and votes[t] == top)
+        # Se tutti i topic in testa perdono un voto, la testa scende di uno
+        return max(best, top if lost < self.ties[team] else top - 1)
+
+    def mates(self, student, team, without=None):
+        """Scelte (in entrambe le direzioni) tra `student` e i membri di `team`"""
+        members = self.members[team]
+        return sum(
+            1 for other in (*self.wishes[student], *self.wanted_by[student])
+            if other in members and other != without
+        )
+
+    def swap_gain(self, x, y):
+        a, b = self.team_of[x], self.team_of[y]
+        mates = (
+            self.mates(x, b, without=y) + self.mates(y, a, without=x)
+            - self.mates(x, a) - self.mates(y, b)
+        )
+        lx, ly = self.likes[x], self.likes[y]
+        topics = (
+            self.topic_score(a, lx, ly) + self.topic_score(b, ly, lx)
+            - self.top[a] - self.top[b]
+        )
+        return MATE_WEIGHT * mates + topics
+
+    def satisfied(self, student):
+        team = self.team_of[student]
+        if not self.wishes[student] <= self.members[team]:
+            return False
+        votes = self.votes[team]
+        return not self.likes[student] or any(votes[t] == self.top[team] for t in self.likes[student])
+
+    def improve(self, time_limit=None, seed=0):
+        """
+        Ricerca locale: per ogni studente non soddisfatto prova a scambiarlo
+        con un membro delle squadre dei compagni desiderati (o di qualche
+        squadra a caso, per il topic) e applica lo scambio migliore, finché
+        c'è miglioramento o scade il tempo. Gli scambi non cambiano le
+        dimensioni delle squadre.
+        """
+        rng = random.Random(seed)
+        deadline = time.monotonic() + time_limit if time_limit is not None else None
+        candidates = [s for s in self.students if self.wishes[s] or self.wanted_by[s] or self.likes[s]]
+        teams = range(len(self.members))
+        improved = True
+        while improved and len(self.members) > 1:
+            improved = False
+            rng.shuffle(candidates)
+            for x in candidates:
+                if deadline is not None and time.monotonic() > deadline:
+                    return self
+                if self.satisfied(x):
+                    continue
+                a = self.team_of[x]
+                targets = {self.team_of[m] for m in self.wishes[x] | self.wanted_by[x]}
+                if self.likes[x]:
+                    targets.update(rng.sample(teams, min(2, len(self.members))))
+                targets.discard(a)
+                best, partner = 0, None
+                for b in targets:
+                    for y in self.members[b]:
+                        gain = self.swap_gain(x, y)
+                        if gain > best:
+                            best, partner = gain, y
+                if partner is not None:
+                    b = self.remove(partner)
+                    self.add(partner, self.remove(x))
+                    self.add(x, b)
+                    improved = True
+        return self
+
+    def teams(self):
+        return [sorted(members) for members in self.members]
+
+    def topic_of(self, team):
+        """Topic più votato nella squadra, in ordine di preferenza"""
+        votes = self.votes[team]
+        return [t for t, n in sorted(votes.items(), key=lambda item: (-item[1], item[0])) if n > 0]
+
+    def summary(self):
+        wished = sum(len(mates) for mates in self.wishes.values())
+        together = sum(
+            1 for student, mates in self.wishes.items() for mate in mates
+            if self.team_of[mate] == self.team_of[student]
+        )
+        return {
+            'teams': len(self.members),
+            'students': len(self.students),
+            'wishes': wished,
+            'wishes_satisfied': together,
+            'topic_matches': sum(self.top),
+        }
+
+
+def unassigned_students():
+    """Studenti attivi senza alcuna iscrizione (quelle archiviate non contano)"""
+    return (
+        User.objects.filter(is_active=True, is_staff=False)
+        .exclude(pk__in=UserGroup.objects.values('user_id'))
+        .order_by('pk')
+    )
+
+
+def form_teams(size, wishes=None, likes=None, prefix='Team', dry_run=False, actor=None, time_limit=None):
+    """
+    Divide gli studenti senza gruppo in nuovi GroupProject da `size` membri
+    (al più uno in meno), tenendo conto dei compagni (`wishes`) e dei topic
+    (`likes`) preferiti. Gruppi e iscrizioni sono creati con due bulk_create.
+    Ritorna (gruppi come dizionari, riepilogo del punteggio).
+    """
+    if size < 1:
+        raise TeamFormationError("La dimensione delle squadre deve essere positiva")
+    if time_limit is None:
+        time_limit = settings.TEAM_SEARCH_SECONDS
+    students = list(unassigned_students().values_list('pk', flat=True))
+    partition = Partition(students, size, wishes, likes).greedy().improve(time_limit)
+    teams = [(topic, members) for topic, members in zip(choose_topics(partition), partition.teams())]
+    start = next_team_number(prefix)
+    max_length = GroupProject._meta.get_field('name').max_length
+    if teams and len(f"{prefix} {start + len(teams) - 1}") > max_length:
+        raise TeamFormationError(f"Il prefisso è troppo lungo: i nomi hanno al più {max_length} caratteri")
+    groups = [
+        GroupProject(name=f"{prefix} {start + i}", topic_id=topic, member_count=len(members))
+        for i, (topic, members) in enumerate(teams)
+    ]
+    if not dry_run and groups:
+        with transaction.atomic():
+            # Chi nel frattempo si è iscritto da solo resta fuori
+            taken = set(UserGroup.objects.filter(user_id__in=students).values_list('user_id', flat=True))
+            kept = []
+            for group, (topic, members) in zip(groups, teams):
+                members = [s for s in members if s not in taken]
+                if members:
+                    group.member_count = len(members)
+                    kept.append((group, (topic, members)))
+            groups = [group for group, _ in kept]
+            teams = [team for _, team in kept]
+            GroupProject.objects.bulk_create(groups)
+            try:
+                # Una join concorrente può ancora violare ENROLLMENT_POLICY
+                with transaction.atomic():
+                    memberships = UserGroup.objects.bulk_create([
+                        UserGroup(group=group, user_id=student, enrollment_key=enrollment_key(group))
+                        for group, (_, members) in zip(groups, teams) for student in members
+                    ], batch_size=500)
+            except IntegrityError as exc:
+                if not is_enrollment_conflict(exc):
+                    raise
+                raise TeamFormationError("Alcuni studenti si sono iscritti nel frattempo: riprova")
+            notify_created(groups, memberships, actor)
+    result = [
+        {'id': group.pk, 'name': group.name, 'topic': topic, 'members': members}
+        for group, (topic, members) in zip(groups, teams)
+    ]
+    return result, partition.summary()
+
+
+def next_team_number(prefix):
+    """Primo numero libero per i nomi "<prefix> N", contando anche i gruppi archiviati"""
+    names = GroupProject.all_objects.filter(name__startswith=f"{prefix} ").values_list('name', flat=True)
+    numbers = [int(suffix) for suffix in (name[len(prefix) + 1:] for name in names) if suffix.isdigit()]
+    return max(numbers, default=0) + 1
+
+
+def choose_topics(partition):
+    """
+    Per ogni squadra il topic più votato che ha ancora posto (Topic.capacity),
+    altrimenti quello con più posti liberi
+    """
+    capacity = dict(Topic.objects.values_list('pk', 'capacity'))
+    if not capacity:
+        raise TeamFormationError("Non ci sono topic a cui assegnare i gruppi")
+    used = Counter(dict(GroupProject.objects.values_list('topic_id').annotate(n=Count('id')).order_by()))
+
+    def room(topic):
+        return float('inf') if capacity[topic] is None else capacity[topic] - used[topic]
+
+    chosen = []
+    for team in range(len(partition.members)):
+        preferred = [t for t in partition.topic_of(team) if t in capacity and room(t) > 0]
+        topic = preferred[0] if preferred else max(capacity, key=lambda t: (room(t), -used[t], -t))
+        used[topic] += 1
+        chosen.append(topic)
+    return chosen
+
+
+def notify_created(groups, memberships, actor):
+    sync.record_bulk('create', GroupProject, [(group.pk, group.pk, {}) for group in groups], actor, events=[
+        ('groupproject.created', {'id': group.pk}, group.pk) for group in groups
+    ])
+    users = [membership.user_id for membership in memberships]
+    sync.record_bulk('create', UserGroup, [
+        (membership.pk, membership.group_id, {'user': membership.user_id}) for membership in memberships
+    ], actor, events=[
+        ('usergroup.created', {'id': membership.pk, 'user': membership.user_id}, membership.group_id)
+        for membership in memberships
+    ], after=[lambda: dashboard.invalidate_many(users), stats.bump_version])
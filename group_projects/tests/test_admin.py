@@ -0,0 +1,69 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from core.admin import EstimatedCountPaginator
+from group_projects.models import Goal, GroupGoal, GroupProject, Topic
+
+
+def create_groups(count):
+    topic = Topic.objects.create(title="Mock Topic")
+    goals = list(Goal.objects.all()[:3])
+    groups = GroupProject.objects.bulk_create([GroupProject(name=f"Group {i}", topic=topic) for i in range(count)])
+    GroupGoal.objects.bulk_create([GroupGoal(group=group, goal=goal) for group in groups for goal in goals])
+    return groups
+
+
+def changelist_queries(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        assert client.get(url).status_code == 200
+    return len(queries)
+
+
+@pytest.mark.django_db
+def test_changelists_run_bounded_queries(admin_client):
+    create_groups(5)
+    urls = ("/admin/group_projects/groupgoal/", "/admin/group_projects/groupproject/")
+    for url in urls:
+        admin_client.get(url)
+    small = [changelist_queries(admin_client, url) for url in urls]
+    create_groups(40)
+    large = [changelist_queries(admin_client, url) for url in urls]
+    assert large == small
+
+
+@pytest.mark.django_db
+def test_input_filter_narrows_changelist(admin_client):
+    create_groups(3)
+    res = admin_client.get("/admin/group_projects/groupgoal/", {"group_name": "Group 1"})
+    assert res.status_code == 200
+    assert res.context["cl"].result_count == 3
+    assert 'name="group_name"' in res.content.decode()
+
+
+@pytest.mark.django_db
+def test_group_goal_inline_is_paginated(admin_client):
+    group = create_groups(1)[0]
+    goals = Goal.objects.bulk_create([Goal(title=f"Extra {i}", description="d", points=1) for i in range(30)])
+    GroupGoal.objects.bulk_create([GroupGoal(group=group, goal=goal) for goal in goals])
+
+    res = admin_client.get(f"/admin/group_projects/groupproject/{group.id}/change/")
+    formset = res.context["inline_admin_formsets"][0].formset
+    assert len(formset.forms) == 25
+    assert formset.paginator.count == 33
+
+    res = admin_client.get(f"/admin/group_projects/groupproject/{group.id}/change/", {"groupgoal-page": 2})
+    assert len(res.context["inline_admin_formsets"][0].formset.forms) == 8
+
+
+@pytest.mark.django_db
+def test_estimated_paginator_skips_count_on_unfiltered_tables(settings):
+    groups = create_groups(5)
+    # Con un buco negli id stima e conteggio esatto differiscono
+    GroupGoal.objects.filter(group=groups[0]).delete()
+    groups[0].delete()
+    settings.ADMIN_ESTIMATE_THRESHOLD = 1
+    last_id = GroupProject.objects.order_by("-id").values_list("id", flat=True).first()
+    assert GroupProject.objects.count() == 4
+    assert EstimatedCountPaginator(GroupProject.objects.order_by("id"), 10).count == last_id
+    assert EstimatedCountPaginator(GroupGoal.objects.order_by("id"), 10).count == GroupGoal.all_objects.count() + 3
+    assert EstimatedCountPaginator(GroupProject.objects.filter(name="Group 1").order_by("id"), 10).count == 1
@@ -0,0 +1,145 @@
+import itertools
+import random
+
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIRequestFactory
+from core.models import AuditEvent, ChangeLogEntry
+from group_projects.allocation import AllocationError, allocate, solve
+from group_projects.models import GroupProject, Topic, TopicPreference, UserGroup
+from group_projects.views import GroupProjectViewSet
+from users.models import User
+
+
+def brute_force(preferences, capacity):
+    """(−gruppi assegnati, somma dei rank) dell'assegnazione migliore"""
+    best = None
+    groups = list(preferences)
+    for combo in itertools.product(*[[None] + preferences[group] for group in groups]):
+        used = {}
+        for topic in [topic for topic in combo if topic is not None]:
+            used[topic] = used.get(topic, 0) + 1
+        if any(capacity[topic] is not None and n > capacity[topic] for topic, n in used.items()):
+            continue
+        key = (
+            -sum(topic is not None for topic in combo),
+            sum(preferences[group].index(topic) + 1 for group, topic in zip(groups, combo) if topic is not None),
+        )
+        best = key if best is None else min(best, key)
+    return best
+
+
+def test_solve_matches_brute_force():
+    rng = random.Random(7)
+    for _ in range(200):
+        topics = range(rng.randint(1, 4))
+        preferences = {group: rng.sample(topics, rng.randint(1, len(topics))) for group in range(rng.randint(1, 6))}
+        capacity = {topic: rng.choice([0, 1, 2, None]) for topic in topics}
+
+        assignment = solve(preferences, capacity)
+
+        for topic, limit in capacity.items():
+            assert limit is None or list(assignment.values()).count(topic) <= limit
+        result = (-len(assignment), sum(preferences[g].index(t) + 1 for g, t in assignment.items()))
+        assert result == brute_force(preferences, capacity)
+
+
+def test_solve_moves_earlier_groups_to_make_room():
+    # Il gruppo 1 vuole solo A: il gruppo 0 passa alla seconda scelta
+    assert solve({0: ["A", "B"], 1: ["A"]}, {"A": 1, "B": 1}) == {0: "B", 1: "A"}
+
+
+@pytest.fixture
+def topics():
+    return [Topic.objects.create(title=title, capacity=1) for title in ("A", "B", "C")]
+
+
+def group_with(name, topic, *preferences):
+    group = GroupProject.objects.create(name=name, topic=topic)
+    TopicPreference.objects.bulk_create(
+        TopicPreference(group=group, topic=preferred, rank=rank) for rank, preferred in enumerate(preferences, 1)
+    )
+    return group
+
+
+@pytest.mark.django_db
+def test_allocate_writes_topics_and_explanations(django_capture_on_commit_callbacks, topics, audit_buffer):
+    a, b, c = topics
+    # Senza preferenze: occupa comunque il posto di C
+    GroupProject.objects.create(name="Fixed", topic=c)
+    first = group_with("First", c, a, b)
+    second = group_with("Second", c, a)
+    third = group_with("Third", c, c, a)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        results = allocate()
+
+    assert results[second.id]["rank"] == 1
+    assert results[first.id]["rank"] == 2
+    assert results[first.id]["reason"] == "Scelta n. 2: al completo A"
+    assert results[third.id]["topic"] is None
+    assert dict(GroupProject.objects.values_list("name", "topic__title")) == {
+        "Fixed": "C", "First": "B", "Second": "A", "Third": "C",
+    }
+    first.refresh_from_db()
+    assert first.allocation == results[first.id]
+    assert ChangeLogEntry.objects.filter(model="group_projects.groupproject", object_id=first.id).exists()
+    audit_buffer.flush()
+    assert AuditEvent.objects.filter(action="allocate").count() == 2
+
+
+@pytest.mark.django_db
+def test_dry_run_writes_nothing(topics):
+    a, b, _ = topics
+    group = group_with("Group", b, a)
+    assert allocate(dry_run=True)[group.id]["topic"] == a.id
+    group.refresh_from_db()
+    assert group.topic == b
+    assert group.allocation == {}
+
+
+@pytest.mark.django_db
+def test_allocation_conflicting_with_enrollment_policy_is_rolled_back(settings, topics):
+    settings.ENROLLMENT_POLICY = "one_per_topic"
+    a, b, _ = topics
+    Topic.objects.filter(pk=a.pk).update(capacity=None)
+    user = User.objects.create_user(username="user", email="user@example.org", password="pass", matricola="100000")
+    UserGroup.objects.create(user=user, group=GroupProject.objects.create(name="Other", topic=a))
+    group = group_with("Group", b, a)
+    UserGroup.objects.create(user=user, group=group)
+
+    with pytest.raises(AllocationError):
+        allocate()
+    group.refresh_from_db()
+    assert group.topic == b
+
+
+@pytest.mark.django_db
+def test_members_set_preferences(topics):
+    a, b, _ = topics
+    member, outsider = (
+        User.objects.create_user(username=name, email=f"{name}@example.org", password="pass", matricola=matricola)
+        for name, matricola in (("member", "100001"), ("outsider", "100002"))
+    )
+    group = GroupProject.objects.create(name="Group", topic=a)
+    UserGroup.objects.create(user=member, group=group)
+
+    def put(user, topics):
+        req = APIRequestFactory().put(f"/api/v1/groups/{group.id}/preferences/", {"topics": topics}, format="json")
+        req.user = user
+        return GroupProjectViewSet.as_view({"put": "preferences"})(req, pk=group.id)
+
+    res = put(member, [b.id, a.id])
+    assert res.status_code == 200
+    assert res.data["topics"] == [b.id, a.id]
+    assert put(member, [b.id, b.id]).status_code == 400
+    assert put(outsider, [a.id]).status_code == 403
+    assert list(TopicPreference.objects.filter(group=group).values_list("topic_id", flat=True)) == [b.id, a.id]
+
+
+@pytest.mark.django_db
+def test_allocate_topics_command(capsys, topics):
+    a, b, _ = topics
+    group_with("Group", b, a)
+    call_command("allocate_topics")
+    assert "1/1 gruppi assegnati, 1 alla prima scelta" in capsys.readouterr().out
@@ -0,0 +1,91 @@
+import datetime
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+from core import sync
+from group_projects.models import Goal, GroupGoal, GroupProject, Topic, UserGroup
+from group_projects.views import GroupProjectViewSet, TopicViewSet
+from users.models import User
+
+
+@pytest.fixture
+def member():
+    return User.objects.create_user(username="member", email="member@example.org", password="pass", matricola="100000")
+
+
+@pytest.fixture
+def group(member):
+    group = GroupProject.objects.create(name="Group", topic=Topic.objects.create(title="Topic"))
+    UserGroup.objects.create(user=member, group=group)
+    GroupGoal.objects.create(group=group, goal=Goal.objects.create(title="Goal", description="-", points=1))
+    return group
+
+
+def destroy(user, viewset, pk):
+    req = APIRequestFactory().delete(f"/api/v1/x/{pk}/")
+    req.user = user
+    return viewset.as_view({"delete": "destroy"})(req, pk=pk)
+
+
+@pytest.mark.django_db
+def test_destroy_archives_group_with_members_and_goals(
+    settings, django_capture_on_commit_callbacks, admin_user, member, group,
+):
+    settings.SYNC_SETTLE_SECONDS = 0
+    with django_capture_on_commit_callbacks(execute=True):
+        res = destroy(admin_user, GroupProjectViewSet, group.id)
+
+    assert res.status_code == 204
+    assert not GroupProject.objects.exists()
+    assert not UserGroup.objects.exists()
+    assert not GroupGoal.objects.exists()
+    assert GroupProject.all_objects.get().archived_at is not None
+    assert UserGroup.all_objects.get().archived_at is not None
+    assert GroupGoal.all_objects.get().archived_at is not None
+    # Per i client di /sync/ il gruppo è cancellato
+    changes = sync.changes_since(0)["changes"]
+    assert group.id in changes["group_projects.groupproject"]["deleted"]
+
+
+@pytest.mark.django_db
+def test_archived_membership_does_not_block_new_enrollment(settings, member, group):
+    settings.ENROLLMENT_POLICY = "one_group"
+    GroupProject.objects.filter(pk=group.pk).update(archived_at=timezone.now())
+    UserGroup.objects.update(enrollment_key="all", archived_at=timezone.now())
+
+    other = GroupProject.objects.create(name="Other", topic=group.topic)
+    UserGroup.objects.create(user=member, group=other)
+    assert UserGroup.all_objects.filter(user=member).count() == 2
+
+
+@pytest.mark.django_db
+def test_topic_in_use_cannot_be_destroyed(admin_user, group):
+    res = destroy(admin_user, TopicViewSet, group.topic_id)
+    assert res.status_code == 400
+    assert Topic.objects.filter(pk=group.topic_id).exists()
+
+
+@pytest.mark.django_db
+def test_live_queries_use_partial_indexes(group):
+    with connection.cursor() as cursor:
+        indexes = connection.introspection.get_constraints(cursor, UserGroup._meta.db_table)
+    assert "usergroup_live_user" in indexes
+    assert "usergroup_live_group" in indexes
+
+
+@pytest.mark.django_db
+def test_purge_archive_deletes_old_archives_in_batches(capsys, admin_user, group):
+    recent = GroupProject.objects.create(name="Recent", topic=group.topic)
+    destroy(admin_user, GroupProjectViewSet, group.id)
+    destroy(admin_user, GroupProjectViewSet, recent.id)
+    GroupProject.all_objects.filter(pk=group.pk).update(archived_at=timezone.now() - datetime.timedelta(days=100))
+
+    call_command("purge_archive", "--days", "90", "--batch", "1")
+
+    assert "Eliminati 1 gruppi" in capsys.readouterr().out
+    assert list(GroupProject.all_objects.values_list("name", flat=True)) == ["Recent"]
+    assert not UserGroup.all_objects.exists()
+    assert not GroupGoal.all_objects.exists()
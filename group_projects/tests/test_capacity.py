@@ -0,0 +1,128 @@
+import pytest
+from core import sync
+from core.models import ChangeLogEntry
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from group_projects.models import GroupFull, GroupProject, Topic, UserGroup
+from group_projects.views import GroupProjectViewSet, UserGroupViewset
+from users.models import User
+
+
+@pytest.fixture
+def users():
+    return [
+        User.objects.create_user(username=f"user{i}", email=f"user{i}@example.org", password="pass", matricola=f"10000{i}")
+        for i in range(3)
+    ]
+
+
+@pytest.fixture
+def group():
+    return GroupProject.objects.create(name="Group", topic=Topic.objects.create(title="Mock Topic"), max_members=2)
+
+
+def join(user, group):
+    req = APIRequestFactory().post(f"/api/v1/groups/{group.id}/join/")
+    req.user = user
+    return GroupProjectViewSet.as_view({"post": "join"})(req, pk=group.id)
+
+
+@pytest.mark.django_db
+def test_join_rejects_full_group(users, group):
+    assert join(users[0], group).status_code == 200
+    res = join(users[1], group)
+    assert res.status_code == 200
+    assert res.data["group"]["member_count"] == 2
+
+    res = join(users[2], group)
+    assert res.status_code == 400
+    assert res.data["error"] == "Il gruppo è al completo"
+    group.refresh_from_db()
+    assert group.member_count == 2
+    assert UserGroup.objects.filter(group=group).count() == 2
+
+
+@pytest.mark.django_db
+def test_member_count_follows_inserts_moves_and_deletes(users, group):
+    other = GroupProject.objects.create(name="Other", topic=group.topic)
+    membership = UserGroup.objects.create(user=users[0], group=group)
+    UserGroup.objects.create(user=users[1], group=group)
+
+    membership.group = other
+    membership.save()
+    UserGroup.objects.filter(group=group).delete()
+
+    assert dict(GroupProject.objects.values_list("name", "member_count")) == {"Group": 0, "Other": 1}
+
+
+@pytest.mark.django_db
+def test_full_group_rolls_back_insert(users, group):
+    group.max_members = 0
+    group.save()
+    with pytest.raises(GroupFull):
+        UserGroup.objects.create(user=users[0], group=group)
+    assert not UserGroup.objects.exists()
+
+
+@pytest.mark.django_db
+def test_admin_create_on_full_group_is_a_validation_error(admin_user, users, group):
+    for user in users[:2]:
+        UserGroup.objects.create(user=user, group=group)
+    req = APIRequestFactory().post("/api/v1/group-users/", {"user": users[2].id, "group": group.id}, format="json")
+    req.user = admin_user
+    res = UserGroupViewset.as_view({"post": "create"})(req)
+    assert res.status_code == 400
+    assert "group" in res.data
+
+
+@pytest.mark.django_db
+def test_member_count_listed_without_extra_queries(users, group):
+    UserGroup.objects.create(user=users[0], group=group)
+    req = APIRequestFactory().get("/api/v1/groups/")
+    req.user = users[0]
+    with CaptureQueriesContext(connection) as queries:
+        res = GroupProjectViewSet.as_view({"get": "list"})(req)
+    assert len(queries) == 1
+    assert res.data[0]["member_count"] == 1
+    assert res.data[0]["max_members"] == 2
+
+
+def patch(user, group, data):
+    req = APIRequestFactory().patch(f"/api/v1/groups/{group.id}/", data, format="json")
+    req.user = user
+    return GroupProjectViewSet.as_view({"patch": "partial_update"})(req, pk=group.id)
+
+
+@pytest.mark.django_db
+def test_only_staff_can_change_max_members(admin_user, users, group):
+    UserGroup.objects.create(user=users[0], group=group)
+
+    res = patch(users[0], group, {"max_members": 100})
+    assert res.status_code == 200
+    group.refresh_from_db()
+    assert group.max_members == 2
+
+    assert patch(admin_user, group, {"max_members": 5}).status_code == 200
+    group.refresh_from_db()
+    assert group.max_members == 5
+
+
+@pytest.mark.django_db
+def test_max_members_cannot_drop_below_member_count(admin_user, users, group):
+    for user in users[:2]:
+        UserGroup.objects.create(user=user, group=group)
+    res = patch(admin_user, group, {"max_members": 1})
+    assert res.status_code == 400
+    assert "max_members" in res.data
+
+
+@pytest.mark.django_db
+def test_seat_changes_reach_sync(settings, users, group):
+    settings.SYNC_SETTLE_SECONDS = 0
+    token = sync.current_token()
+    UserGroup.objects.create(user=users[0], group=group).delete()
+    changes = sync.changes_since(token)["changes"]
+    assert group.id in [item["id"] for item in changes["group_projects.groupproject"]["upserted"]]
+    entries = ChangeLogEntry.objects.filter(id__gt=token, model="group_projects.groupproject", object_id=group.id)
+    assert entries.count() == 2
@@ -0,0 +1,188 @@
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError
+from rest_framework.test import APIRequestFactory
+from core.models import AuditEvent
+from group_projects.models import GroupProject, Topic, UserGroup, is_enrollment_conflict
+from group_projects.views import GroupProjectViewSet, UserGroupViewset
+from users.models import User
+
+
+@pytest.fixture
+def users():
+    return [
+        User.objects.create_user(username=f"user{i}", email=f"user{i}@example.org", password="pass", matricola=f"10000{i}")
+        for i in range(3)
+    ]
+
+
+@pytest.fixture
+def groups():
+    topic = Topic.objects.create(title="Topic A")
+    other_topic = Topic.objects.create(title="Topic B")
+    return [
+        GroupProject.objects.create(name="A1", topic=topic),
+        GroupProject.objects.create(name="A2", topic=topic),
+        GroupProject.objects.create(name="B1", topic=other_topic),
+    ]
+
+
+def join(user, group):
+    req = APIRequestFactory().post(f"/api/v1/groups/{group.id}/join/")
+    req.user = user
+    return GroupProjectViewSet.as_view({"post": "join"})(req, pk=group.id)
+
+
+def move(user, data):
+    req = APIRequestFactory().post("/api/v1/group-users/move/", data, format="json")
+    req.user = user
+    return UserGroupViewset.as_view({"post": "move"})(req)
+
+
+@pytest.mark.django_db
+def test_open_policy_allows_many_groups(users, groups):
+    for group in groups:
+        assert join(users[0], group).status_code == 200
+
+
+@pytest.mark.django_db
+def test_one_group_policy_rejects_second_join(settings, users, groups):
+    settings.ENROLLMENT_POLICY = "one_group"
+    assert join(users[0], groups[0]).status_code == 200
+
+    res = join(users[0], groups[2])
+    assert res.status_code == 400
+    assert res.data["error"] == "Sei già iscritto a un altro gruppo"
+    groups[2].refresh_from_db()
+    assert groups[2].member_count == 0
+
+
+@pytest.mark.django_db
+def test_one_per_topic_policy(settings, users, groups):
+    settings.ENROLLMENT_POLICY = "one_per_topic"
+    assert join(users[0], groups[0]).status_code == 200
+    assert join(users[0], groups[1]).status_code == 400
+    assert join(users[0], groups[2]).status_code == 200
+
+
+@pytest.mark.django_db
+def test_refresh_enrollment_applies_the_policy_to_existing_memberships(settings, users, groups):
+    UserGroup.objects.create(user=users[0], group=groups[0])
+    UserGroup.objects.create(user=users[1], group=groups[0])
+    UserGroup.objects.create(user=users[1], group=groups[2])
+
+    settings.ENROLLMENT_POLICY = "one_group"
+    with pytest.raises(CommandError, match=str(users[1].id)):
+        call_command("refresh_enrollment")
+    assert not UserGroup.objects.exclude(enrollment_key=None).exists()
+
+    settings.ENROLLMENT_POLICY = "one_per_topic"
+    call_command("refresh_enrollment")
+    assert join(users[0], groups[1]).status_code == 400
+    assert join(users[0], groups[2]).status_code == 200
+
+
+@pytest.mark.django_db
+def test_topic_change_keeps_the_enrollment_scope(settings, admin_user, users, groups):
+    settings.ENROLLMENT_POLICY = "one_per_topic"
+    UserGroup.objects.create(user=users[0], group=groups[0])
+    UserGroup.objects.create(user=users[0], group=groups[2])
+    UserGroup.objects.create(user=users[1], group=groups[1])
+
+    def patch(group, topic):
+        req = APIRequestFactory().patch(f"/api/v1/groups/{group.id}/", {"topic": topic.id}, format="json")
+        req.user = admin_user
+        return GroupProjectViewSet.as_view({"patch": "partial_update"})(req, pk=group.id)
+
+    res = patch(groups[0], groups[2].topic)
+    assert res.status_code == 400
+    assert "topic" in res.data
+
+    assert patch(groups[1], groups[2].topic).status_code == 200
+    assert UserGroup.objects.get(user=users[1]).enrollment_key == f"topic:{groups[2].topic_id}"
+    assert join(users[1], groups[2]).status_code == 400
+
+
+def test_only_the_enrollment_constraint_is_a_policy_conflict():
+    assert is_enrollment_conflict(IntegrityError(
+        "UNIQUE constraint failed: group_projects_usergroup.user_id, group_projects_usergroup.enrollment_key"
+    ))
+    assert not is_enrollment_conflict(IntegrityError("NOT NULL constraint failed: group_projects_usergroup.user_id"))
+
+
+@pytest.mark.django_db
+def test_admin_create_violating_policy_is_a_validation_error(settings, admin_user, users, groups):
+    settings.ENROLLMENT_POLICY = "one_group"
+    UserGroup.objects.create(user=users[0], group=groups[0])
+    req = APIRequestFactory().post("/api/v1/group-users/", {"user": users[0].id, "group": groups[1].id}, format="json")
+    req.user = admin_user
+    res = UserGroupViewset.as_view({"post": "create"})(req)
+    assert res.status_code == 400
+    assert "user" in res.data
+
+    req = APIRequestFactory().get("/api/v1/group-users/")
+    req.user = admin_user
+    assert "enrollment_key" not in UserGroupViewset.as_view({"get": "list"})(req).data[0]
+
+
+@pytest.mark.django_db
+def test_move_members_in_bulk(settings, django_capture_on_commit_callbacks, admin_user, users, groups, audit_buffer):
+    settings.ENROLLMENT_POLICY = "one_group"
+    for user in users:
+        UserGroup.objects.create(user=user, group=groups[0])
+
+    with django_capture_on_commit_callbacks(execute=True):
+        res = move(admin_user, {"users": [users[0].id, users[1].id], "from": groups[0].id, "to": groups[2].id})
+
+    assert res.status_code == 200
+    assert len(res.data["moved"]) == 2
+    assert set(UserGroup.objects.filter(group=groups[2]).values_list("user_id", flat=True)) == {users[0].id, users[1].id}
+    assert dict(GroupProject.objects.values_list("name", "member_count")) == {"A1": 1, "A2": 0, "B1": 2}
+    audit_buffer.flush()
+    assert AuditEvent.objects.filter(action="move", group_id=groups[2].id).count() == 2
+
+
+@pytest.mark.django_db
+def test_move_is_all_or_nothing(settings, admin_user, users, groups):
+    settings.ENROLLMENT_POLICY = "one_per_topic"
+    UserGroup.objects.create(user=users[0], group=groups[0])
+    UserGroup.objects.create(user=users[1], group=groups[0])
+    UserGroup.objects.create(user=users[1], group=groups[2])
+    groups[1].max_members = 1
+    groups[1].save()
+
+    # A2 ha un solo posto libero
+    res = move(admin_user, {"users": [users[0].id, users[1].id], "from": groups[0].id, "to": groups[1].id})
+    assert res.status_code == 400
+    assert "to" in res.data
+
+    # users[1] è già iscritto a B1, dello stesso ambito del topic B
+    res = move(admin_user, {"users": [users[0].id, users[1].id], "from": groups[0].id, "to": groups[2].id})
+    assert res.status_code == 400
+    assert "users" in res.data
+    assert dict(GroupProject.objects.values_list("name", "member_count")) == {"A1": 2, "A2": 0, "B1": 1}
+    assert UserGroup.objects.filter(group=groups[0]).count() == 2
+
+
+@pytest.mark.django_db
+def test_move_is_admin_only(users, groups):
+    res = move(users[0], {"users": [users[0].id], "from": groups[0].id, "to": groups[1].id})
+    assert res.status_code == 403
+
+
+@pytest.mark.django_db
+def test_move_rejects_users_already_in_target(admin_user, users, groups):
+    UserGroup.objects.create(user=users[0], group=groups[0])
+    UserGroup.objects.create(user=users[0], group=groups[1])
+
+    res = move(admin_user, {"users": [users[0].id], "from": groups[0].id, "to": groups[1].id})
+    assert res.status_code == 400
+    assert UserGroup.objects.filter(user=users[0], group=groups[1]).count() == 1
+    assert dict(GroupProject.objects.values_list("name", "member_count")) == {"A1": 1, "A2": 1, "B1": 0}
+
+
+@pytest.mark.django_db
+def test_move_validates_group_ids(admin_user, users, groups):
+    for bad in ([groups[0].id], {"id": 1}, "1"):
+        res = move(admin_user, {"users": [users[0].id], "from": bad, "to": groups[1].id})
+        assert res.status_code == 400
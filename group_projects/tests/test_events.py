@@ -0,0 +1,115 @@
+import asyncio
+import json
+import pytest
+from django.test import AsyncRequestFactory
+from rest_framework.test import APIRequestFactory, force_authenticate
+from core import events
+from group_projects.models import GroupProject, Topic, UserGroup
+from group_projects.views import GroupEventsView
+from users.models import User
+
+
+@pytest.fixture(autouse=True)
+def broker():
+    events.reset_broker()
+    yield events.get_broker()
+    events.reset_broker()
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(username="user", password="pass", email="user@example.org", matricola="123456")
+
+
+@pytest.fixture
+def group():
+    return GroupProject.objects.create(name="Test Group", topic=Topic.objects.create(title="Mock Topic"))
+
+
+@pytest.mark.django_db
+def test_signals_publish_on_commit(user, group, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        membership = UserGroup.objects.create(user=user, group=group)
+        membership_id = membership.id
+        membership.delete()
+
+    found = events.get_broker().since(0, groups={group.id})
+    assert [e.type for e in found] == ["usergroup.created", "usergroup.deleted"]
+    assert found[0].data == {"id": membership_id, "user": user.id}
+
+
+@pytest.mark.django_db
+def test_long_poll_returns_events(user, broker):
+    broker.publish("groupgoal.updated", {"id": 1, "complete": True}, group=1)
+    broker.publish("groupgoal.updated", {"id": 2, "complete": True}, group=2)
+
+    req = APIRequestFactory().get("/api/v1/events/", {"group": "2", "timeout": "0"})
+    req.user = user
+    res = GroupEventsView.as_view()(req)
+
+    assert res.status_code == 200
+    assert [e["group"] for e in res.data["events"]] == [2]
+    assert res.data["last_event_id"] == 2
+
+
+@pytest.mark.django_db
+def test_long_poll_resumes_from_last_event_id(user, broker):
+    broker.publish("group.created", {"id": 1}, group=1)
+    req = APIRequestFactory().get("/api/v1/events/", {"timeout": "0"}, HTTP_LAST_EVENT_ID="1")
+    req.user = user
+    res = GroupEventsView.as_view()(req)
+    assert res.data == {"events": [], "last_event_id": 1}
+
+
+@pytest.mark.django_db
+def test_long_poll_invalid_timeout(user):
+    req = APIRequestFactory().get("/api/v1/events/", {"timeout": "abc"})
+    req.user = user
+    assert GroupEventsView.as_view()(req).status_code == 400
+
+
+@pytest.mark.django_db
+def test_events_require_authentication():
+    req = APIRequestFactory().get("/api/v1/events/", HTTP_ACCEPT="text/event-stream")
+    req.user = None
+    res = GroupEventsView.as_view()(req)
+    res.render()
+    assert res.status_code == 401
+    assert res.content.startswith(b"event: error")
+
+
+@pytest.mark.django_db
+def test_long_poll_renders_events_for_event_source_clients(user, broker):
+    broker.publish("group.created", {"id": 1}, group=1)
+    req = APIRequestFactory().get("/api/v1/events/?timeout=0", HTTP_ACCEPT="text/event-stream")
+    force_authenticate(req, user=user)
+    res = GroupEventsView.as_view()(req)
+    res.render()
+    assert res.status_code == 200
+    assert res.content.startswith(b"id: 1\nevent: group.created\n")
+    assert b"event: error" not in res.content
+
+
+@pytest.mark.django_db
+def test_sse_stream_under_asgi(user, broker, settings):
+    settings.EVENTS_POLL_INTERVAL = 0.01
+    settings.EVENTS_HEARTBEAT = 0.02
+    broker.publish("group.created", {"id": 1}, group=1)
+    broker.publish("group.created", {"id": 2}, group=2)
+
+    req = AsyncRequestFactory().get("/api/v1/events/?group=2", HTTP_ACCEPT="text/event-stream")
+    force_authenticate(req, user=user)
+    res = GroupEventsView.as_view()(req)
+    assert res["Content-Type"] == "text/event-stream"
+
+    async def read(count):
+        chunks = []
+        async for chunk in res.streaming_content:
+            chunks.append(chunk)
+            if len(chunks) == count:
+                return chunks
+
+    event, heartbeat = asyncio.run(asyncio.wait_for(read(2), timeout=5))
+    assert event.startswith(b"id: 2\nevent: group.created\n")
+    assert json.loads(event.split(b"data: ")[1])["group"] == 2
+    assert heartbeat == b": keep-alive\n\n"
@@ -0,0 +1,121 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from core.models import AuditEvent, ChangeLogEntry
+from group_projects import grading
+from group_projects.models import Goal, GroupGoal, GroupProject, Topic, VersionConflict
+from group_projects.views import GroupGoalViewSet
+
+
+@pytest.fixture
+def group_goals():
+    topic = Topic.objects.create(title="Mock Topic")
+    groups = GroupProject.objects.bulk_create([GroupProject(name=f"Group {i}", topic=topic) for i in range(3)])
+    goals = list(Goal.objects.order_by("id")[:2])
+    GroupGoal.objects.bulk_create([GroupGoal(group=group, goal=goal) for group in groups for goal in goals])
+    return list(GroupGoal.objects.order_by("id"))
+
+
+@pytest.mark.django_db
+def test_set_complete_updates_in_one_statement(group_goals, admin_user, audit_buffer, django_capture_on_commit_callbacks):
+    versions = dict.fromkeys(gg.id for gg in group_goals)
+    with CaptureQueriesContext(connection) as queries, django_capture_on_commit_callbacks(execute=True):
+        updated, conflicts = grading.set_complete(versions, True, admin_user)
+
+    assert sorted(updated) == sorted(versions) and conflicts == []
+    assert len([q for q in queries if q["sql"].startswith("UPDATE")]) == 1
+    assert set(GroupGoal.objects.values_list("complete", "version")) == {(True, 1)}
+
+    audit_buffer.flush()
+    assert AuditEvent.objects.filter(model="group_projects.groupgoal", actor=admin_user).count() == len(versions)
+    assert ChangeLogEntry.objects.filter(model="group_projects.groupgoal", object_id__in=versions).count() >= len(versions)
+
+
+@pytest.mark.django_db
+def test_set_complete_reports_concurrent_edits(group_goals):
+    stale = group_goals[0]
+    fresh = GroupGoal.objects.get(pk=stale.pk)
+    fresh.complete = True
+    fresh.save()
+    assert fresh.version == 1
+
+    updated, conflicts = grading.set_complete({stale.pk: stale.version, group_goals[1].pk: 0}, True)
+    assert updated == [group_goals[1].pk]
+    assert conflicts == [stale.pk]
+
+
+@pytest.mark.django_db
+def test_admin_action_marks_selected_goals(client, admin_user, group_goals):
+    client.force_login(admin_user)
+    res = client.post("/admin/group_projects/groupgoal/", {
+        "action": "mark_complete",
+        "_selected_action": [group_goals[0].pk, group_goals[1].pk],
+    })
+    assert res.status_code == 302
+    assert list(GroupGoal.objects.filter(complete=True).values_list("pk", flat=True).order_by("pk")) == [
+        group_goals[0].pk, group_goals[1].pk,
+    ]
+
+
+@pytest.mark.django_db
+def test_grading_matrix_saves_changes_and_skips_conflicts(client, admin_user, group_goals):
+    client.force_login(admin_user)
+    res = client.get("/admin/group_projects/groupgoal/grading/")
+    assert res.status_code == 200
+    assert len(res.context["rows"]) == 3
+    state = res.context["state"]
+    url = "/admin/group_projects/groupgoal/grading/"
+
+    # Due valutatori partono dallo stesso stato e segnano la stessa cella
+    res = client.post(url, {"state": state, f"cell-{group_goals[0].pk}": "on"})
+    assert res.status_code == 302
+    res = client.post(url, {
+        "state": state, f"cell-{group_goals[0].pk}": "on", f"cell-{group_goals[1].pk}": "on",
+    }, follow=True)
+
+    # Il secondo salvataggio vale solo per la cella non contesa
+    assert GroupGoal.objects.get(pk=group_goals[0].pk).version == 1
+    assert GroupGoal.objects.get(pk=group_goals[1].pk).complete is True
+    assert any("altro valutatore" in str(m) for m in res.context["messages"])
+
+
+@pytest.mark.django_db
+def test_stale_save_is_a_version_conflict(group_goals):
+    stale = group_goals[0]
+    GroupGoal.objects.get(pk=stale.pk).save()
+    stale.complete = True
+    with pytest.raises(VersionConflict):
+        stale.save()
+    assert GroupGoal.objects.get(pk=stale.pk).complete is False
+
+
+@pytest.mark.django_db
+def test_api_update_requires_the_current_version(admin_user, group_goals):
+    def patch(data):
+        req = APIRequestFactory().patch(f"/api/v1/group-goals/{group_goals[0].pk}/", data, format="json")
+        req.user = admin_user
+        return GroupGoalViewSet.as_view({"patch": "partial_update"})(req, pk=group_goals[0].pk)
+
+    assert patch({"complete": True}).status_code == 400
+    res = patch({"complete": True, "version": 0})
+    assert res.status_code == 200 and res.data["version"] == 1
+    res = patch({"complete": False, "version": 0})
+    assert res.status_code == 400 and "version" in res.data
+    assert GroupGoal.objects.get(pk=group_goals[0].pk).complete is True
+
+
+@pytest.mark.django_db
+def test_admin_change_form_rejects_stale_version(client, admin_user, group_goals):
+    client.force_login(admin_user)
+    group_goal = group_goals[0]
+    url = f"/admin/group_projects/groupgoal/{group_goal.pk}/change/"
+    assert client.get(url).context["adminform"].form["seen_version"].value() == 0
+    GroupGoal.objects.get(pk=group_goal.pk).save()
+
+    data = {"group": group_goal.group_id, "goal": group_goal.goal_id, "complete": "on", "seen_version": 0}
+    res = client.post(url, data)
+    assert res.status_code == 200
+    assert "altro valutatore" in str(res.context["adminform"].form.non_field_errors())
+    assert client.post(url, {**data, "seen_version": 1}).status_code == 302
+    assert GroupGoal.objects.get(pk=group_goal.pk).complete is True
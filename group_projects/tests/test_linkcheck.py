@@ -0,0 +1,110 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from django.core.management import call_command
+from core import tasks
+from core.models import Task
+from group_projects.linkcheck import LinkChecker
+from group_projects.models import GroupProject, Topic
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Server di prova: /ok con ETag, /no-head senza HEAD, il resto 404"""
+    requests = []
+
+    def do_HEAD(self):
+        self.requests.append((self.command, self.path, self.headers.get("If-None-Match")))
+        if self.path == "/no-head":
+            self.send_response(405)
+        elif self.path == "/ok" and self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+        elif self.path == "/ok":
+            self.send_response(200)
+            self.send_header("ETag", '"v1"')
+        else:
+            self.send_response(404)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        self.requests.append((self.command, self.path, None))
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    StubHandler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def group(stub):
+    return GroupProject.objects.create(
+        name="Group", topic=Topic.objects.create(title="Mock Topic"),
+        link_django=f"{stub}/ok", link_tui=f"{stub}/missing", link_gui=f"{stub}/no-head",
+    )
+
+
+@pytest.mark.django_db
+def test_check_links_stores_status_on_group(group):
+    call_command("check_links", workers=4, per_host=1)
+
+    group.refresh_from_db()
+    status = group.links_status
+    assert (status["link_django"]["ok"], status["link_django"]["status"]) == (True, 200)
+    assert (status["link_tui"]["ok"], status["link_tui"]["status"]) == (False, 404)
+    assert (status["link_gui"]["ok"], status["link_gui"]["status"]) == (True, 200)
+    assert ("GET", "/no-head", None) in StubHandler.requests
+    assert group.links_checked_at is not None
+
+
+@pytest.mark.django_db
+def test_check_links_honours_ttl_and_sends_conditional_requests(group):
+    checker = LinkChecker(workers=2, per_host=1, ttl=3600)
+    assert checker.check(GroupProject.objects.all()) == 3
+    assert checker.check(GroupProject.objects.all()) == 0
+
+    StubHandler.requests = []
+    assert checker.check(GroupProject.objects.all(), force=True) == 3
+    assert ("HEAD", "/ok", '"v1"') in StubHandler.requests
+    group.refresh_from_db()
+    assert group.links_status["link_django"]["ok"] is True
+
+
+@pytest.mark.django_db
+def test_unreachable_host_is_reported(group):
+    group.link_django = "http://127.0.0.1:9/ok"
+    group.save()
+    LinkChecker(timeout=1).check(GroupProject.objects.all())
+
+    group.refresh_from_db()
+    assert group.links_status["link_django"]["ok"] is False
+    assert group.links_status["link_django"]["error"] == "ConnectionError"
+
+
+@pytest.mark.django_db
+def test_admin_action_defers_link_check(admin_client, group, django_capture_on_commit_callbacks):
+    other = GroupProject.objects.create(name="Other", topic=group.topic, link_django=group.link_django)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        res = admin_client.post("/admin/group_projects/groupproject/", {"action": "check_links", "_selected_action": [group.pk]})
+
+    assert res.status_code == 302
+    task = Task.objects.get()
+    assert (task.name, task.args, task.kwargs) == ("group_projects.tasks.check_group_links", [[group.pk]], {"force": True})
+    tasks.execute(tasks.claim(1)[0])
+    group.refresh_from_db()
+    other.refresh_from_db()
+    assert group.links_status["link_django"]["ok"] is True
+    assert other.links_checked_at is None
@@ -0,0 +1,96 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from group_projects import stats
+from group_projects.models import Goal, GroupGoal, GroupProject, Topic
+from group_projects.views import StatsView
+from users.models import User
+
+
+@pytest.fixture
+def data():
+    topics = [Topic.objects.create(title="Topic A"), Topic.objects.create(title="Topic B")]
+    goals = [Goal.objects.create(title=f"Goal {i}", description="d", points=i + 1) for i in range(2)]
+    groups = [GroupProject.objects.create(name=f"Group {i}", topic=topics[i % 2]) for i in range(3)]
+    # Gruppo 0: entrambi i goal, gruppo 1: solo il secondo, gruppo 2: nessuno
+    for group, done in zip(groups, [(True, True), (False, True), (False, False)]):
+        for goal, complete in zip(goals, done):
+            GroupGoal.objects.create(group=group, goal=goal, complete=complete)
+    return topics, goals, groups
+
+
+def get(user, section=None, **params):
+    req = APIRequestFactory().get("/api/v1/stats/", params)
+    req.user = user
+    return StatsView.as_view()(req, section=section) if section else StatsView.as_view()(req)
+
+
+@pytest.mark.django_db
+def test_goal_and_topic_stats(admin_user, data):
+    topics, goals, _ = data
+    goal_rows = {row["id"]: row for row in get(admin_user, "goals").data}
+    assert goal_rows[goals[0].id]["rate"] == pytest.approx(1 / 3)
+    assert goal_rows[goals[1].id]["completed"] == 2
+
+    topic_rows = {row["id"]: row for row in get(admin_user, "topics").data}
+    assert topic_rows[topics[0].id]["groups"] == 2
+    assert topic_rows[topics[0].id]["avg_points"] == pytest.approx(1.5)
+    assert topic_rows[topics[1].id]["avg_rate"] == pytest.approx(0.5)
+
+
+@pytest.mark.django_db
+def test_points_distribution(admin_user, data):
+    res = get(admin_user, "points", bins=3)
+    assert res.data["groups"] == 3
+    assert res.data["percentiles"]["p50"] == 2.0
+    assert res.data["histogram"]["counts"] == [1, 0, 2]
+
+
+@pytest.mark.django_db
+def test_stats_cached_until_group_goal_changes(admin_user, data, django_capture_on_commit_callbacks):
+    get(admin_user)
+    with CaptureQueriesContext(connection) as queries:
+        get(admin_user)
+    assert len(queries) == 0
+
+    with django_capture_on_commit_callbacks(execute=True):
+        GroupGoal.objects.filter(complete=False).first().delete()
+    with CaptureQueriesContext(connection) as queries:
+        get(admin_user, "goals")
+    assert len(queries) == 1
+
+
+@pytest.mark.django_db
+def test_stats_staff_only_and_unknown_section(admin_user):
+    user = User.objects.create_user(username="user", email="user@example.org", password="pass", matricola="123456")
+    assert get(user).status_code == 403
+    assert get(admin_user, "unknown").status_code == 404
+
+
+def test_percentiles_and_histogram_follow_numpy_semantics():
+    assert stats.percentiles([1, 2, 3, 4], [25, 50]) == {25: 1.75, 50: 2.5}
+    assert stats.histogram([0, 1, 1, 4], 2) == {"counts": [3, 1], "edges": [0.0, 2.0, 4.0]}
+    assert stats.histogram([5, 5], 1)["counts"] == [2]
+
+
+@pytest.mark.django_db
+def test_groups_without_goals_count_with_zero_points(admin_user, data):
+    topics, _, _ = data
+    GroupProject.objects.create(name="Empty", topic=topics[1])
+    assert get(admin_user, "points").data["groups"] == 4
+    topic_rows = {row["id"]: row for row in get(admin_user, "topics").data}
+    assert topic_rows[topics[1].id]["groups"] == 2
+    assert topic_rows[topics[1].id]["avg_points"] == pytest.approx(1.0)
+
+
+@pytest.mark.django_db
+def test_topic_rename_invalidates_stats(admin_user, data, django_capture_on_commit_callbacks):
+    topics, _, _ = data
+    get(admin_user, "topics")
+    with django_capture_on_commit_callbacks(execute=True):
+        topic = Topic.objects.get(pk=topics[0].pk)
+        topic.title = "Renamed"
+        topic.save()
+    titles = {row["id"]: row["title"] for row in get(admin_user, "topics").data}
+    assert titles[topics[0].id] == "Renamed"
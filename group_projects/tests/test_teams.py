@@ -0,0 +1,145 @@
+import random
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIRequestFactory
+from core.models import ChangeLogEntry
+from group_projects import archive
+from group_projects.models import GroupProject, Topic, UserGroup
+from group_projects.teams import MATE_WEIGHT, Partition, TeamFormationError, form_teams
+from group_projects.views import GroupProjectViewSet
+from users.models import User
+
+
+def score(partition):
+    summary = partition.summary()
+    return MATE_WEIGHT * summary["wishes_satisfied"] + summary["topic_matches"]
+
+
+def test_partition_balances_team_sizes():
+    partition = Partition(range(10), 4).greedy()
+    assert sorted(len(team) for team in partition.teams()) == [3, 3, 4]
+    assert sorted(s for team in partition.teams() for s in team) == list(range(10))
+
+
+def test_swap_gain_matches_score_difference():
+    rng = random.Random(5)
+    for _ in range(200):
+        students = range(rng.randint(2, 12))
+        wishes = {s: rng.sample(students, rng.randint(0, 2)) for s in students}
+        likes = {s: rng.sample(range(4), rng.randint(0, 2)) for s in students}
+        partition = Partition(students, rng.randint(1, 4), wishes, likes).greedy()
+        x, y = rng.sample(students, 2)
+        if partition.team_of[x] == partition.team_of[y]:
+            continue
+        before, gain = score(partition), partition.swap_gain(x, y)
+        team = partition.remove(y)
+        partition.add(y, partition.remove(x))
+        partition.add(x, team)
+        assert score(partition) - before == gain
+
+
+def test_local_search_reunites_wished_teammates():
+    # Scelte a catena più lunghe della squadra: il greedy non le unisce
+    # tutte, la ricerca locale sì
+    wishes = {0: [1], 1: [0], 2: [3], 3: [2], 4: [5], 5: [4, 0]}
+    likes = {0: ["a"], 1: ["a"], 4: ["a"], 5: ["a"]}
+    partition = Partition(range(6), 2, wishes, likes).greedy()
+    greedy = score(partition)
+    partition.improve()
+    assert score(partition) >= greedy
+    assert {tuple(team) for team in partition.teams()} == {(0, 1), (2, 3), (4, 5)}
+
+
+@pytest.fixture
+def students():
+    return [
+        User.objects.create_user(username=f"user{i}", email=f"user{i}@example.org", password="pass", matricola=f"10000{i}")
+        for i in range(5)
+    ]
+
+
+@pytest.fixture
+def topics():
+    return [Topic.objects.create(title=title) for title in ("A", "B")]
+
+
+@pytest.mark.django_db
+def test_form_teams_persists_groups_for_unassigned_students(django_capture_on_commit_callbacks, admin_user, students, topics):
+    existing = GroupProject.objects.create(name="Existing", topic=topics[0])
+    UserGroup.objects.create(user=students[4], group=existing)
+    a, b = students[0].id, students[1].id
+
+    with django_capture_on_commit_callbacks(execute=True):
+        groups, summary = form_teams(2, wishes={a: [b]}, likes={a: [topics[1].id], b: [topics[1].id]})
+
+    assert summary["students"] == 4
+    assert summary["wishes_satisfied"] == 1
+    created = GroupProject.objects.exclude(pk=existing.pk)
+    assert created.count() == 2
+    together = created.get(users__user_id=a)
+    assert together.topic == topics[1]
+    assert together.member_count == 2
+    assert set(together.users.values_list("user_id", flat=True)) == {a, b}
+    assert UserGroup.objects.count() == 5
+    assert ChangeLogEntry.objects.filter(model="group_projects.usergroup").count() >= 4
+
+
+@pytest.mark.django_db
+def test_dry_run_creates_nothing(students, topics):
+    groups, _ = form_teams(3, dry_run=True)
+    assert sorted(len(group["members"]) for group in groups) == [2, 3]
+    assert all(group["id"] is None for group in groups)
+    assert not GroupProject.objects.exists()
+
+
+@pytest.mark.django_db
+def test_form_teams_endpoint_is_admin_only(admin_user, students, topics):
+    def post(user, data):
+        req = APIRequestFactory().post("/api/v1/groups/form-teams/", data, format="json")
+        req.user = user
+        return GroupProjectViewSet.as_view({"post": "form_teams"})(req)
+
+    assert post(students[0], {"size": 2}).status_code == 403
+    assert post(admin_user, {"size": 0}).status_code == 400
+    res = post(admin_user, {"size": 3, "wishes": {str(students[0].id): [students[1].id]}})
+    assert res.status_code == 200
+    assert res.data["summary"]["wishes_satisfied"] == 1
+    assert GroupProject.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_form_teams_command(capsys, students, topics):
+    call_command("form_teams", "--size", "5")
+    assert "1 gruppi per 5 studenti" in capsys.readouterr().out
+    assert GroupProject.objects.get().member_count == 5
+
+
+@pytest.mark.django_db
+def test_team_names_skip_archived_groups_and_respect_max_length(students, topics):
+    archived = [GroupProject.objects.create(name=f"Team {i}", topic=topics[0]) for i in (1, 2)]
+    archive.archive_groups([group.pk for group in archived])
+
+    with pytest.raises(TeamFormationError):
+        form_teams(5, prefix="x" * 100)
+
+    groups, _ = form_teams(5)
+    assert [group["name"] for group in groups] == ["Team 3"]
+
+
+@pytest.mark.django_db
+def test_concurrent_join_is_a_team_formation_error(settings, students, topics):
+    settings.ENROLLMENT_POLICY = "one_group"
+    other = GroupProject.objects.create(name="Other", topic=topics[0])
+    bulk_create = GroupProject.objects.bulk_create
+
+    def join_meanwhile(groups, *args, **kwargs):
+        # Uno studente si iscrive tra la lettura delle iscrizioni e la scrittura
+        UserGroup.objects.create(user=students[0], group=other)
+        return bulk_create(groups, *args, **kwargs)
+
+    with mock.patch.object(GroupProject.objects, "bulk_create", side_effect=join_meanwhile):
+        with pytest.raises(TeamFormationError):
+            form_teams(5)
+    assert list(GroupProject.objects.values_list("name", flat=True)) == ["Other"]
@@ -1,6 +1,6 @@
 import pytest
 from django.core.exceptions import ValidationError
-from group_projects.validators import validate_https_hostname
+from group_projects.validators import validate_https_hostname, validate_https_hostnames
 
 
 def test_validator_accepts_valid_https_url():
@@ -63,4 +63,29 @@ def test_validator_rejects_url_without_hostname():
     """Test che il validator rifiuti URL senza hostname"""
     with pytest.raises(ValidationError) as err:
         validate_https_hostname('https://')
-    assert 'URL must contain a valid hostname' in str(err.value)
\ No newline at end of file
+    assert 'URL must contain a valid hostname' in str(err.value)
+
+def test_validator_rejects_ipv6_with_embedded_ipv4():
+    """Test che il validator riconosca come IP anche gli IPv6 con IPv4 incorporato"""
+    with pytest.raises(ValidationError) as err:
+        validate_https_hostname('https://[::ffff:192.168.1.1]')
+    assert 'IP addresses are not allowed' in str(err.value)
+
+
+def test_validator_rejects_malformed_ipv6():
+    """Test che un IPv6 malformato dia un errore di validazione e non un'eccezione"""
+    with pytest.raises(ValidationError) as err:
+        validate_https_hostname('https://[::1')
+    assert 'URL must contain a valid hostname' in str(err.value)
+
+
+def test_batch_validator_reports_errors_by_position():
+    """Test che la validazione a blocchi riporti gli errori per posizione"""
+    validate_https_hostnames(['https://example.com', 'https://sub.example.com'])
+
+    with pytest.raises(ValidationError) as err:
+        validate_https_hostnames(['https://example.com', 'http://example.com', 'https://localhost'])
+    assert err.value.message_dict == {
+        '1': ['URL must use HTTPS.'],
+        '2': ['Localhost URLs are not allowed.'],
+    }
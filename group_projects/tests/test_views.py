@@ -444,7 +444,7 @@ def test_group_goal_update_forbidden_for_non_admin(user, group_goal, group, goal
 def test_group_goal_update_admin(admin, group_goal, group, goal):
     factory = APIRequestFactory()
     view = GroupGoalViewSet.as_view({"put": "update"})
-    req = factory.put(f"/group-goals/{group_goal.id}/", {"group": group.id, "goal": goal.id, "complete": True}, format="json")
+    req = factory.put(f"/group-goals/{group_goal.id}/", {"group": group.id, "goal": goal.id, "complete": True, "version": 0}, format="json")
     req.user = admin
 
     res = view(req, pk=group_goal.id)
@@ -1,5 +1,6 @@
+from django.urls import path
 from rest_framework.routers import SimpleRouter
-from .views import GroupProjectViewSet, TopicViewSet, GoalViewSet, GroupGoalViewSet, UserGroupViewset
+from .views import GroupEventsView, StatsView, GroupProjectViewSet, TopicViewSet, GoalViewSet, GroupGoalViewSet, UserGroupViewset
 
 router = SimpleRouter()
 
@@ -9,4 +10,8 @@ router.register('goals', GoalViewSet, basename='goal')
 router.register('group-goals', GroupGoalViewSet, basename='group-goal')
 router.register('group-users', UserGroupViewset, basename='group-user')
 
-urlpatterns = router.urls
\ No newline at end of file
+urlpatterns = [
+    path('events/', GroupEventsView.as_view(), name='group-events'),
+    path('stats/', StatsView.as_view(), name='stats'),
+    path('stats/<str:section>/', StatsView.as_view(), name='stats-section'),
+] + router.urls
\ No newline at end of file
@@ -1,27 +1,72 @@
 from django.core.exceptions import ValidationError
+from functools import lru_cache
 from urllib.parse import urlparse
+import ipaddress
 import re
 
-def validate_https_hostname(value):
-    parsed = urlparse(value)
+LOCALHOST_NAMES = frozenset(("localhost", "127.0.0.1"))
+# Forme numeriche che ipaddress non accetta (es. 999.1.1.1) restano comunque IP
+NUMERIC_HOST_RE = re.compile(r"^\d+(\.\d+){3}$")
+FQDN_RE = re.compile(r"^([a-zA-Z0-9-]+\.)+[a-zA-Z]{2,}$")
+
+
+def _is_ip(hostname):
+    # Un hostname non contiene mai ':', quindi solo allora serve ipaddress
+    # (che costa un'eccezione per ogni nome non IP)
+    if ':' in hostname:
+        try:
+            ipaddress.ip_address(hostname)
+        except ValueError:
+            return False
+        return True
+    return NUMERIC_HOST_RE.match(hostname) is not None
+
+
+@lru_cache(maxsize=4096)
+def https_hostname_error(value):
+    """
+    Ritorna il messaggio d'errore per l'URL, o None se è valido.
+    Il verdetto viene memorizzato: gli stessi link vengono validati
+    più volte per ogni salvataggio.
+    """
+    try:
+        parsed = urlparse(value)
+        hostname = parsed.hostname
+    except ValueError:
+        return "URL must contain a valid hostname."
 
     if parsed.scheme != "https":
-        raise ValidationError("URL must use HTTPS.")
+        return "URL must use HTTPS."
 
-    hostname = parsed.hostname
     if not hostname:
-        raise ValidationError("URL must contain a valid hostname.")
+        return "URL must contain a valid hostname."
+
+    if hostname in LOCALHOST_NAMES:
+        return "Localhost URLs are not allowed."
 
-    if hostname.lower() in ("localhost", "127.0.0.1"):
-        raise ValidationError("Localhost URLs are not allowed.")
+    if _is_ip(hostname):
+        return "IP addresses are not allowed, only hostnames."
 
-    ipv4_regex = r"^\d{1,3}(\.\d{1,3}){3}$"
-    ipv6_regex = r"^\[?[0-9a-fA-F:]+\]?$"
+    if not FQDN_RE.match(hostname):
+        return "Invalid hostname format."
+    return None
 
-    if re.match(ipv4_regex, hostname) or re.match(ipv6_regex, hostname):
-        raise ValidationError("IP addresses are not allowed, only hostnames.")
 
-    fqdn_regex = r"^([a-zA-Z0-9-]+\.)+[a-zA-Z]{2,}$"
-    if not re.match(fqdn_regex, hostname):
-        raise ValidationError("Invalid hostname format.")
+def validate_https_hostname(value):
+    error = https_hostname_error(value)
+    if error is not None:
+        raise ValidationError(error)
+
 
+def validate_https_hostnames(values):
+    """
+    Valida un elenco di URL in un colpo solo, per gli import massivi.
+    Solleva un'unica ValidationError con gli errori indicizzati per posizione.
+    """
+    errors = {}
+    for position, value in enumerate(values):
+        error = https_hostname_error(value)
+        if error is not None:
+            errors[str(position)] = error
+    if errors:
+        raise ValidationError(errors)
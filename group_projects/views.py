@@ -1,18 +1,36 @@
+import asyncio
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
-from .models import GroupProject, Topic, Goal, GroupGoal, UserGroup
+from .models import GroupFull, GroupProject, Topic, TopicPreference, Goal, GroupGoal, UserGroup, VersionConflict, is_enrollment_conflict
 from .serializers import (
     GroupProjectSerializer, TopicSerializer, 
     GoalSerializer, GroupGoalsSerializer, UserGroupSerializer
 )
 from .permissions import IsAdminOrMemberGroup
+from . import archive, enrollment, stats, teams
+from core import audit, events
+from core.renderers import EventStreamRenderer, FastJSONRenderer, event_frame
+from core.models import AuditEvent
+from core.mixins import (
+    AuditMixin, FastReadListMixin, PrecompressedCatalogMixin, ProtectedDestroyMixin, SparseFieldsetMixin,
+)
 
 
-class TopicViewSet(viewsets.ModelViewSet):
+class TopicViewSet(
+    ProtectedDestroyMixin, PrecompressedCatalogMixin, FastReadListMixin, SparseFieldsetMixin, viewsets.ModelViewSet,
+):
     queryset = Topic.objects.all()
     serializer_class = TopicSerializer
+    protected_message = 'Il topic è usato da alcuni gruppi, anche archiviati'
     
     def get_permissions(self):
         """Admin può modificare, tutti possono visualizzare"""
@@ -21,9 +39,12 @@ class TopicViewSet(viewsets.ModelViewSet):
         return [IsAuthenticated(), IsAdminUser()]
 
 
-class GoalViewSet(viewsets.ModelViewSet):
+class GoalViewSet(
+    ProtectedDestroyMixin, PrecompressedCatalogMixin, FastReadListMixin, SparseFieldsetMixin, viewsets.ModelViewSet,
+):
     queryset = Goal.objects.all()
     serializer_class = GoalSerializer
+    protected_message = 'Il goal è assegnato ad alcuni gruppi, anche archiviati'
     
     def get_permissions(self):
         """Admin può modificare, tutti possono visualizzare"""
@@ -32,9 +53,10 @@ class GoalViewSet(viewsets.ModelViewSet):
         return [IsAuthenticated(), IsAdminUser()]
 
 
-class GroupProjectViewSet(viewsets.ModelViewSet):
+class GroupProjectViewSet(AuditMixin, FastReadListMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = GroupProject.objects.all()
     serializer_class = GroupProjectSerializer
+    audit_group_field = 'pk'
     
     def get_permissions(self):
         """
@@ -51,8 +73,14 @@ class GroupProjectViewSet(viewsets.ModelViewSet):
             return [IsAuthenticated(), IsAdminOrMemberGroup()]
         elif self.action in ['join', 'leave']:
             return [IsAuthenticated()]
+        elif self.action == 'form_teams':
+            return [IsAuthenticated(), IsAdminUser()]
         return [IsAuthenticated()]
     
+    def perform_destroy(self, instance):
+        """Il gruppo viene archiviato insieme a goal e iscrizioni, non cancellato"""
+        archive.archive_groups([instance.pk], self.request.user)
+
     @action(detail=True, methods=['post'])
     def join(self, request, pk=None):
         """Permetti a un utente di unirsi a un gruppo"""
@@ -65,14 +93,35 @@ class GroupProjectViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
  
-        if UserGroup.objects.filter(user=user, group=group).exists():
-            return Response(
-                {'error': 'Sei già membro di questo gruppo'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        UserGroup.objects.create(user=user, group=group)
-        
+        # Con SQLite la transazione parte con BEGIN IMMEDIATE: le join
+        # concorrenti attendono il lock invece di fallire
+        with transaction.atomic():
+            if UserGroup.objects.filter(user=user, group=group).exists():
+                return Response(
+                    {'error': 'Sei già membro di questo gruppo'}, 
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            try:
+                membership = UserGroup.objects.create(user=user, group=group)
+            except GroupFull:
+                return Response(
+                    {'error': 'Il gruppo è al completo'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            except IntegrityError as exc:
+                # Vincolo di ENROLLMENT_POLICY: save() gira in un savepoint,
+                # la transazione resta utilizzabile
+                if not is_enrollment_conflict(exc):
+                    raise
+                return Response(
+                    {'error': 'Sei già iscritto a un altro gruppo'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            audit.record('join', membership, user, group=group.id)
+
+        # Il posto è stato occupato con una UPDATE: l'istanza è da rileggere
+        group.refresh_from_db(fields=['member_count'])
         return Response(
             {'status': 'Sei entrato nel gruppo', 'group': GroupProjectSerializer(group).data},
             status=status.HTTP_200_OK
@@ -84,25 +133,115 @@ class GroupProjectViewSet(viewsets.ModelViewSet):
         group = self.get_object()
         user = request.user
         
-        try:
-            user_group = UserGroup.objects.get(user=user, group=group)
-        except UserGroup.DoesNotExist:
-            return Response(
-                {'error': 'Non sei membro di questo gruppo'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        user_group.delete()
+        with transaction.atomic():
+            try:
+                user_group = UserGroup.objects.get(user=user, group=group)
+            except UserGroup.DoesNotExist:
+                return Response(
+                    {'error': 'Non sei membro di questo gruppo'}, 
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            audit.record('leave', user_group, user, group=group.id)
+            user_group.delete()
         
         return Response(
             {'status': 'Hai lasciato il gruppo'},
             status=status.HTTP_200_OK
         )
 
+    @action(detail=True, methods=['get', 'put'])
+    def preferences(self, request, pk=None):
+        """
+        Topic preferiti dal gruppo, in ordine, usati dall'allocazione dei
+        topic. PUT {"topics": [...]} sostituisce l'intera lista.
+        """
+        group = self.get_object()
+        if not request.user.is_staff and not UserGroup.objects.filter(user=request.user, group=group).exists():
+            return Response(
+                {'error': 'Solo i membri possono indicare le preferenze del gruppo'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        if request.method == 'PUT':
+            topics = request.data.get('topics')
+            if (
+                not isinstance(topics, list)
+                or not all(isinstance(topic, int) for topic in topics)
+                or len(set(topics)) != len(topics)
+            ):
+                raise ValidationError({'topics': 'Serve una lista di id di topic distinti'})
+            if Topic.objects.filter(pk__in=topics).count() != len(topics):
+                raise ValidationError({'topics': 'Topic inesistente'})
+            with transaction.atomic():
+                TopicPreference.objects.filter(group=group).delete()
+                TopicPreference.objects.bulk_create(
+                    TopicPreference(group=group, topic_id=topic, rank=rank) for rank, topic in enumerate(topics, 1)
+                )
+
+        topics = TopicPreference.objects.filter(group=group).values_list('topic_id', flat=True)
+        return Response({'topics': list(topics), 'allocation': group.allocation})
+
+    @action(detail=False, methods=['post'], url_path='form-teams')
+    def form_teams(self, request):
+        """
+        Crea i gruppi per gli studenti senza gruppo:
+        {"size": 4, "wishes": {"<utente>": [utenti]}, "topics": {"<utente>": [topic]},
+         "prefix": "Team", "dry_run": false}
+        """
+        try:
+            size = int(request.data.get('size', 0))
+            wishes, likes = (
+                {int(user): [int(item) for item in items] for user, items in (request.data.get(key) or {}).items()}
+                for key in ('wishes', 'topics')
+            )
+        except (TypeError, ValueError, AttributeError):
+            raise ValidationError({'detail': 'Vincoli non validi'})
+        try:
+            groups, summary = teams.form_teams(
+                size, wishes, likes,
+                prefix=str(request.data.get('prefix') or 'Team'),
+                dry_run=bool(request.data.get('dry_run')),
+                actor=request.user,
+            )
+        except teams.TeamFormationError as exc:
+            raise ValidationError({'detail': str(exc)})
+        return Response({'groups': groups, 'summary': summary}, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get'])
+    def history(self, request, pk=None):
+        """
+        Storico delle modifiche al gruppo, ai suoi membri e ai suoi goal,
+        dal più recente. Si scorre all'indietro con `?before=<id>`.
+        """
+        group = self.get_object()
+        if not request.user.is_staff and not UserGroup.objects.filter(user=request.user, group=group).exists():
+            return Response(
+                {'error': 'Solo i membri possono vedere lo storico del gruppo'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        # Gli eventi ancora in memoria vanno scritti prima di leggere
+        audit.get_buffer().flush()
+
+        events = AuditEvent.objects.filter(group_id=group.id)
+        before = request.query_params.get('before', '')
+        if before.isdigit():
+            events = events.filter(id__lt=int(before))
+        limit = settings.AUDIT_HISTORY_PAGE_SIZE
+        rows = list(events.values(
+            'id', 'action', 'model', 'object_id', 'actor_id', 'changes', 'created_at',
+        )[:limit + 1])
+        return Response({
+            'events': rows[:limit],
+            'next_before': rows[limit - 1]['id'] if len(rows) > limit else None,
+        })
 
-class GroupGoalViewSet(viewsets.ModelViewSet):
+
+class GroupGoalViewSet(AuditMixin, FastReadListMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = GroupGoal.objects.all()
     serializer_class = GroupGoalsSerializer
+    audit_group_field = 'group_id'
+    audit_ignore_fields = ('version',)
     
     def get_permissions(self):
         """Solo admin può creare/modificare/eliminare, tutti possono visualizzare"""
@@ -110,10 +249,17 @@ class GroupGoalViewSet(viewsets.ModelViewSet):
             return [IsAuthenticated()]
         return [IsAuthenticated(), IsAdminUser()]
 
+    def perform_update(self, serializer):
+        try:
+            super().perform_update(serializer)
+        except VersionConflict:
+            raise ValidationError({'version': "Il goal è stato modificato da un altro valutatore"})
+
 
-class UserGroupViewset(viewsets.ModelViewSet):
+class UserGroupViewset(AuditMixin, FastReadListMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = UserGroup.objects.all()
     serializer_class = UserGroupSerializer
+    audit_group_field = 'group_id'
     
     def get_permissions(self):
         """
@@ -125,4 +271,133 @@ class UserGroupViewset(viewsets.ModelViewSet):
         if self.action in ['list', 'retrieve']:
             return [IsAuthenticated()]
         return [IsAuthenticated(), IsAdminUser()]
-    
+
+    def perform_create(self, serializer):
+        try:
+            super().perform_create(serializer)
+        except GroupFull:
+            raise ValidationError({'group': 'Il gruppo è al completo'})
+        except IntegrityError as exc:
+            if not is_enrollment_conflict(exc):
+                raise
+            raise ValidationError({'user': "L'utente è già iscritto a un altro gruppo"})
+
+    def perform_update(self, serializer):
+        try:
+            super().perform_update(serializer)
+        except GroupFull:
+            raise ValidationError({'group': 'Il gruppo è al completo'})
+        except IntegrityError as exc:
+            if not is_enrollment_conflict(exc):
+                raise
+            raise ValidationError({'user': "L'utente è già iscritto a un altro gruppo"})
+
+    @action(detail=False, methods=['post'])
+    def move(self, request):
+        """
+        Sposta più utenti da un gruppo a un altro in un'unica operazione:
+        {"users": [...], "from": <id>, "to": <id>}. O tutti o nessuno.
+        """
+        users = request.data.get('users')
+        if not isinstance(users, list) or not all(isinstance(u, int) for u in users):
+            raise ValidationError({'users': 'Serve una lista di id utente'})
+        ids = request.data.get('from'), request.data.get('to')
+        if not all(isinstance(pk, int) for pk in ids):
+            raise ValidationError({'to': 'Servono gli id dei due gruppi'})
+        groups = GroupProject.objects.in_bulk(ids)
+        source, target = groups.get(ids[0]), groups.get(ids[1])
+        if source is None or target is None or source == target:
+            raise ValidationError({'to': 'Servono due gruppi esistenti e diversi'})
+
+        try:
+            moved = enrollment.move_members(users, source, target, request.user)
+        except GroupFull:
+            raise ValidationError({'to': 'Il gruppo non ha abbastanza posti liberi'})
+        except enrollment.AlreadyMember as exc:
+            raise ValidationError({'users': f'Già membri del gruppo di destinazione: {exc.args[0]}'})
+        except enrollment.EnrollmentConflict:
+            raise ValidationError({'users': 'Alcuni utenti sono già iscritti a un gruppo dello stesso ambito'})
+        return Response({'moved': moved}, status=status.HTTP_200_OK)
+
+
+class StatsView(APIView):
+    """
+    Statistiche sui goal per lo staff: `goals` (completamento per goal),
+    `topics` (medie per topic), `points` (percentili e istogramma dei punti
+    per gruppo). Senza sezione le ritorna tutte.
+    """
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request, section=None):
+        if section is None:
+            return Response({name: stats.cached(name, build) for name, build in stats.SECTIONS.items()})
+        if section not in stats.SECTIONS:
+            return Response({'error': 'Statistica non trovata'}, status=status.HTTP_404_NOT_FOUND)
+        if section == 'points' and 'bins' in request.query_params:
+            try:
+                bins = min(max(int(request.query_params['bins']), 1), 100)
+            except ValueError:
+                return Response({'error': 'bins non valido'}, status=status.HTTP_400_BAD_REQUEST)
+            return Response(stats.cached(f'points:{bins}', lambda: stats.points_stats(bins)))
+        return Response(stats.cached(section, stats.SECTIONS[section]))
+
+
+class GroupEventsView(APIView):
+    """
+    Change feed di gruppi, membri e goal.
+    - ASGI: stream SSE (`text/event-stream`), ripresa con Last-Event-ID
+    - WSGI: long-poll JSON, ripresa con `?last_event_id=`
+    Con `?group=1,2` si ricevono solo gli eventi di quei gruppi.
+    """
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [FastJSONRenderer, EventStreamRenderer]
+
+    def get(self, request):
+        broker = events.get_broker()
+        groups = self.get_groups(request)
+        last_id = self.get_last_event_id(request)
+
+        if isinstance(request._request, ASGIRequest):
+            response = StreamingHttpResponse(
+                self.stream(broker, last_id, groups), content_type='text/event-stream'
+            )
+            response['Cache-Control'] = 'no-cache'
+            response['X-Accel-Buffering'] = 'no'
+            return response
+
+        try:
+            timeout = min(float(request.query_params.get('timeout', settings.EVENTS_LONG_POLL_TIMEOUT)),
+                          settings.EVENTS_LONG_POLL_TIMEOUT)
+        except ValueError:
+            return Response({'error': 'timeout non valido'}, status=status.HTTP_400_BAD_REQUEST)
+
+        found = broker.wait(last_id, groups, timeout=max(timeout, 0))
+        return Response({
+            'events': [event.as_dict() for event in found],
+            'last_event_id': found[-1].id if found else max(last_id, broker.last_id()),
+        })
+
+    async def stream(self, broker, last_id, groups):
+        idle = 0.0
+        while True:
+            found = broker.since(last_id, groups)
+            for event in found:
+                last_id = event.id
+                yield event_frame(event.as_dict())
+            if found:
+                idle = 0.0
+            elif idle >= settings.EVENTS_HEARTBEAT:
+                idle = 0.0
+                yield b": keep-alive\n\n"
+            await asyncio.sleep(settings.EVENTS_POLL_INTERVAL)
+            idle += settings.EVENTS_POLL_INTERVAL
+
+    @staticmethod
+    def get_groups(request):
+        raw = request.query_params.get('group', '')
+        return {int(pk) for pk in raw.split(',') if pk.strip().isdigit()} or None
+
+    @staticmethod
+    def get_last_event_id(request):
+        raw = request.headers.get('Last-Event-ID') or request.query_params.get('last_event_id') or '0'
+        return int(raw) if raw.isdigit() else 0
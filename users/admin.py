@@ -1,3 +1,14 @@
 from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from core.admin import EstimatedCountPaginator
+from .models import User
 
-# Register your models here.
+
+@admin.register(User)
+class UserAdmin(BaseUserAdmin):
+    list_display = ("username", "email", "first_name", "last_name", "matricola", "is_staff")
+    search_fields = ("username", "email", "first_name", "last_name", "matricola")
+    fieldsets = BaseUserAdmin.fieldsets + (("Università", {"fields": ("matricola",)}),)
+    add_fieldsets = BaseUserAdmin.add_fieldsets + (("Università", {"fields": ("email", "matricola")}),)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
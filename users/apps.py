@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from core import sync
+        from .models import User
+        from .serializers import UserSerializer
+        # Gli amministratori non sono visibili ai client
+        sync.register(User, UserSerializer, queryset=User.objects.filter(is_superuser=False))
@@ -0,0 +1,93 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch
+
+from group_projects.models import GroupGoal, GroupProject, UserGroup
+
+
+def cache_key(user_id, name):
+    return f'me:{user_id}:{name}'
+
+
+def invalidate(user_id):
+    cache.delete_many([cache_key(user_id, 'groups'), cache_key(user_id, 'progress')])
+
+
+def invalidate_many(user_ids):
+    cache.delete_many([cache_key(user_id, name) for user_id in user_ids for name in ('groups', 'progress')])
+
+
+def user_groups(user):
+    """
+    Gruppi dell'utente con topic, membri e goal: tre query in tutto,
+    qualunque sia il numero di gruppi.
+    """
+    return (
+        GroupProject.objects.filter(users__user=user)
+        .select_related('topic')
+        .prefetch_related(
+            Prefetch('users', queryset=UserGroup.objects.select_related('user').order_by('user__username')),
+            Prefetch('goals', queryset=GroupGoal.objects.select_related('goal').order_by('goal_id')),
+        )
+        .order_by('id')
+        .distinct()
+    )
+
+
+def cached(user, name, build):
+    key = cache_key(user.pk, name)
+    data = cache.get(key)
+    if data is None:
+        data = build(user)
+        cache.set(key, data, settings.ME_CACHE_TIMEOUT)
+    return data
+
+
+def build_groups(user):
+    data = []
+    for group in user_groups(user):
+        goals = list(group.goals.all())
+        data.append({
+            'id': group.id,
+            'name': group.name,
+            'topic': {'id': group.topic.id, 'title': group.topic.title},
+            'link_django': group.link_django,
+            'link_tui': group.link_tui,
+            'link_gui': group.link_gui,
+            'teammates': [
+                {
+                    'id': membership.user.id,
+                    'username': membership.user.username,
+                    'full_name': membership.user.get_full_name(),
+                }
+                for membership in group.users.all() if membership.user_id != user.pk
+            ],
+            'goals': {'complete': sum(goal.complete for goal in goals), 'total': len(goals)},
+        })
+    return data
+
+
+def build_progress(user):
+    groups = []
+    totals = {'complete': 0, 'total': 0, 'points': 0, 'points_total': 0}
+    for group in user_groups(user):
+        goals = [
+            {
+                'id': group_goal.id,
+                'goal': group_goal.goal_id,
+                'title': group_goal.goal.title,
+                'points': group_goal.goal.points,
+                'complete': group_goal.complete,
+            }
+            for group_goal in group.goals.all()
+        ]
+        summary = {
+            'complete': sum(goal['complete'] for goal in goals),
+            'total': len(goals),
+            'points': sum(goal['points'] for goal in goals if goal['complete']),
+            'points_total': sum(goal['points'] for goal in goals),
+        }
+        for name, value in summary.items():
+            totals[name] += value
+        groups.append({'id': group.id, 'name': group.name, 'goals': goals, **summary})
+    return {'groups': groups, **totals}
@@ -0,0 +1,119 @@
+import threading
+import uuid
+from bisect import bisect_left
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import User
+
+VERSION_KEY = 'user-directory:version'
+
+
+def data_key(version):
+    return f'user-directory:{version}'
+
+
+@dataclass(frozen=True)
+class DirectoryIndex:
+    """
+    Elenco compatto degli utenti con un indice ordinato per la ricerca per
+    prefisso: ogni chiave (username, nome, cognome, nome completo,
+    matricola) punta alla posizione dell'utente in `entries`.
+    """
+    version: str
+    entries: list
+    keys: list
+    positions: list
+
+    @classmethod
+    def build(cls, version, entries):
+        pairs = []
+        for position, entry in enumerate(entries):
+            for key in search_keys(entry):
+                pairs.append((key, position))
+        pairs.sort()
+        return cls(version, entries, [key for key, _ in pairs], [position for _, position in pairs])
+
+    def search(self, prefix, limit):
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return self.entries[:limit]
+        found = []
+        seen = set()
+        # Si scorrono gli indici: una slice copierebbe tutta la coda dell'indice
+        for i in range(bisect_left(self.keys, prefix), len(self.keys)):
+            key, position = self.keys[i], self.positions[i]
+            if not key.startswith(prefix) or len(found) >= limit:
+                break
+            if position not in seen:
+                seen.add(position)
+                found.append(position)
+        # Risultati nell'ordine dell'elenco, non delle chiavi
+        return [self.entries[position] for position in sorted(found)]
+
+
+def search_keys(entry):
+    keys = {entry['username'].lower(), entry['matricola']}
+    full_name = entry['full_name'].lower()
+    if full_name:
+        keys.add(full_name)
+        keys.update(full_name.split())
+    return keys
+
+
+def current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    """Invalida l'elenco: va chiamata a ogni modifica di un utente"""
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def load_entries():
+    rows = (
+        User.objects.filter(is_superuser=False)
+        .order_by('username')
+        .values_list('id', 'username', 'first_name', 'last_name', 'matricola')
+    )
+    return [
+        {
+            'id': pk,
+            'username': username,
+            'full_name': f'{first_name} {last_name}'.strip(),
+            'matricola': matricola,
+        }
+        for pk, username, first_name, last_name, matricola in rows
+    ]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """
+    Ritorna l'indice della versione corrente. L'indice vive nella memoria
+    del processo; l'elenco serializzato è condiviso tramite la cache, così
+    solo il primo processo dopo una modifica legge il DB.
+    """
+    global _index
+    version = current_version()
+    index = _index
+    if index is not None and index.version == version:
+        return index
+    with _index_lock:
+        if _index is not None and _index.version == version:
+            return _index
+        entries = cache.get(data_key(version))
+        if entries is None:
+            entries = load_entries()
+            cache.set(data_key(version), entries, settings.USER_DIRECTORY_CACHE_TIMEOUT)
+        _index = DirectoryIndex.build(version, entries)
+        return _index
@@ -0,0 +1,130 @@
+import atexit
+import datetime
+import logging
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.db.models import Case, DateTimeField, F, Q, Value, When
+from django.utils import timezone
+
+from .models import User
+
+logger = logging.getLogger(__name__)
+
+
+class LastLoginRecorder:
+    """
+    Tiene in memoria l'ultimo login di ogni utente e lo scrive ogni
+    `interval` secondi con un solo `UPDATE ... CASE` per blocco di utenti,
+    invece di un UPDATE per ogni login.
+    """
+    def __init__(self, interval=30, staleness=60, batch_size=500):
+        self.interval = interval
+        self.staleness = datetime.timedelta(seconds=staleness)
+        self.batch_size = batch_size
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def record(self, user, when=None):
+        when = when or timezone.now()
+        # Un last_login abbastanza recente non vale una scrittura
+        if user.last_login and when - user.last_login < self.staleness:
+            return
+        with self._lock:
+            previous = self._pending.get(user.pk)
+            if previous is None or previous < when:
+                self._pending[user.pk] = when
+            self._schedule()
+        if not self.interval:
+            self.flush()
+
+    def _schedule(self):
+        # Chiamato con il lock acquisito
+        if self.interval and self._timer is None:
+            self._timer = threading.Timer(self.interval, self._run)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _run(self):
+        """Flush dal thread del timer, che poi termina: la sua connessione va chiusa"""
+        try:
+            self.flush()
+        except DatabaseError:
+            logger.exception("Scrittura di last_login fallita, riprovo al prossimo intervallo")
+        finally:
+            connections.close_all()
+
+    def pending(self):
+        with self._lock:
+            return dict(self._pending)
+
+    def flush(self):
+        """Scrive i login accumulati; ritorna il numero di righe aggiornate"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        items = sorted(pending.items())
+        updated = 0
+        for start in range(0, len(items), self.batch_size):
+            batch = items[start:start + self.batch_size]
+            try:
+                # Il CASE non riporta indietro un last_login già più recente
+                updated += User.objects.filter(pk__in=[pk for pk, _ in batch]).update(last_login=Case(
+                    *[
+                        When(Q(pk=pk) & (Q(last_login__isnull=True) | Q(last_login__lt=when)), then=Value(when))
+                        for pk, when in batch
+                    ],
+                    default=F('last_login'),
+                    output_field=DateTimeField(),
+                ))
+            except DatabaseError:
+                # I login non scritti tornano in coda, senza scavalcare quelli più recenti
+                self._requeue(items[start:])
+                raise
+        return updated
+
+    def _requeue(self, items):
+        with self._lock:
+            for pk, when in items:
+                previous = self._pending.get(pk)
+                if previous is None or previous < when:
+                    self._pending[pk] = when
+            self._schedule()
+
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def get_recorder():
+    global _recorder
+    if _recorder is None:
+        with _recorder_lock:
+            if _recorder is None:
+                _recorder = LastLoginRecorder(
+                    interval=settings.LAST_LOGIN_FLUSH_INTERVAL,
+                    staleness=settings.LAST_LOGIN_STALENESS,
+                )
+    return _recorder
+
+
+def reset_recorder():
+    global _recorder
+    with _recorder_lock:
+        if _recorder is not None:
+            _recorder.flush()
+        _recorder = None
+
+
+@atexit.register
+def _flush_at_exit():
+    if _recorder is not None:
+        _recorder.flush()
+
+
+def record_login(user):
+    get_recorder().record(user)
@@ -0,0 +1,17 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .directory import bump_version
+from .models import User
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_directory(sender, update_fields=None, **kwargs):
+    """L'elenco utenti è servito da cache: ogni modifica ne cambia la versione"""
+    # last_login non fa parte dell'elenco
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    # Dopo il commit, o un altro processo potrebbe ricaricare dati vecchi
+    # sotto la nuova versione
+    transaction.on_commit(bump_version)
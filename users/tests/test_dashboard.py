@@ -0,0 +1,74 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from group_projects.models import Goal, GroupGoal, GroupProject, Topic, UserGroup
+from users.models import User
+from users.views import UserViewSet
+
+
+@pytest.fixture
+def users():
+    return [
+        User.objects.create_user(username=f"user{i}", first_name="Nome", last_name=f"Cognome{i}",
+                                 email=f"user{i}@example.org", password="pass", matricola=f"10000{i}")
+        for i in range(3)
+    ]
+
+
+@pytest.fixture
+def groups(users):
+    topic = Topic.objects.create(title="Mock Topic")
+    goals = list(Goal.objects.order_by("id")[:2])
+    groups = []
+    for i in range(2):
+        group = GroupProject.objects.create(name=f"Group {i}", topic=topic)
+        UserGroup.objects.create(user=users[0], group=group)
+        UserGroup.objects.create(user=users[i + 1], group=group)
+        GroupGoal.objects.create(group=group, goal=goals[0], complete=True)
+        GroupGoal.objects.create(group=group, goal=goals[1])
+        groups.append(group)
+    return groups
+
+
+def get(user, action):
+    req = APIRequestFactory().get(f"/api/v1/users/me/{action}/")
+    req.user = user
+    return UserViewSet.as_view({"get": f"my_{action}"})(req)
+
+
+@pytest.mark.django_db
+def test_my_groups_uses_fixed_number_of_queries(users, groups):
+    with CaptureQueriesContext(connection) as queries:
+        res = get(users[0], "groups")
+
+    assert res.status_code == 200
+    assert len(queries) == 3
+    assert [g["name"] for g in res.data] == ["Group 0", "Group 1"]
+    assert res.data[0]["topic"]["title"] == "Mock Topic"
+    assert res.data[0]["teammates"] == [{"id": users[1].id, "username": "user1", "full_name": "Nome Cognome1"}]
+    assert res.data[0]["goals"] == {"complete": 1, "total": 2}
+
+    with CaptureQueriesContext(connection) as queries:
+        get(users[0], "groups")
+    assert len(queries) == 0
+
+
+@pytest.mark.django_db
+def test_my_progress_totals(users, groups):
+    res = get(users[1], "progress")
+
+    assert [g["id"] for g in res.data["groups"]] == [groups[0].id]
+    group = res.data["groups"][0]
+    assert [goal["complete"] for goal in group["goals"]] == [True, False]
+    assert res.data["complete"] == 1
+    assert res.data["total"] == 2
+    assert res.data["points_total"] == sum(goal["points"] for goal in group["goals"])
+
+
+@pytest.mark.django_db
+def test_joining_a_group_invalidates_cached_dashboard(users, groups, django_capture_on_commit_callbacks):
+    assert len(get(users[2], "groups").data) == 1
+    with django_capture_on_commit_callbacks(execute=True):
+        UserGroup.objects.create(user=users[2], group=groups[0])
+    assert len(get(users[2], "groups").data) == 2
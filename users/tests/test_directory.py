@@ -0,0 +1,82 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from users import directory
+from users.models import User
+from users.views import UserViewSet
+
+
+@pytest.fixture
+def users():
+    data = [("mrossi", "Mario", "Rossi", "100001"), ("lbianchi", "Luca", "Bianchi", "100002"),
+            ("mverdi", "Marta", "Verdi", "200003")]
+    return [
+        User.objects.create_user(username=u, first_name=f, last_name=l, matricola=m,
+                                 email=f"{u}@example.org", password="pass")
+        for u, f, l, m in data
+    ]
+
+
+def search(user, **params):
+    req = APIRequestFactory().get("/api/v1/users/directory/", params)
+    req.user = user
+    return UserViewSet.as_view({"get": "directory"})(req)
+
+
+@pytest.mark.django_db
+def test_directory_prefix_search(admin_user, users):
+    assert [u["username"] for u in search(users[0]).data] == ["lbianchi", "mrossi", "mverdi"]
+    assert [u["username"] for u in search(users[0], q="mar").data] == ["mrossi", "mverdi"]
+    assert [u["username"] for u in search(users[0], q="2000").data] == ["mverdi"]
+    assert [u["username"] for u in search(users[0], q="luca bia").data] == ["lbianchi"]
+    assert search(users[0], q="adm").data == []
+    assert search(users[0], q="mario").data == [
+        {"id": users[0].id, "username": "mrossi", "full_name": "Mario Rossi", "matricola": "100001"}
+    ]
+
+
+@pytest.mark.django_db
+def test_directory_served_from_memory_until_user_changes(users, django_capture_on_commit_callbacks):
+    first = search(users[0])
+    with CaptureQueriesContext(connection) as queries:
+        again = search(users[0], q="m")
+    assert len(queries) == 0
+    assert again["ETag"] == first["ETag"]
+
+    # Un login non invalida l'elenco
+    with django_capture_on_commit_callbacks(execute=True):
+        users[1].save(update_fields=["last_login"])
+    assert search(users[0])["ETag"] == first["ETag"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        users[1].first_name = "Lucia"
+        users[1].save()
+    res = search(users[0], q="lucia")
+    assert res["ETag"] != first["ETag"]
+    assert [u["username"] for u in res.data] == ["lbianchi"]
+
+
+def test_index_limit():
+    entries = [{"id": i, "username": f"user{i}", "full_name": "", "matricola": f"{i:06d}"} for i in range(10)]
+    index = directory.DirectoryIndex.build("v", entries)
+    assert len(index.search("user", 3)) == 3
+    assert len(index.search("", 5)) == 5
+
+
+@pytest.mark.django_db
+def test_directory_answers_if_none_match_with_304(users):
+    etag = search(users[0])["ETag"]
+    req = APIRequestFactory().get("/api/v1/users/directory/", HTTP_IF_NONE_MATCH=f"W/{etag}")
+    req.user = users[0]
+    res = UserViewSet.as_view({"get": "directory"})(req)
+    assert res.status_code == 304
+    assert res["ETag"] == etag
+    assert search(users[0], q="mar").status_code == 200
+
+
+def test_search_stops_at_the_limit():
+    entries = [{"id": i, "username": f"user{i:03}", "full_name": "", "matricola": f"{i:06}"} for i in range(200)]
+    index = directory.DirectoryIndex.build("v", entries)
+    assert [e["id"] for e in index.search("user0", 3)] == [0, 1, 2]
+    assert index.search("zzz", 3) == []
@@ -0,0 +1,81 @@
+import datetime
+from unittest import mock
+import pytest
+from django.db import OperationalError, connection
+from django.db.models import QuerySet
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from users.last_login import LastLoginRecorder
+from users.models import User
+
+
+@pytest.fixture
+def users():
+    return [
+        User.objects.create_user(username=f"user{i}", email=f"user{i}@example.org", password="pass", matricola=f"10000{i}")
+        for i in range(3)
+    ]
+
+
+@pytest.mark.django_db
+def test_logins_are_coalesced_into_one_update(users):
+    recorder = LastLoginRecorder(interval=60, staleness=0)
+    now = timezone.now()
+    for user in users:
+        recorder.record(user, now)
+    recorder.record(users[0], now + datetime.timedelta(seconds=5))
+    assert len(recorder.pending()) == 3
+
+    with CaptureQueriesContext(connection) as queries:
+        assert recorder.flush() == 3
+    assert len(queries) == 1
+    assert "CASE" in queries[0]["sql"]
+
+    users[0].refresh_from_db()
+    assert users[0].last_login == now + datetime.timedelta(seconds=5)
+    assert recorder.pending() == {}
+
+
+@pytest.mark.django_db
+def test_flush_never_moves_last_login_backwards(users):
+    now = timezone.now()
+    User.objects.filter(pk=users[0].pk).update(last_login=now)
+    recorder = LastLoginRecorder(interval=60, staleness=0)
+    recorder.record(users[0], now - datetime.timedelta(minutes=1))
+    recorder.flush()
+
+    users[0].refresh_from_db()
+    assert users[0].last_login == now
+
+
+@pytest.mark.django_db
+def test_recent_last_login_is_not_rewritten(users):
+    recorder = LastLoginRecorder(interval=60, staleness=60)
+    users[0].last_login = timezone.now() - datetime.timedelta(seconds=10)
+    recorder.record(users[0])
+    assert recorder.pending() == {}
+
+
+@pytest.mark.django_db
+def test_failed_write_keeps_logins_pending(users):
+    recorder = LastLoginRecorder(interval=60, staleness=0)
+    now = timezone.now()
+    recorder.record(users[0], now)
+    with mock.patch.object(QuerySet, "update", side_effect=OperationalError("database is locked")):
+        with pytest.raises(OperationalError):
+            recorder.flush()
+    assert recorder.pending() == {users[0].pk: now}
+
+    assert recorder.flush() == 1
+    users[0].refresh_from_db()
+    assert users[0].last_login == now
+
+
+@pytest.mark.django_db
+def test_timer_flush_closes_its_connection(users):
+    recorder = LastLoginRecorder(interval=60, staleness=0)
+    recorder.record(users[0])
+    with mock.patch("users.last_login.connections") as connections:
+        recorder._run()
+    connections.close_all.assert_called_once()
+    assert recorder.pending() == {}
@@ -138,6 +138,8 @@ def test_valid_user_register_serializer(mock_request):
     assert user.first_name == data['first_name']
     assert user.last_name == data['last_name']
     assert user.matricola == data['matricola']
+    # L'EmailAddress di allauth esiste già quando la registrazione risponde
+    assert user.emailaddress_set.filter(email=data['email'], primary=True).exists()
 
 @pytest.mark.django_db
 def test_psw_dont_match_user_register_serializer():
@@ -268,4 +270,11 @@ def test_get_token_from_custom_jwt_serializer():
     assert "access" in tokens
     assert "refresh" in tokens
     assert isinstance(tokens["access"], str)
-    assert isinstance(tokens["refresh"], str)
\ No newline at end of file
+    assert isinstance(tokens["refresh"], str)
+
+def test_register_serializer_is_loaded_lazily():
+    from users import serializers
+    from users.registration import UserRegisterSerializer
+    assert serializers.UserRegisterSerializer is UserRegisterSerializer
+    with pytest.raises(AttributeError):
+        serializers.DoesNotExist
@@ -198,6 +198,17 @@ def test_token_obtain_success_sets_refresh_cookie():
     assert cookie_name in res.cookies
     assert res.cookies[cookie_name]["httponly"] is True
 
+@pytest.mark.django_db
+def test_token_obtain_records_last_login():
+    user = User.objects.create_user(username="testuser", email="test@example.com", password="pass123")
+    req = APIRequestFactory().post("/auth/login/", {"username": "testuser", "password": "pass123"}, format="json")
+
+    res = CustomTokenObtainPairView.as_view()(req)
+
+    assert res.status_code == 200
+    user.refresh_from_db()
+    assert user.last_login is not None
+
 @pytest.mark.django_db
 def test_token_obtain_invalid_credentials():
     factory = APIRequestFactory()
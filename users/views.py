@@ -4,12 +4,16 @@ from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from .models import User
+from . import dashboard
+from .directory import get_index
 from .serializers import UserSerializer
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError
 from .serializers import CustomTokenObtainPairSerializer
 from django.conf import settings
+from django.http import HttpResponseNotModified
+from core.mixins import AuditMixin, SparseFieldsetMixin
 
 
 class CustomTokenObtainPairView(TokenObtainPairView):
@@ -70,7 +74,7 @@ class CustomLogoutView(APIView):
         return response
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(AuditMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     
@@ -83,7 +87,7 @@ class UserViewSet(viewsets.ModelViewSet):
     
     def get_permissions(self):
         """Admin può modificare, tutti possono visualizzare"""
-        if self.action in ['list', 'retrieve', 'me']:
+        if self.action in ['list', 'retrieve', 'me', 'my_groups', 'my_progress', 'directory']:
             return [IsAuthenticated()]
         return [IsAuthenticated(), IsAdminUser()]
     
@@ -91,4 +95,35 @@ class UserViewSet(viewsets.ModelViewSet):
     def me(self, request):
         """Ritorna i dati dell'utente corrente"""
         serializer = self.get_serializer(request.user)
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'], url_path='me/groups')
+    def my_groups(self, request):
+        """Gruppi dell'utente corrente con topic, compagni e goal completati"""
+        return Response(dashboard.cached(request.user, 'groups', dashboard.build_groups))
+
+    @action(detail=False, methods=['get'], url_path='me/progress')
+    def my_progress(self, request):
+        """Avanzamento dei goal dell'utente corrente, per gruppo e in totale"""
+        return Response(dashboard.cached(request.user, 'progress', dashboard.build_progress))
+
+    @action(detail=False, methods=['get'])
+    def directory(self, request):
+        """
+        Elenco compatto degli utenti per l'autocompletamento, servito dalla
+        memoria. `?q=` cerca per prefisso su username, nome, cognome e matricola.
+        """
+        index = get_index()
+        etag = f'"{index.version}"'
+        if_none_match = request.headers.get('If-None-Match', '')
+        if etag in [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]:
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            return response
+        try:
+            limit = min(int(request.query_params.get('limit', settings.USER_DIRECTORY_LIMIT)), 100)
+        except ValueError:
+            limit = settings.USER_DIRECTORY_LIMIT
+        response = Response(index.search(request.query_params.get('q', ''), max(limit, 1)))
+        response['ETag'] = etag
+        return response